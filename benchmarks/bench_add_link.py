@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark the cost of building a document with ``Document.add_link``.
+
+Each run adds N links with distinct link relationship types to an empty
+document and reports the total time and the time per link. If adding a link
+takes constant time, the time per link stays flat as N grows.
+
+Usage: python benchmarks/bench_add_link.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import dougrain
+
+SIZES = [250, 500, 1000, 2000, 4000]
+
+
+def build(n):
+    doc = dougrain.Document.empty("http://localhost/")
+    for i in range(n):
+        doc.add_link("/rels/item%d" % i, "/items/%d" % i)
+        doc.add_link("http://localhost/rels/item%d" % i, "/other/%d" % i)
+    return doc
+
+
+def main():
+    print("%8s %12s %14s" % ("links", "total (s)", "per link (us)"))
+    for n in SIZES:
+        seconds = min(timeit.repeat(lambda: build(n), number=1, repeat=3))
+        print("%8d %12.4f %14.2f" % (2 * n, seconds, seconds * 1e6 / (2 * n)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark making edited variants of a large document.
+
+Each variant changes a property of the document and a property of one
+embedded resource. The variants are made by deep-copying the document's
+JSON object, which is what had to be done before, and by
+``Document.clone``, which only copies the objects on the path to each
+change.
+
+Usage: python benchmarks/bench_clone.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import copy
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+
+NUMBER = 20
+
+
+def make_document(size):
+    return Document.from_object({
+        '_links': {'self': {'href': "/catalog"}},
+        'count': size,
+        '_embedded': {'item': [{
+            '_links': {'self': {'href': "/items/%d" % i}},
+            'name': "Item %d" % i,
+            'tags': ["tag%d" % j for j in range(10)],
+        } for i in range(size)]},
+    })
+
+
+def edit(variant):
+    variant.set_property('user', "ann")
+    variant.embedded['item'][0].set_property('favourite', True)
+    return variant
+
+
+def deep_copied(doc):
+    return edit(Document.from_object(copy.deepcopy(doc.as_object())))
+
+
+def cloned(doc):
+    return edit(doc.clone())
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    doc = make_document(size)
+    print("%12s %14s" % ("method", "us/variant"))
+    for label, fn in [("deepcopy", deep_copied), ("clone", cloned)]:
+        seconds = min(timeit.repeat(lambda: fn(doc), number=NUMBER,
+                                    repeat=3)) / NUMBER
+        print("%12s %14.1f" % (label, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark reading two properties of every embedded resource.
+
+The properties are read through ``embedded``, which builds a ``Document``
+for every resource, and with ``Document.embedded_columns``, which reads
+them from the JSON objects of the resources. Each run uses a new document,
+as a request handler would. Columns are made with ``numpy`` if it is
+installed, and with ``array.array`` in any case.
+
+Usage: python benchmarks/bench_columns.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+from dougrain import columns
+
+NUMBER = 10
+
+FIELDS = ['price', 'quantity']
+
+
+def make_object(size):
+    return {
+        '_links': {'self': {'href': "/items"}},
+        '_embedded': {'item': [{
+            '_links': {'self': {'href': "/items/%d" % i}},
+            'name': "Item %d" % i,
+            'price': i * 0.25,
+            'quantity': i % 7,
+        } for i in range(size)]},
+    }
+
+
+def per_document(doc):
+    items = doc.embedded['item']
+    return dict((field, [item.properties[field] for item in items])
+                for field in FIELDS)
+
+
+def array_columns(doc):
+    return doc.embedded_columns('item', FIELDS, use_numpy=False)
+
+
+def numpy_columns(doc):
+    return doc.embedded_columns('item', FIELDS, use_numpy=True)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    o = make_object(size)
+    methods = [("documents", per_document), ("array", array_columns)]
+    if columns.numpy is not None:
+        methods.append(("numpy", numpy_columns))
+
+    print("%12s %12s" % ("method", "ms/read"))
+    for label, fn in methods:
+        seconds = min(timeit.repeat(
+            lambda: fn(Document.from_object(o, "http://example.com/")),
+            number=NUMBER, repeat=5)) / NUMBER
+        print("%12s %12.2f" % (label, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
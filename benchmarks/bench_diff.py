@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark diffing two versions of a large collection.
+
+The second version moves a few embedded resources, changes one and removes
+one. It is compared with a generic position-by-position JSON diff and with
+``Document.diff``, which matches embedded resources by their ``self``
+links. The number of JSON Patch operations each produces is printed with
+the time taken to make and serialize them, as for sending to a subscriber.
+A last row diffs a version with 45% of its items shuffled, just under the
+fraction at which ``Document.diff`` replaces the array instead of moving
+items.
+
+Usage: python benchmarks/bench_diff.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+from dougrain import patch
+
+NUMBER = 5
+
+
+def make_object(size):
+    return {
+        '_links': {'self': {'href': "/catalog"}},
+        'count': size,
+        '_embedded': {'item': [{
+            '_links': {'self': {'href': "/items/%d" % i}},
+            'name': "Item %d" % i,
+            'price': i % 100,
+        } for i in range(size)]},
+    }
+
+
+def changed(o):
+    o = json.loads(json.dumps(o))
+    items = o['_embedded']['item']
+    items.insert(len(items) // 2, items.pop(1))
+    items.insert(0, items.pop())
+    items[5]['price'] = -1
+    del items[len(items) // 3]
+    o['count'] = len(items)
+    return o
+
+
+def shuffled(o, fraction=0.45):
+    o = json.loads(json.dumps(o))
+    items = o['_embedded']['item']
+    rng = random.Random(1)
+    positions = sorted(rng.sample(range(len(items)),
+                                  int(len(items) * fraction)))
+    moved = [items[i] for i in positions]
+    rng.shuffle(moved)
+    for i, item in zip(positions, moved):
+        items[i] = item
+    return o
+
+
+def generic(old, new):
+    operations = []
+    patch.diff_value(old.o, new.o, (), operations)
+    return operations
+
+
+def hal(old, new):
+    return old.diff(new)
+
+
+def send(fn, old, new):
+    return json.dumps(fn(old, new))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    o = make_object(size)
+    old = Document.from_object(o)
+    new = Document.from_object(changed(o))
+    moved = Document.from_object(shuffled(o))
+    print("%12s %12s %12s %12s" % ("method", "operations", "bytes",
+                                    "ms/diff"))
+    for label, fn, new in [("generic", generic, new), ("diff", hal, new),
+                           ("diff 45%", hal, moved)]:
+        count = len(fn(old, new))
+        size = len(send(fn, old, new))
+        seconds = min(timeit.repeat(lambda: send(fn, old, new),
+                                    number=NUMBER, repeat=3)) / NUMBER
+        print("%12s %12d %12d %12.1f" % (label, count, size, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
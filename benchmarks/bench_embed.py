@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark embedding many resources in a collection resource.
+
+Compares ``Document.embed`` called in a loop, ``Document.embed_many``, and
+``Builder.embed`` called in a loop. Every embedded resource has a ``self``
+link, so the Draft 5 automatic links are added as well.
+
+Each ``Document.embed`` call scans the existing links for the ``rel``, so the
+loop is quadratic and is only timed for the smaller sizes.
+
+Usage: python benchmarks/bench_embed.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import dougrain
+
+SIZES = [500, 1000, 10000]
+LOOP_LIMIT = 1000
+
+
+def make_items(n):
+    return [dougrain.Builder("/items/%d" % i).set_property('index', i)
+            for i in range(n)]
+
+
+def document_embed(items):
+    doc = dougrain.Document.empty("http://localhost/")
+    for item in items:
+        doc.embed('item', item)
+
+
+def document_embed_many(items):
+    doc = dougrain.Document.empty("http://localhost/")
+    doc.embed_many('item', items)
+
+
+def builder_embed(items):
+    builder = dougrain.Builder("/items/")
+    for item in items:
+        builder.embed('item', item)
+
+
+def main():
+    print("%8s %22s %12s" % ("items", "method", "time (s)"))
+    for n in SIZES:
+        items = make_items(n)
+        for fn in (document_embed, document_embed_many, builder_embed):
+            if fn is document_embed and n > LOOP_LIMIT:
+                continue
+            seconds = min(timeit.repeat(lambda: fn(items), number=1,
+                                        repeat=3))
+            print("%8d %22s %12.4f" % (n, fn.__name__, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark ``link.extract_variables`` on adversarial hrefs.
+
+Times the old regular expression and the new scanner on four shapes of
+href:
+
+    - ``unclosed``: ``"/items{" + "a" * n``, an expression that is never
+      closed. The regular expression backtracks exponentially on these, so
+      it is only run on short hrefs.
+    - ``repeated``: ``"{a}" * n``, many expressions naming one variable.
+    - ``list``: ``"{" + "a," * n + "}"``, one expression with a long list
+      of variables.
+    - ``distinct``: ``n`` expressions, each naming a different variable.
+      The regular expression implementation removes duplicates with a list,
+      so it takes time quadratic in ``n``.
+
+The scanner should take time proportional to the length of every shape.
+The template cache is cleared before each call so that every call scans its
+href.
+
+Usage: python benchmarks/bench_extract_variables.py
+"""
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import link
+from dougrain import template
+
+
+def regex_extract_variables(href):
+    """The regular expression implementation that the scanner replaced."""
+    patterns = [re.sub(r'\*|:\d+', '', pattern)
+                for pattern in re.findall(r'{[\+#\./;\?&]?([^}]+)*}', href)]
+    variables = []
+    for pattern in patterns:
+        for part in pattern.split(","):
+            if not part in variables:
+                variables.append(part)
+    return variables
+
+
+def scanner_extract_variables(href):
+    template.TEMPLATE_CACHE.clear()
+    return link.extract_variables(href)
+
+
+def time(fn, href, number):
+    return min(timeit.repeat(lambda: fn(href), number=number,
+                             repeat=3)) / number
+
+
+SHAPES = [
+    ("unclosed", lambda n: "/items{" + "a" * n),
+    ("repeated", lambda n: "{a}" * n),
+    ("list", lambda n: "{" + "a," * n + "}"),
+    ("distinct", lambda n: "".join("{v%d}" % i for i in range(n))),
+]
+
+
+def report(label, fn, shape, sizes, number):
+    print("%s, %s" % (label, shape))
+    print("%10s %14s %16s" % ("length", "ms/call", "ns/character"))
+    make_href = dict(SHAPES)[shape]
+    for size in sizes:
+        href = make_href(size)
+        seconds = time(fn, href, number)
+        print("%10d %14.3f %16.2f" % (len(href), seconds * 1e3,
+                                      seconds * 1e9 / len(href)))
+
+
+def main():
+    report("regex", regex_extract_variables, "unclosed", [14, 16, 18, 20], 1)
+    report("scanner", scanner_extract_variables, "unclosed",
+           [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], 10)
+    for shape, _ in SHAPES[1:]:
+        report("regex", regex_extract_variables, shape,
+               [10 ** 2, 10 ** 3, 10 ** 4], 1)
+        report("scanner", scanner_extract_variables, shape,
+               [10 ** 3, 10 ** 4, 10 ** 5], 3)
+
+
+if __name__ == '__main__':
+    main()
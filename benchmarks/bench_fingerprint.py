@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark computing ETags for a large document.
+
+Compares hashing the sorted JSON text of the whole document with
+``Document.etag``, which hashes the document once and then reuses its
+cached Merkle digests: unchanged, and after a change to one embedded
+resource, which only hashes the path from that resource to the root.
+
+Usage: python benchmarks/bench_fingerprint.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import hashlib
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+
+NUMBER = 20
+
+
+def make_document(size):
+    return Document.from_object({
+        '_links': {'self': {'href': "/orders"}},
+        'count': size,
+        '_embedded': {'item': [{
+            '_links': {'self': {'href': "/orders/%d" % i}},
+            'total': i,
+            'notes': "Deliver to the back door. " * 10,
+            '_embedded': {'line': [{'product': "/products/%d" % j,
+                                    'quantity': j} for j in range(5)]},
+        } for i in range(size)]},
+    })
+
+
+def dumps_etag(doc):
+    text = json.dumps(doc.as_object(), sort_keys=True)
+    return '"%s"' % hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    doc = make_document(size)
+    item = doc.embedded['item'][size // 2]
+    counter = [0]
+
+    def edit():
+        counter[0] += 1
+        item.set_property('total', counter[0])
+        return doc.etag()
+
+    def first():
+        # A new document for the same JSON object has no cached digests.
+        return Document.from_object(doc.o).etag()
+
+    doc.etag()
+    cases = [
+        ("sorted dumps", lambda: dumps_etag(doc)),
+        ("first etag", first),
+        ("cached etag", doc.etag),
+        ("etag after edit", edit),
+    ]
+
+    print("%16s %12s" % ("method", "us/etag"))
+    for label, fn in cases:
+        seconds = min(timeit.repeat(fn, number=NUMBER, repeat=3)) / NUMBER
+        print("%16s %12.2f" % (label, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
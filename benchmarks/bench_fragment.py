@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark embedding a shared resource with and without a
+``FragmentCache``.
+
+Builds and serializes a collection in which every item embeds the same
+author, first by building the author for each item, then by fetching it from
+a ``FragmentCache`` and splicing its text into the output.
+
+Usage: python benchmarks/bench_fragment.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Builder
+from dougrain.fragment import FragmentCache
+
+NUMBER = 5
+
+
+def author():
+    builder = (Builder("/authors/1")
+               .set_property('name', "Ann Example")
+               .set_property('bio', "Writes about HAL. " * 20)
+               .add_link('avatar', "/authors/1/avatar"))
+    for i in range(5):
+        builder.embed('award', Builder("/awards/%d" % i)
+                      .set_property('year', 2000 + i))
+    return builder
+
+
+def rebuild(size, cache):
+    builder = Builder("/posts")
+    for i in range(size):
+        post = Builder("/posts/%d" % i).set_property('title', "Post %d" % i)
+        post.embed('author', author())
+        builder.embed('item', post, wrap=True)
+    return builder.dumps()
+
+
+def cached(size, cache):
+    builder = Builder("/posts")
+    for i in range(size):
+        post = Builder("/posts/%d" % i).set_property('title', "Post %d" % i)
+        post.embed('author', cache.fetch("/authors/1", "v1", author))
+        builder.embed('item', post, wrap=True)
+    return builder.dumps()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("%10s %12s %10s" % ("method", "ms/response", "hit rate"))
+    for label, fn in [("rebuild", rebuild), ("fragment", cached)]:
+        cache = FragmentCache()
+        seconds = min(timeit.repeat(lambda: fn(size, cache), number=NUMBER,
+                                    repeat=3)) / NUMBER
+        print("%10s %12.2f %10.4f" % (label, seconds * 1e3,
+                                      cache.hit_rate()))
+
+
+if __name__ == '__main__':
+    main()
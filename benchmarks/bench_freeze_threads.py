@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark reading one document from several threads.
+
+Each thread walks a catalog document many times, reading links, embedded
+resources and properties. The threads either share one snapshot made by
+``Document.freeze``, or each parse their own copy of the JSON text, which
+is what sharing a mutable ``Document`` would otherwise require.
+
+The GIL status is printed first. Run the benchmark on a free-threaded build
+of CPython (3.13t or later) to see the reads scale across cores.
+
+Usage: python benchmarks/bench_freeze_threads.py [THREADS] [WALKS]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+
+try:
+    clock = time.perf_counter
+except AttributeError:
+    clock = time.time
+
+
+def catalog_text(size=200):
+    return json.dumps({
+        '_links': {
+            'self': {'href': "/catalog"},
+            'curies': [{'name': "c", 'href': "/rels/{rel}",
+                        'templated': True}],
+            'c:search': {'href': "/catalog{?q}", 'templated': True},
+        },
+        'count': size,
+        '_embedded': {'c:product': [{
+            '_links': {'self': {'href': "/products/%d" % i},
+                       'c:maker': {'href': "/makers/%d" % (i % 10)}},
+            'name': "Product %d" % i,
+            'price': i * 1.5,
+        } for i in range(size)]},
+    })
+
+
+def walk(doc):
+    total = 0
+    doc.links['c:search'].url(q="widget")
+    for product in doc.embedded['c:product']:
+        product.url()
+        product.links['c:maker'].url()
+        total += product.properties['price']
+    return total
+
+
+def run(threads, target):
+    workers = [threading.Thread(target=target) for _ in range(threads)]
+    start = clock()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return clock() - start
+
+
+def gil_status():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    if is_gil_enabled is None:
+        return "enabled (this build cannot disable it)"
+    return "enabled" if is_gil_enabled() else "disabled"
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    walks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    text = catalog_text()
+    shared = Document.from_json(text, "http://localhost/").freeze()
+
+    def frozen():
+        for _ in range(walks):
+            walk(shared)
+
+    def parsed():
+        for _ in range(walks):
+            walk(Document.from_json(text, "http://localhost/"))
+
+    print("Python %s, GIL %s" % (sys.version.split()[0], gil_status()))
+    print("%8s %8s %10s %12s" % ("method", "threads", "seconds",
+                                 "walks/s"))
+    for label, target in [("frozen", frozen), ("parsed", parsed)]:
+        for count in sorted(set([1, threads])):
+            seconds = run(count, target)
+            print("%8s %8d %10.3f %12.0f" % (label, count, seconds,
+                                             count * walks / seconds))
+
+
+if __name__ == '__main__':
+    main()
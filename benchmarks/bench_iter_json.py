@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Compare ``Builder.dumps`` with ``Builder.iter_json`` and ``embed_iter``.
+
+Builds a collection whose embedded resources come from a generator, as
+they would from a database cursor. ``dumps`` embeds every resource before
+serializing the document. ``iter_json`` reads the generator while it writes
+the chunks. Reports total time, time to the first chunk and peak memory
+measured with ``tracemalloc``. In Draft 5 documents the automatic links to
+the resources are kept until ``_links`` is written, so the peak grows with
+the number of resources.
+
+Usage: python benchmarks/bench_iter_json.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Builder
+from dougrain import drafts
+
+
+def rows(count):
+    for i in range(count):
+        yield (Builder("/orders/%d" % i)
+               .set_property('total', i * 1.5)
+               .set_property('currency', "EUR")
+               .add_link('customer', "/customers/%d" % (i % 97)))
+
+
+def with_dumps(count, draft):
+    builder = Builder("/orders", draft=draft)
+    for row in rows(count):
+        builder.embed('orders', row, wrap=True)
+    yield builder.dumps()
+
+
+def with_iter_json(count, draft):
+    builder = Builder("/orders", draft=draft)
+    builder.embed_iter('orders', rows(count))
+    for chunk in builder.iter_json():
+        yield chunk
+
+
+def measure(fn, count, draft):
+    tracemalloc.start()
+    started = time.time()
+    first = None
+    size = 0
+    for chunk in fn(count, draft):
+        if first is None:
+            first = time.time() - started
+        size += len(chunk)
+    elapsed = time.time() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, first, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("%6s %10s %12s %10s %16s %14s" % ("draft", "method", "characters",
+                                            "time (s)", "first chunk (s)",
+                                            "peak (bytes)"))
+    for name, draft in [("4", drafts.DRAFT_4), ("5", drafts.DRAFT_5)]:
+        for label, fn in [("dumps", with_dumps),
+                          ("iter_json", with_iter_json)]:
+            size, elapsed, first, peak = measure(fn, count, draft)
+            print("%6s %10s %12d %10.2f %16.4f %14d" % (
+                name, label, size, elapsed, first, peak))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark ``Document.from_json`` and ``Builder.dumps`` for each JSON
+backend.
+
+Builds HAL collections with growing numbers of embedded resources, then
+times decoding them into a ``Document`` and encoding them from a
+``Builder`` with every installed backend.
+
+Usage: python benchmarks/bench_json.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Builder
+from dougrain import Document
+from dougrain import jsonbackend
+
+SIZES = [10, 100, 1000, 10000]
+
+
+def collection(size):
+    builder = Builder("/orders").add_curie('r', "/rels/{rel}")
+    builder.set_property('count', size)
+    for i in range(size):
+        item = (Builder("/orders/%d" % i)
+                .set_property('total', i * 1.5)
+                .set_property('currency', "EUR")
+                .set_property('status', "shipped")
+                .add_link('r:customer', "/customers/%d" % (i % 97)))
+        builder.embed('r:order', item)
+    return builder
+
+
+def time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def main():
+    print("%8s %8s %10s %14s %14s" % ("items", "backend", "bytes",
+                                      "loads (ms)", "dumps (ms)"))
+    for size in SIZES:
+        builder = collection(size)
+        number = max(1, 10000 // size)
+        for name in jsonbackend.available_backends():
+            text = builder.dumps(backend=name)
+            data = text.encode('utf-8')
+            loads = time(lambda: Document.from_json(data, backend=name),
+                         number)
+            dumps = time(lambda: builder.dumps(backend=name), number)
+            print("%8d %8s %10d %14.3f %14.3f" % (size, name, len(data),
+                                                  loads * 1e3, dumps * 1e3))
+
+
+if __name__ == '__main__':
+    main()
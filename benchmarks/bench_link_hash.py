@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark de-duplicating links.
+
+Compares removing duplicate links by comparing each link with the unique
+links found so far, which is what unhashable links required, with putting
+the links in a set, which uses their cached hashes.
+
+Usage: python benchmarks/bench_link_hash.py [LINKS]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain.link import Link
+
+NUMBER = 3
+
+
+def make_links(size):
+    # Every link appears twice.
+    return [Link({'href': "/items/%d" % (i % (size // 2)),
+                  'title': "Item %d" % (i % (size // 2))},
+                 "http://localhost/")
+            for i in range(size)]
+
+
+def pairwise(links):
+    unique = []
+    for item in links:
+        if item not in unique:
+            unique.append(item)
+    return unique
+
+
+def hashed(links):
+    return set(links)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    links = make_links(size)
+    print("%10s %12s %8s" % ("method", "ms", "unique"))
+    for label, fn in [("pairwise", pairwise), ("set", hashed)]:
+        seconds = min(timeit.repeat(lambda: fn(links), number=NUMBER,
+                                    repeat=3)) / NUMBER
+        print("%10s %12.2f %8d" % (label, seconds * 1e3, len(fn(links))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Measure the memory used by ``Link`` objects with ``tracemalloc``.
+
+Builds many links from JSON objects that already exist, so only the memory
+taken by the ``Link`` objects themselves is counted. Compares ``Link`` with
+the previous representation, which copied the optional attributes into an
+instance dictionary and resolved the template when the link was created.
+``Link`` is measured again after every template has been read.
+
+Usage: python benchmarks/bench_link_memory.py [COUNT]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import tracemalloc
+
+try:
+    from urllib import parse as urlparse
+except ImportError:
+    import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import link
+
+BASE_URI = "http://example.com/api/"
+
+
+class DictLink(object):
+    """The previous ``Link`` representation."""
+
+    def __init__(self, json_object, base_uri):
+        self.o = json_object
+        self.href = json_object['href']
+
+        for name in ('name', 'title', 'type', 'profile', 'hreflang',
+                     'deprecation'):
+            if name in json_object:
+                setattr(self, name, json_object[name])
+
+        self.is_templated = self.o.get('templated', False) is True
+        self.variables = []
+
+        if base_uri is None:
+            self.template = self.href
+        else:
+            self.template = urlparse.urljoin(base_uri, self.href)
+
+        self._compiled_template = None
+
+
+def objects(count):
+    return [{'href': "widgets/%d" % i, 'name': "w%d" % i, 'title': "Widget"}
+            for i in range(count)]
+
+
+def measure(build, count):
+    json_objects = objects(count)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    links = build(json_objects)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Subtract the list that holds the links.
+    size = after - before - sys.getsizeof(links)
+    return float(size) / count
+
+
+def build_dict_links(json_objects):
+    return [DictLink(o, BASE_URI) for o in json_objects]
+
+
+def build_links(json_objects):
+    return [link.Link(o, BASE_URI) for o in json_objects]
+
+
+def build_resolved_links(json_objects):
+    links = [link.Link(o, BASE_URI) for o in json_objects]
+    for lnk in links:
+        lnk.template
+    return links
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("%24s %16s" % ("representation", "bytes/link"))
+    for label, build in [("previous Link", build_dict_links),
+                         ("Link", build_links),
+                         ("Link, template read", build_resolved_links)]:
+        print("%24s %16.1f" % (label, measure(build, count)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark reading a link from every resource embedded in a collection.
+
+The ``self`` link of the customer embedded in every order is read by
+chaining ``embedded`` and ``links`` lookups, which canonicalize the CURIE
+keys at every step, and by a path compiled with ``compile_path``. Both are
+timed on a document whose resources have already been built ("warm") and on
+a new document each time ("cold").
+
+Usage: python benchmarks/bench_path.py [ORDERS]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+from dougrain import compile_path
+
+NUMBER = 10
+
+CUSTOMER_SELF = compile_path("ea:order/*/ea:customer/@self")
+
+
+def make_object(size):
+    return {
+        '_links': {
+            'self': {'href': "/orders"},
+            'curies': [{'name': "ea",
+                        'href': "http://example.com/docs/rels/{rel}",
+                        'templated': True}],
+        },
+        '_embedded': {'ea:order': [{
+            '_links': {'self': {'href': "/orders/%d" % i},
+                       'ea:basket': {'href': "/baskets/%d" % i}},
+            'total': i,
+            '_embedded': {'ea:customer': {
+                '_links': {'self': {'href': "/customers/%d" % i}},
+                'name': "Customer %d" % i,
+            }},
+        } for i in range(size)]},
+    }
+
+
+def chained(doc):
+    return [order.embedded['ea:customer'].links['self']
+            for order in doc.embedded['ea:order']]
+
+
+def compiled(doc):
+    return list(CUSTOMER_SELF(doc))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    o = make_object(size)
+    warm = Document.from_object(o, "http://example.com/")
+    chained(warm)
+
+    print("%12s %12s %12s" % ("method", "warm ms", "cold ms"))
+    for label, fn in [("chained", chained), ("compiled", compiled)]:
+        warm_seconds = min(timeit.repeat(lambda: fn(warm), number=NUMBER,
+                                         repeat=5)) / NUMBER
+        cold_seconds = min(timeit.repeat(
+            lambda: fn(Document.from_object(o, "http://example.com/")),
+            number=NUMBER, repeat=5)) / NUMBER
+        print("%12s %12.2f %12.2f" % (label, warm_seconds * 1e3,
+                                      cold_seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Compare ``Document.project`` with copying and pruning a document.
+
+Projects a collection onto one property and one embedded relationship type,
+first by deep-copying ``as_object()`` and deleting what is not wanted, then
+with ``Document.project``.
+
+Usage: python benchmarks/bench_project.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import copy
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Builder
+from dougrain import Document
+
+NUMBER = 20
+
+
+def collection(size):
+    builder = (Builder("/orders").add_curie('r', "/rels/{rel}")
+               .set_property('count', size)
+               .set_property('summary', {'total': size * 1.5}))
+    for i in range(size):
+        item = (Builder("/orders/%d" % i)
+                .set_property('total', i * 1.5)
+                .add_link('r:customer', "/customers/%d" % i))
+        builder.embed('r:order', item, wrap=True)
+        builder.embed('r:note', Builder("/notes/%d" % i), wrap=True)
+    return Document.from_object(builder.as_object(), "http://localhost/")
+
+
+def copy_and_prune(doc):
+    o = copy.deepcopy(doc.as_object())
+    del o['summary']
+    del o['_embedded']['r:note']
+    return Document.from_object(o, "http://localhost/")
+
+
+def project(doc):
+    return doc.project(properties=['count'], rels=['/rels/order'])
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    doc = collection(size)
+    print("%16s %12s" % ("method", "ms/call"))
+    for label, fn in [("deepcopy", copy_and_prune), ("project", project)]:
+        seconds = min(timeit.repeat(lambda: fn(doc), number=NUMBER,
+                                    repeat=3)) / NUMBER
+        print("%16s %12.3f" % (label, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark embedding resources that are already serialized.
+
+Builds and serializes a Draft 5 collection of resources held as JSON bytes,
+first by decoding each resource and embedding a ``Document``, then by
+embedding a ``RawJSON`` whose text is written as it is. The resources are
+written with ``_links`` first, so the ``self`` href is read without decoding
+the rest of each resource, and then with ``_links`` last.
+
+Usage: python benchmarks/bench_raw_json.py [ITEMS]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+import timeit
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Builder
+from dougrain import Document
+from dougrain import RawJSON
+from dougrain import drafts
+
+NUMBER = 5
+
+
+def payloads(size, links_first):
+    data = []
+    for i in range(size):
+        links = [('_links', {'self': {'href': "/posts/%d" % i}})]
+        properties = [('title', "Post %d" % i),
+                      ('body', "Lorem ipsum dolor sit amet. " * 40),
+                      ('tags', ["tag%d" % j for j in range(20)])]
+        members = links + properties if links_first else properties + links
+        data.append(json.dumps(OrderedDict(members)).encode('utf-8'))
+    return data
+
+
+def decoded(data):
+    builder = Builder("/posts", draft=drafts.DRAFT_5)
+    for text in data:
+        builder.embed('item', Document.from_json(text), wrap=True)
+    return builder.dumps()
+
+
+def raw(data):
+    builder = Builder("/posts", draft=drafts.DRAFT_5)
+    for text in data:
+        builder.embed('item', RawJSON(text), wrap=True)
+    return builder.dumps()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("%12s %10s %12s" % ("_links", "method", "ms/response"))
+    for order, links_first in [("first", True), ("last", False)]:
+        data = payloads(size, links_first)
+        for label, fn in [("decoded", decoded), ("raw", raw)]:
+            seconds = min(timeit.repeat(lambda: fn(data), number=NUMBER,
+                                        repeat=3)) / NUMBER
+            print("%12s %10s %12.2f" % (order, label, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark ``Document.rels`` on a large collection resource.
+
+The collection has one embedded resource and one link per item, all for the
+same link relationship type, so building ``rels`` has to de-duplicate every
+embedded resource against the links by URL.
+
+Usage: python benchmarks/bench_rels.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import dougrain
+
+SIZE = 10000
+
+
+def make_collection(n):
+    item_links = {}
+    for i in range(20):
+        item_links["related%d" % i] = {"href": "/related/%d" % i}
+
+    items = []
+    for i in range(n):
+        links = dict(item_links)
+        links['self'] = {"href": "/items/%d" % i}
+        items.append({"_links": links, "index": i})
+
+    return {
+        "_links": {
+            "self": {"href": "/items/"},
+            "item": [{"href": "/items/%d" % i} for i in range(n)],
+        },
+        "_embedded": {"item": items},
+    }
+
+
+def rels(obj):
+    doc = dougrain.Document.from_object(obj, "http://localhost/")
+    return doc.rels
+
+
+def main():
+    obj = make_collection(SIZE)
+    seconds = min(timeit.repeat(lambda: rels(obj), number=1, repeat=3))
+    print("rels of %d-item collection: %.4f s" % (SIZE, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Compare peak memory and time of ``stream.iterparse`` and
+``Document.from_json`` on large HAL collections.
+
+Writes collections with growing numbers of embedded resources to temporary
+files, then reads each file with both methods, touching every embedded
+resource. Peak memory is measured with ``tracemalloc``. The peak for
+``iterparse`` should not grow with the size of the collection.
+
+Usage: python benchmarks/bench_stream.py [MAX_ITEMS]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import Document
+from dougrain import stream
+
+
+def write_collection(fileobj, size):
+    fileobj.write(b'{"_links": {"self": {"href": "/orders"}}, ')
+    fileobj.write(('"count": %d, "_embedded": {"orders": [' % size)
+                  .encode('utf-8'))
+    for i in range(size):
+        if i:
+            fileobj.write(b', ')
+        item = {'_links': {'self': {'href': "/orders/%d" % i}},
+                'total': i * 1.5, 'currency': "EUR", 'status': "shipped"}
+        fileobj.write(json.dumps(item).encode('utf-8'))
+    fileobj.write(b']}}')
+
+
+def read_with_iterparse(path):
+    count = 0
+    with open(path, 'rb') as fileobj:
+        for event in stream.iterparse(fileobj):
+            if event[0] == stream.EMBEDDED:
+                event[2].url()
+                count += 1
+    return count
+
+
+def read_with_from_json(path):
+    with open(path, 'rb') as fileobj:
+        doc = Document.from_json(fileobj.read())
+    count = 0
+    for item in doc.embedded['orders']:
+        item.url()
+        count += 1
+    return count
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    started = time.time()
+    fn(path)
+    elapsed = time.time() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    max_items = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    sizes = [size for size in [1000, 10000, 100000, 200000]
+             if size <= max_items]
+
+    print("%8s %12s %14s %10s %14s" % ("items", "method", "file (bytes)",
+                                       "time (s)", "peak (bytes)"))
+    for size in sizes:
+        handle, path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(handle, 'wb') as fileobj:
+                write_collection(fileobj, size)
+            file_size = os.path.getsize(path)
+            for label, fn in [("iterparse", read_with_iterparse),
+                              ("from_json", read_with_from_json)]:
+                elapsed, peak = measure(fn, path)
+                print("%8d %12s %14d %10.2f %14d" % (size, label, file_size,
+                                                     elapsed, peak))
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""Benchmark URI template expansion against the ``uritemplate`` package.
+
+Times the expansion of a CURIE-style template and of a level 4 template
+with ``dougrain.template`` and, if it is installed, with ``uritemplate``.
+Also times CURIE expansion through ``CurieCollection.expand`` with an
+expansions cache that is too small to help.
+
+Usage: python benchmarks/bench_template.py
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dougrain import cache
+from dougrain import curie
+from dougrain import link
+from dougrain import template
+
+try:
+    import uritemplate
+except ImportError:
+    uritemplate = None
+
+NUMBER = 100000
+
+CASES = [
+    ("curie", "http://example.com/rels/{rel}", {'rel': "widgets"}),
+    ("level 4", "/orders{/id*}{?fields,page,size}{&keys*}",
+     {'id': ["a", "b"], 'fields': ["name", "total"], 'page': 3, 'size': 50,
+      'keys': {'sort': "date", 'order': "desc"}}),
+]
+
+
+def time(fn):
+    return min(timeit.repeat(fn, number=NUMBER, repeat=3))
+
+
+def main():
+    print("%10s %22s %10s" % ("template", "expander", "us/call"))
+    for name, source, variables in CASES:
+        compiled = template.compile_template(source)
+        timings = [
+            ("dougrain.expand", lambda: template.expand(source, variables)),
+            ("dougrain compiled", lambda: compiled.expand(variables)),
+        ]
+        if uritemplate is not None:
+            parsed = uritemplate.URITemplate(source)
+            timings.extend([
+                ("uritemplate.expand",
+                 lambda: uritemplate.expand(source, variables)),
+                ("uritemplate compiled", lambda: parsed.expand(variables)),
+            ])
+
+        for label, fn in timings:
+            print("%10s %22s %10.2f" % (name, label,
+                                        time(fn) * 1e6 / NUMBER))
+
+    curies = curie.CurieCollection(cache.LRUCache(0))
+    curies['ex'] = link.Link({'href': "/rels/{rel}", 'templated': True},
+                             "http://example.com/")
+    seconds = time(lambda: curies.expand("ex:widgets"))
+    print("%10s %22s %10.2f" % ("curie", "CurieCollection.expand",
+                                seconds * 1e6 / NUMBER))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,4 +3,8 @@
 
 from .builder import Builder
 from .document import Document
+from .document import FrozenDocument
+from .serializer import Deferred
+from .fragment import RawJSON
+from .path import compile_path
 from . import drafts
@@ -0,0 +1,305 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Serializing HAL documents with asyncio.
+
+``Builder.aiter_json`` uses this module to write documents whose property
+values or embedded resources come from awaitables and async iterables. The
+module needs Python 3.6 or later, so it is only imported when
+``aiter_json`` is called.
+
+A property value may be an awaitable, which is written as the value it
+resolves to, or an async iterable, which is written as a JSON array of the
+items it yields. An iterable passed to ``Builder.embed_iter`` may be an
+async iterable, and its items may be awaitables that resolve to ``Builder``
+or ``Document`` objects.
+
+"""
+
+import asyncio
+import inspect
+from collections import deque
+
+from dougrain import serializer
+from dougrain.builder import Builder
+from dougrain.drafts import LINKS_KEY
+from dougrain.drafts import EMBEDDED_KEY
+from dougrain.fragment import RawJSON
+
+
+def is_async_iterable(value):
+    return hasattr(value, '__aiter__')
+
+
+def is_pending(value):
+    """Returns ``True`` if ``value`` has to be resolved before it can be
+    written.
+
+    """
+    return inspect.isawaitable(value) or is_async_iterable(value)
+
+
+class Resolver(object):
+    """Resolves awaitables and async iterables as tasks, running at most
+    ``concurrency`` of them at a time.
+
+    """
+
+    def __init__(self, concurrency):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks = set()
+
+    def start(self, value):
+        """Returns a task that resolves ``value``."""
+        return self.spawn(self.resolve(value))
+
+    def spawn(self, coroutine):
+        """Returns a task that runs ``coroutine``, which is cancelled by
+        ``cancel``.
+
+        """
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def resolve(self, value):
+        async with self.semaphore:
+            if is_async_iterable(value):
+                return [item async for item in value]
+            return await value
+
+    def cancel(self):
+        """Cancels the tasks that have not finished."""
+        for task in list(self.tasks):
+            task.cancel()
+
+
+class AsyncSerializer(object):
+    """Writes the JSON text of documents in pieces, resolving pending values
+    with a ``Resolver``.
+
+    """
+
+    def __init__(self, backend, resolver):
+        self.backend = backend
+        self.resolver = resolver
+        self.splicer = serializer.Splicer(backend)
+        self.dumps = self.splicer.dumps
+
+    def start_pending(self, o, keys=None):
+        """Starts resolving the pending property values of the document
+        ``o``, and returns a ``dict`` mapping their keys to their tasks.
+
+        Arguments:
+
+        - ``o``:    the JSON object of the document, or a ``RawJSON``, which
+                    has no pending values.
+        - ``keys``: the keys to write, as returned by
+                    ``serializer.key_order``. Defaults to every key.
+
+        """
+        pending = {}
+        if isinstance(o, RawJSON):
+            return pending
+
+        if keys is None:
+            keys = serializer.key_order(o, None)
+
+        for key in keys:
+            if key in (LINKS_KEY, EMBEDDED_KEY):
+                continue
+            value = o[key]
+            if isinstance(value, serializer.Deferred):
+                value = value.resolve()
+            if is_pending(value):
+                pending[key] = self.resolver.start(value)
+
+        return pending
+
+    async def document_pieces(self, o, properties=None, pending=None):
+        """Yields the JSON text of the document ``o`` in pieces, leaving out
+        properties that are not named in ``properties`` unless it is
+        ``None``.
+
+        The document's pending property values are all started before the
+        first piece is written, unless ``pending`` holds the tasks that
+        ``start_pending`` already returned for them, and are written in
+        document order as they are resolved.
+
+        """
+        dumps = self.dumps
+        keys = serializer.key_order(o, properties)
+        if pending is None:
+            pending = self.start_pending(o, keys)
+
+        separator = '{'
+        for key in keys:
+            yield separator + dumps(key) + ':'
+            separator = ','
+
+            value = o[key]
+            if key == EMBEDDED_KEY:
+                async for piece in self.embedded_pieces(value):
+                    yield piece
+            elif key == LINKS_KEY:
+                for piece in serializer.iter_rels(value, self.splicer):
+                    yield piece
+            elif key in pending:
+                yield dumps(await pending[key])
+            else:
+                yield dumps(value)
+
+        yield '{}' if separator == '{' else '}'
+
+    async def embedded_pieces(self, rels):
+        dumps = self.dumps
+        separator = '{'
+        for rel, value in rels.items():
+            yield separator + dumps(rel) + ':'
+            separator = ','
+
+            if not isinstance(value, list):
+                async for piece in self.resource_pieces(value):
+                    yield piece
+                continue
+
+            item_separator = '['
+            async for obj, pending in self.read_ahead(self.list_items(value)):
+                yield item_separator
+                item_separator = ','
+                async for piece in self.resource_pieces(obj, pending):
+                    yield piece
+
+            yield '[]' if item_separator == '[' else ']'
+
+        yield '{}' if separator == '{' else '}'
+
+    async def resource_pieces(self, obj, pending=None):
+        if isinstance(obj, RawJSON):
+            yield obj.text
+        else:
+            async for piece in self.document_pieces(obj, pending=pending):
+                yield piece
+
+    async def list_items(self, value):
+        """Yields ``(item, links)`` for each item of the embedded list
+        ``value``, reading the items of any ``EmbeddedStream`` in it.
+
+        ``links`` is the list of links the item should be added to once it
+        is resolved, or ``None``.
+
+        """
+        for item in value:
+            if isinstance(item, serializer.EmbeddedStream):
+                async for target in self.stream_items(item):
+                    yield target, item.links
+            else:
+                yield item, None
+
+    async def stream_items(self, stream):
+        """Yields each item of an ``EmbeddedStream``, which may be an
+        awaitable.
+
+        """
+        if stream.consumed:
+            raise ValueError("Embedded stream has already been serialized")
+        stream.consumed = True
+
+        source = stream.iterable
+        if is_async_iterable(source):
+            async for item in source:
+                yield item
+        else:
+            for item in source:
+                yield item
+
+    async def read_ahead(self, items):
+        """Yields ``(obj, pending)`` for each of the ``(item, links)`` pairs
+        in ``items``, in order, where ``obj`` is the JSON object of the
+        resource and ``pending`` is the ``dict`` of tasks for its pending
+        property values.
+
+        Up to ``concurrency`` items are read ahead. Each item is resolved,
+        and its pending property values are started, when it enters the
+        window, so that slow items and slow properties of later items are
+        resolved concurrently with the items before them.
+
+        """
+        iterator = items.__aiter__()
+        window = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(window) < self.resolver.concurrency:
+                try:
+                    item, links = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+
+                if inspect.isawaitable(item):
+                    prepared = self.resolver.spawn(self.prepare_later(item))
+                else:
+                    prepared = self.prepare(item)
+                window.append((prepared, links))
+
+            if not window:
+                return
+
+            prepared, links = window.popleft()
+            if isinstance(prepared, asyncio.Future):
+                prepared = await prepared
+
+            target, obj, pending = prepared
+            if links is not None:
+                links.append(target)
+            yield obj, pending
+
+    async def prepare_later(self, item):
+        return self.prepare(await self.resolver.start(item))
+
+    def prepare(self, target):
+        """Returns ``(target, obj, pending)`` for a resolved item, starting
+        its pending property values.
+
+        """
+        if isinstance(target, RawJSON):
+            obj = target
+        elif isinstance(target, Builder):
+            # Leave the builder's own placeholders for this serializer.
+            obj = target.o
+        elif isinstance(target, dict):
+            obj = target
+        else:
+            obj = target.as_object()
+        return target, obj, self.start_pending(obj)
+
+
+async def aiter_chunks(o, backend, chunk_size, concurrency, properties=None):
+    """Yields the JSON text of the document ``o`` in chunks of at least
+    ``chunk_size`` characters, except for the last chunk, resolving at most
+    ``concurrency`` pending values at a time.
+
+    """
+    resolver = Resolver(concurrency)
+    pieces = AsyncSerializer(backend, resolver).document_pieces(o,
+                                                                properties)
+
+    chunk = []
+    size = 0
+    try:
+        async for piece in pieces:
+            chunk.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+
+        if chunk:
+            yield ''.join(chunk)
+    finally:
+        resolver.cancel()
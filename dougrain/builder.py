@@ -5,7 +5,10 @@ Creating HAL documents.
 """
 
 from dougrain import drafts
+from dougrain import jsonbackend
 from dougrain import link
+from dougrain import serializer
+from dougrain.fragment import RawJSON
 
 try:
     _ = unicode
@@ -13,6 +16,12 @@ except NameError:
     unicode = str
 
 
+def _property_set(properties):
+    if properties is None:
+        return None
+    return frozenset(properties)
+
+
 class Builder(object):
     """Simplify creation of HAL documents.
 
@@ -60,9 +69,65 @@ class Builder(object):
         return self.o['_links']['self']['href']
 
     def as_object(self):
-        """Returns a dictionary representing the HAL JSON document."""
+        """Returns a dictionary representing the HAL JSON document.
+
+        Any iterables passed to ``embed_iter`` are read, and their resources
+        are kept in the dictionary. Any ``Deferred`` property values,
+        including those of embedded builders, are computed and replaced by
+        their values, and any ``dougrain.RawJSON`` property values and
+        embedded resources are decoded.
+
+        """
+        serializer.materialize(self.o)
+        serializer.resolve(self.o)
+        serializer.parse_fragments(self.o)
         return self.o
 
+    def dumps(self, backend=None, properties=None):
+        """Returns the HAL JSON document as a ``str``.
+
+        Arguments:
+
+        - ``backend``: optional name of the JSON backend to use (see
+                       ``dougrain.jsonbackend.get_backend``). Defaults to the
+                       default backend.
+        - ``properties``: optional collection of the names of the properties
+                          to write. Other properties are left out, and their
+                          ``Deferred`` values are not computed. Defaults to
+                          writing every property.
+
+        """
+        serializer.materialize(self.o)
+        o = serializer.project(self.o, _property_set(properties))
+        splicer = serializer.Splicer(jsonbackend.get_backend(backend))
+        return splicer.dumps(o)
+
+    def iter_json(self, backend=None, chunk_size=65536, properties=None):
+        """Generates the HAL JSON document as a series of ``str`` chunks.
+
+        The chunks can be returned as the body of a WSGI response or sent
+        as the body of a streaming ASGI response. Iterables passed to
+        ``embed_iter`` are read while their resources are written, so only
+        one of their resources is held at a time.
+
+        If the document is Draft 5 and has resources from ``embed_iter``, its
+        ``_links`` are written after its ``_embedded`` resources.
+
+        Arguments:
+
+        - ``backend``: optional name of the JSON backend to use (see
+                       ``dougrain.jsonbackend.get_backend``). Defaults to the
+                       default backend.
+        - ``chunk_size``: the number of characters to collect before
+                          yielding a chunk. Defaults to 65536.
+        - ``properties``: as for ``dumps``.
+
+        """
+        return serializer.iter_chunks(self.o,
+                                      jsonbackend.get_backend(backend),
+                                      chunk_size,
+                                      _property_set(properties))
+
     def as_link(self):
         """Returns a ``Link`` to the document.
 
@@ -91,6 +156,18 @@ class Builder(object):
         the document already has a property with that name, it's value
         is replaced with the value in ``value``.
 
+        ``value`` may be a ``dougrain.Deferred``, whose function is called
+        only if the property is written when the document is serialized.
+        For example:
+
+        ``
+        builder.set_property('total', Deferred(lambda: orders.total()))
+        builder.dumps(properties=['name'])  # orders.total() is not called
+        ``
+
+        ``value`` may also be a ``dougrain.RawJSON`` holding JSON text, which
+        is written into the serialized document as it is.
+
         This method returns self, allowing it to be chained with additional
         method calls.
 
@@ -168,8 +245,12 @@ class Builder(object):
           from the IANA registry
           (http://www.iana.org/assignments/link-relations/link-relations.xml),
           a full URI, or a CURIE.
-        - ``target``: a ``Builder`` instance or a ``dougrain.Document``
-          instance that will be embedded in this document.
+        - ``target``: a ``Builder`` instance, a ``dougrain.Document``
+          instance or a ``dougrain.RawJSON`` holding the JSON text of a
+          resource, that will be embedded in this document. A ``RawJSON``'s
+          text is written into the serialized document as it is. If a link
+          to it is added, its ``self`` href is read from its ``_links``
+          without decoding the rest of the text.
         - ``wrap``: Defaults to False, but if True, specifies that the embedded
           resource object should be initally wrapped in a JSON array even if it
           is the first embedded resource for the given ``rel``.
@@ -180,7 +261,7 @@ class Builder(object):
         WARNING: ``target`` should not be identical to ``self`` or any document
         that embeds ``self``.
         """
-        new_embed = target.as_object()
+        new_embed = self._embeddable(target)
         self._add_rel('_embedded', rel, new_embed, wrap)
 
         if self.draft.automatic_link:
@@ -188,6 +269,90 @@ class Builder(object):
 
         return self
 
+    def aiter_json(self, backend=None, chunk_size=65536, concurrency=8,
+                   properties=None):
+        """Returns an async iterator of the HAL JSON document as ``str``
+        chunks, for example for a streaming ASGI response:
+
+        ``
+        async for chunk in builder.aiter_json():
+            await send({'type': 'http.response.body', 'body':
+                        chunk.encode('utf-8'), 'more_body': True})
+        ``
+
+        Unlike ``iter_json``, property values may be awaitables or async
+        iterables, and iterables passed to ``embed_iter`` may be async
+        iterables whose items may be awaitables. A ``Deferred`` property
+        value may compute an awaitable. They are resolved concurrently, but
+        the document is written in order. Each awaitable can only be
+        serialized once. See ``dougrain.aio``.
+
+        Requires Python 3.6 or later.
+
+        Arguments:
+
+        - ``backend``, ``chunk_size``, ``properties``: as for ``iter_json``.
+        - ``concurrency``: the greatest number of awaitables and async
+                           iterables to resolve at a time. Defaults to 8.
+
+        """
+        from dougrain import aio
+        return aio.aiter_chunks(self.o, jsonbackend.get_backend(backend),
+                                chunk_size, concurrency,
+                                _property_set(properties))
+
+    def embed_iter(self, rel, targets):
+        """Embeds the documents from an iterable inside this document.
+
+        ``targets`` is not read until the document is serialized by
+        ``iter_json``, which reads one document at a time, or until
+        ``as_object`` or ``dumps`` is called. This allows, for example, rows
+        from a database cursor to be embedded in a large response without
+        holding them all in memory. ``targets`` can only be read once.
+
+        The documents are embedded in a JSON array after any documents that
+        are already embedded for ``rel``.
+
+        This method returns self, allowing it to be chained with additional
+        method calls.
+
+        Arguments:
+
+        - ``rel``: a string specifying the link relationship type of the
+          embedded resources. See ``embed``.
+        - ``targets``: an iterable of ``Builder``, ``dougrain.Document`` or
+          ``dougrain.RawJSON`` instances. When the document is serialized
+          by ``aiter_json``, ``targets`` may be an async iterable, and its
+          items may be awaitables.
+
+        """
+        stream = serializer.EmbeddedStream(targets, self.draft.automatic_link,
+                                           self._embeddable)
+        self._add_rel('_embedded', rel, stream, True)
+
+        if stream.links is not None:
+            self._add_rel('_links', rel, stream.links, True)
+
+        return self
+
+    def _embeddable(self, target):
+        """Returns the JSON object to embed for ``target``.
+
+        ``RawJSON`` values are kept as they are, including those in a
+        ``Builder`` target, so that they are written without being decoded.
+        The ``Deferred`` values and embedded streams of a ``Builder`` target
+        are also kept, and are only computed and read when this document is
+        serialized.
+
+        """
+        if isinstance(target, RawJSON):
+            return target
+
+        if isinstance(target, Builder):
+            return target.o
+
+        return target.as_object()
+
     def _add_rel(self, key, rel, thing, wrap):
         """Adds ``thing`` to links or embedded resources.
 
@@ -0,0 +1,132 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Bounded caches shared between documents.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """Thread-safe mapping that holds a limited number of items.
+
+    When the cache is full, adding a new item discards the item that was
+    least recently read or written. Every operation takes the cache's lock,
+    so one ``LRUCache`` can be shared between threads.
+
+    Public Instance Attributes:
+
+    - ``capacity``: the maximum number of items the cache holds. Use
+                    ``resize`` to change it.
+    - ``hits``: the number of ``get`` calls that found their key.
+    - ``misses``: the number of ``get`` calls that did not find their key.
+    - ``evictions``: the number of items discarded to make room for others.
+
+    """
+
+    def __init__(self, capacity=128):
+        """Create an empty ``LRUCache`` that holds at most ``capacity``
+        items.
+
+        """
+        self.capacity = capacity
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the value for ``key``, or ``default`` if ``key`` is not in
+        the cache.
+
+        Finding ``key`` marks it as the most recently used item.
+
+        """
+        with self.lock:
+            try:
+                value = self.data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.data[key] = value
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = value
+            self._evict()
+
+    def __delitem__(self, key):
+        with self.lock:
+            del self.data[key]
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def resize(self, capacity):
+        """Changes the capacity of the cache.
+
+        If the cache holds more than ``capacity`` items, the least recently
+        used items are discarded.
+
+        """
+        with self.lock:
+            self.capacity = capacity
+            self._evict()
+
+    def clear(self):
+        """Removes every item from the cache and resets the counters."""
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def hit_rate(self):
+        """Returns the fraction of ``get`` calls that found their key, or
+        ``0.0`` if there have been none.
+
+        """
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+        return float(self.hits) / lookups
+
+    def stats(self):
+        """Returns a ``dict`` with the cache's counters, hit rate, size and
+        capacity.
+
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hit_rate(),
+                'size': len(self.data),
+                'capacity': self.capacity,
+            }
+
+    def _evict(self):
+        """Discards items until the cache is within its capacity.
+
+        The caller must hold the lock.
+
+        """
+        while len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def __repr__(self):
+        return "<%s %d/%d>" % (self.__class__.__name__,
+                               len(self.data),
+                               self.capacity)
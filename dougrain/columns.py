@@ -0,0 +1,113 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Reading properties of many embedded resources as columns.
+
+``Document.embedded_columns`` uses this module. Properties are read straight
+from the JSON objects of the resources, so no ``Document`` is built for
+them. Each column is a ``numpy`` array if ``numpy`` is installed. Otherwise
+it is an ``array.array`` if every value in it is an integer, or every value
+is a number, and a ``list`` if not.
+
+Calling code is expected to use ``columns(objects, fields)``.
+
+"""
+
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    INTEGER_TYPES = frozenset([int, long])
+except NameError:
+    INTEGER_TYPES = frozenset([int])
+
+NUMBER_TYPES = INTEGER_TYPES | frozenset([float])
+
+# The widest integer type code this Python's ``array`` supports.
+try:
+    array('q')
+    INTEGER_TYPECODE = 'q'
+except ValueError:
+    INTEGER_TYPECODE = 'l'
+
+
+def number_array(values):
+    """Returns an ``array.array`` holding ``values``, or ``None`` if they
+    are not all numbers that fit in one.
+
+    """
+    # JSON decoders only make these types, so checking the exact type is
+    # enough, and it leaves out ``bool``.
+    types = set(map(type, values))
+    if types <= INTEGER_TYPES:
+        typecode = INTEGER_TYPECODE
+    elif types <= NUMBER_TYPES:
+        typecode = 'd'
+    else:
+        return None
+
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        return None
+
+
+def wants_numpy(use_numpy):
+    """Returns ``True`` if columns should be ``numpy`` arrays.
+
+    Raises ``ValueError`` if ``use_numpy`` is ``True`` and ``numpy`` is not
+    installed.
+
+    """
+    if use_numpy is None:
+        return numpy is not None
+    if use_numpy and numpy is None:
+        raise ValueError("use_numpy is True, but numpy is not installed")
+    return bool(use_numpy)
+
+
+def column(values, use_numpy=None):
+    """Returns the ``list`` ``values`` as a column.
+
+    Arguments:
+
+    - ``values``:    the values in the column.
+    - ``use_numpy``: ``True`` to return a ``numpy`` array, ``False`` to
+                     return an ``array.array`` or a ``list``. Defaults to
+                     ``True`` if ``numpy`` is installed.
+
+    Raises ``ValueError`` if ``use_numpy`` is ``True`` and ``numpy`` is not
+    installed.
+
+    """
+    if wants_numpy(use_numpy):
+        return numpy.array(values)
+
+    result = number_array(values)
+    if result is None:
+        return values
+    return result
+
+
+def columns(objects, fields, use_numpy=None):
+    """Returns an ``OrderedDict`` mapping each of ``fields`` to a column of
+    that property of each of the JSON objects in ``objects``.
+
+    An object without the property has ``None`` in the column.
+
+    Arguments:
+
+    - ``objects``:   a ``list`` of JSON objects.
+    - ``fields``:    the names of the properties to read.
+    - ``use_numpy``: as for ``column``.
+
+    """
+    use_numpy = wants_numpy(use_numpy)
+    return OrderedDict((field, column([o.get(field) for o in objects],
+                                      use_numpy))
+                       for field in fields)
@@ -1,15 +1,18 @@
 # Copyright (c) 2013 Will Harris
 # See the file license.txt for copying permission.
 
-from random import choice
+from dougrain.cache import LRUCache
 
 
 class CurieCollection(dict):
-    def __init__(self, expansions_cache={}):
-        # The default value of expansions_cache is not a mistake. The
-        # dictionary is deliberately shared because the mapping between
-        # (template, rel) and expansion is valid everywhere.
+    def __init__(self, expansions_cache=None):
+        # By default, the expansions cache is deliberately shared because the
+        # mapping between (template, rel) and expansion is valid everywhere.
+        # The template is keyed after it is resolved against its base URI,
+        # so relative CURIEs of different APIs do not collide.
         super(CurieCollection, self).__init__()
+        if expansions_cache is None:
+            expansions_cache = EXPANSIONS_CACHE
         self.expansions_cache = expansions_cache
 
     EXPANSIONS_CACHE_LEN_LIMIT = 128
@@ -26,16 +29,19 @@ class CurieCollection(dict):
             return link
 
         template = self[key]
-        memo_key = template.href, value
+        memo_key = template.template, value
 
-        if memo_key in self.expansions_cache:
-            return self.expansions_cache[memo_key]
+        result = self.expansions_cache.get(memo_key)
+        if result is not None:
+            return result
 
-        # Prevent unbounded growth of the shared cache.
-        if len(self.expansions_cache) >= self.EXPANSIONS_CACHE_LEN_LIMIT:
-            del self.expansions_cache[choice(self.expansions_cache.keys())]
-
-        result = self[key].url(rel=value)
+        result = template.url(rel=value)
         self.expansions_cache[memo_key] = result
 
         return result
+
+
+# The expansions cache shared by every CurieCollection. Its size can be
+# changed with EXPANSIONS_CACHE.resize(), and EXPANSIONS_CACHE.stats() reports
+# its hit, miss and eviction counts.
+EXPANSIONS_CACHE = LRUCache(CurieCollection.EXPANSIONS_CACHE_LEN_LIMIT)
@@ -12,18 +12,47 @@ except ImportError:
     import urlparse
 
 import itertools
-from collections import Mapping
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
+
+try:
+    from collections import ChainMap
+except ImportError:
+    ChainMap = None
 
 from functools import wraps
 
 import dougrain.link
 link = dougrain.link
 import dougrain.curie as curie
+from dougrain import columns
+from dougrain import jsonbackend
+from dougrain import merkle
+from dougrain import patch
+from dougrain.patch import copy_json
+from dougrain import serializer
+from dougrain.fragment import RawJSON
+from . import drafts
 from .drafts import AUTO
 from .drafts import LINKS_KEY
 from .drafts import EMBEDDED_KEY
 
 
+def canonical_key(key, curies, base_uri):
+    """Returns the canonical key for a link relationship type.
+
+    Keys that are relative URI references are resolved against ``base_uri``.
+    Other keys are expanded using the ``CurieCollection`` in ``curies``.
+
+    """
+    if key.startswith('/'):
+        return urlparse.urljoin(base_uri, key)
+    else:
+        return curies.expand(key)
+
+
 class CanonicalRels(Mapping, object):
     """Smart querying of link relationship types and link relationships.
 
@@ -98,10 +127,7 @@ class CanonicalRels(Mapping, object):
 
     def canonical_key(self, key):
         """Returns the canonical key for the given ``key``."""
-        if key.startswith('/'):
-            return urlparse.urljoin(self.base_uri, key)
-        else:
-            return self.curies.expand(key)
+        return canonical_key(key, self.curies, self.base_uri)
 
     def original_key(self, key):
         """Returns the first key seen for the given ``key``."""
@@ -123,7 +149,16 @@ class CanonicalRels(Mapping, object):
         is thrown.
 
         """
-        return self.rels[self.canonical_key(key)][1]
+        return self.canonical_value(self.canonical_key(key))
+
+    def canonical_value(self, canonical_key):
+        """Returns the link relationship for ``canonical_key``, which must
+        already be canonical, as returned by ``canonical_key``.
+
+        Raises ``KeyError`` if there is no such link relationship.
+
+        """
+        return self.rels[canonical_key][1]
 
     def __iter__(self):
         return iter(self.rels)
@@ -148,6 +183,303 @@ class CanonicalRels(Mapping, object):
         return [original_key for original_key, _ in self.rels.values()]
 
 
+class LazyCanonicalRels(CanonicalRels):
+    """``CanonicalRels`` that builds its values on demand.
+
+    The values given to a ``LazyCanonicalRels`` are JSON objects or arrays.
+    The keys are canonicalized up front, but a value is only passed to the
+    ``factory`` the first time its link relationship type is looked up, so
+    relationships that are never read are never built.
+
+    Values for equivalent keys are merged into a single JSON array before
+    they are passed to the ``factory``.
+
+    """
+    def __init__(self, rels, curies, base_uri, factory):
+        """Create a ``LazyCanonicalRels`` instance.
+
+        Arguments:
+
+        - ``rels``:     the relationships to be queried, as for
+                        ``CanonicalRels``. Each value should be the JSON
+                        object or array for the link relationship type.
+        - ``curies``:   a ``CurieCollection`` used to expand CURIE keys.
+        - ``base_uri``: URL used as the basis when expanding keys that are
+                        relative URI references.
+        - ``factory``:  a callable that accepts a JSON object or array and
+                        returns the value to be presented for it.
+
+        """
+        if hasattr(rels, 'items'):
+            items = rels.items()
+        else:
+            items = rels
+
+        self.curies = curies
+        self.base_uri = base_uri
+        self.factory = factory
+        self.raw_rels = {}
+        self.rels = {}
+
+        for key, value in items:
+            canonical_key = self.canonical_key(key)
+            if not canonical_key in self.raw_rels:
+                self.raw_rels[canonical_key] = (key, [value])
+                continue
+
+            self.raw_rels[canonical_key][1].append(value)
+
+    def original_key(self, key):
+        """Returns the first key seen for the given ``key``."""
+        return self.raw_rels[self.canonical_key(key)][0]
+
+    def __getitem__(self, key):
+        """Returns the link relationship that match the given ``key``.
+
+        The value is built by the ``factory`` the first time any key
+        equivalent to ``key`` is looked up. See ``CanonicalRels.__getitem__``.
+
+        """
+        return self.canonical_value(self.canonical_key(key))
+
+    def canonical_value(self, canonical_key):
+        """Returns the link relationship for ``canonical_key``, which must
+        already be canonical, building it if it has not been built.
+
+        Raises ``KeyError`` if there is no such link relationship.
+
+        """
+        if canonical_key not in self.rels:
+            original_key, values = self.raw_rels[canonical_key]
+
+            if len(values) == 1:
+                value = values[0]
+            else:
+                value = []
+                for item in values:
+                    if isinstance(item, list):
+                        value.extend(item)
+                    else:
+                        value.append(item)
+
+            self.rels[canonical_key] = original_key, self.factory(value)
+
+        return self.rels[canonical_key][1]
+
+    def __iter__(self):
+        return iter(self.raw_rels)
+
+    def __len__(self):
+        return len(self.raw_rels)
+
+    def __contains__(self, key):
+        """Returns ``True`` if there are any link relationships for for
+        ``self[key].``
+
+        """
+        return self.canonical_key(key) in self.raw_rels
+
+    def keys(self):
+        """Returns a list of keys that map to every item.
+
+        Each key returned is an original key. That is, the first key
+        encountered for the canonical key.
+
+        """
+        return [original_key for original_key, _ in self.raw_rels.values()]
+
+
+class LazySequence(Sequence, object):
+    """Read-only sequence that builds its items on demand.
+
+    A ``LazySequence`` wraps a list of JSON objects and passes each one to a
+    factory the first time its index is read. The result is kept, so each
+    item is only built once.
+
+    """
+    def __init__(self, objects, factory):
+        """Create a ``LazySequence`` instance.
+
+        Arguments:
+
+        - ``objects``: the ``list`` of JSON objects.
+        - ``factory``: a callable that accepts one of the JSON objects and
+                       returns the item to be presented for it.
+
+        """
+        self.objects = objects
+        self.factory = factory
+        self.items = [None] * len(objects)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        item = self.items[index]
+        if item is None:
+            item = self.factory(self.objects[index])
+            self.items[index] = item
+        return item
+
+    def __len__(self):
+        return len(self.items)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, LazySequence)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class RelIndex(object):
+    """Mutable index of the link relationship types in a JSON object.
+
+    A ``RelIndex`` maps the canonical key of every link relationship type in
+    a ``_links`` or ``_embedded`` JSON object to the keys under which that
+    relationship type appears in the object. Keys are canonicalized in the
+    same way as ``CanonicalRels``, but the index is updated in place as keys
+    are added and removed, so it does not have to be rebuilt every time the
+    object changes.
+
+    """
+    def __init__(self, keys, curies, base_uri):
+        """Create a ``RelIndex`` instance.
+
+        Arguments:
+
+        - ``keys``:     the keys already in the JSON object.
+        - ``curies``:   a ``CurieCollection`` used to expand CURIE keys.
+        - ``base_uri``: URL used as the basis when expanding keys that are
+                        relative URI references.
+
+        """
+        self.curies = curies
+        self.base_uri = base_uri
+        self.index = {}
+
+        for key in keys:
+            self.add(key)
+
+    def canonical_key(self, key):
+        """Returns the canonical key for the given ``key``."""
+        return canonical_key(key, self.curies, self.base_uri)
+
+    def original_key(self, key):
+        """Returns the first key seen for the given ``key``, or ``None`` if
+        there is no equivalent key in the index.
+
+        """
+        original_keys = self.index.get(self.canonical_key(key))
+        if not original_keys:
+            return None
+        return original_keys[0]
+
+    def original_keys(self, key):
+        """Returns every key in the index that is equivalent to ``key``."""
+        return list(self.index.get(self.canonical_key(key), []))
+
+    def add(self, key):
+        """Adds ``key`` to the index."""
+        original_keys = self.index.setdefault(self.canonical_key(key), [])
+        if key not in original_keys:
+            original_keys.append(key)
+
+    def discard(self, key):
+        """Removes ``key`` from the index if it is present."""
+        canonical_key = self.canonical_key(key)
+        original_keys = self.index.get(canonical_key, [])
+        if key in original_keys:
+            original_keys.remove(key)
+        if not original_keys:
+            self.index.pop(canonical_key, None)
+
+    def __contains__(self, key):
+        return self.canonical_key(key) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+
+def trim_embedded(o, depth):
+    """Returns the JSON for an embedded resource, or a ``list`` of them,
+    with at most ``depth`` levels of embedded resources.
+
+    Parts that need no trimming are returned as they are rather than copied.
+
+    """
+    if isinstance(o, list):
+        trimmed = [trim_embedded(item, depth) for item in o]
+        if all(new is old for new, old in zip(trimmed, o)):
+            return o
+        return trimmed
+
+    if not isinstance(o, dict) or EMBEDDED_KEY not in o:
+        return o
+
+    if depth == 0:
+        return dict((key, value) for key, value in o.items()
+                    if key != EMBEDDED_KEY)
+
+    embedded = o[EMBEDDED_KEY]
+    trimmed = dict((key, trim_embedded(value, depth - 1))
+                   for key, value in embedded.items())
+    if all(trimmed[key] is embedded[key] for key in embedded):
+        return o
+
+    result = dict(o)
+    result[EMBEDDED_KEY] = trimmed
+    return result
+
+
+class Ownership(object):
+    """Records the JSON containers that a tree of copy-on-write documents
+    has copied for itself.
+
+    A container that is not recorded may be shared with another document,
+    so it must be copied before it is changed. Containers are recorded by
+    ``id``, together with the container itself, so the record of a
+    discarded container is never used for another one. The copy made of
+    each container is recorded in the same way.
+
+    """
+
+    def __init__(self):
+        self.owned = {}
+        self.copies = {}
+
+    def owns(self, container):
+        """Returns ``True`` if ``container`` may be changed in place."""
+        return self.owned.get(id(container)) is container
+
+    def copy(self, container):
+        """Returns a shallow copy of ``container``, which is owned."""
+        original = container
+        if isinstance(container, dict):
+            container = dict(container)
+        else:
+            container = list(container)
+        self.owned[id(container)] = container
+        self.copies[id(original)] = (original, container)
+        return container
+
+    def copy_of(self, container):
+        """Returns the copy already made of ``container``, or ``None``."""
+        original, copy = self.copies.get(id(container), (None, None))
+        if original is container:
+            return copy
+        return None
+
+
 class Relationships(Mapping, object):
     """Merged view of relationships from a HAL document.
 
@@ -190,7 +522,7 @@ class Relationships(Mapping, object):
             url = item.url()
             if url is not None and url in existing_urls:
                 return False
-            existing_urls.add(item.url())
+            existing_urls.add(url)
             return True
 
         self.canonical_rels = CanonicalRels(rels,
@@ -200,7 +532,7 @@ class Relationships(Mapping, object):
 
     def __getitem__(self, key):
         value = self.canonical_rels.__getitem__(key)
-        if not isinstance(value, list):
+        if not isinstance(value, (list, LazySequence)):
             value = [value]
         return value
 
@@ -214,11 +546,49 @@ class Relationships(Mapping, object):
         return self.canonical_rels.keys()
 
 
+class Properties(Mapping, object):
+    """Read-only view of the properties of a HAL document.
+
+    A ``Properties`` instance presents the top-level members of a document's
+    JSON object, excluding ``_links`` and ``_embedded``, as a dictionary-like
+    object. Nothing is copied: every lookup reads the document's JSON object,
+    so the view always reflects the document's current properties.
+
+    """
+
+    def __init__(self, document):
+        """Create a ``Properties`` view of ``document``."""
+        self.document = document
+
+    def __getitem__(self, key):
+        if key in self.document.RESERVED_ATTRIBUTE_NAMES:
+            raise KeyError(key)
+        return self.document.o[key]
+
+    def __iter__(self):
+        reserved = self.document.RESERVED_ATTRIBUTE_NAMES
+        return (key for key in self.document.o if key not in reserved)
+
+    def __len__(self):
+        o = self.document.o
+        return len(o) - len([name
+                             for name in self.document.RESERVED_ATTRIBUTE_NAMES
+                             if name in o])
+
+    def __contains__(self, key):
+        return (key not in self.document.RESERVED_ATTRIBUTE_NAMES and
+                key in self.document.o)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
 def mutator(*cache_names):
     """Decorator for ``Document`` methods that change the document.
 
     This decorator ensures that the object's caches are kept in sync
-    when changes are made.
+    when changes are made. The fingerprints of the document, and of the
+    documents that embed it, are always invalidated.
 
     """
     def deco(fn):
@@ -229,6 +599,7 @@ def mutator(*cache_names):
             finally:
                 for cache_name in cache_names:
                     setattr(self, cache_name, None)
+                self._content_changed()
 
         return _fn
 
@@ -247,18 +618,26 @@ class Document(object):
 
     Public Instance Attributes:
 
-    - ``properties``: ``dict`` containing the properties of the HAL document,
-                      excluding ``_links`` and ``_embedded``. ``properties``
-                      should be treated as read-only.
+    - ``properties``: read-only ``Properties`` view of the properties of the
+                      HAL document, excluding ``_links`` and ``_embedded``.
+                      The view reflects later calls to ``set_property`` and
+                      ``delete_property``.
     - ``links``: ``dict`` containing the document's links, excluding
                  ``curies``. Each link relationship type is mapped to a
                  ``Link`` instance or a list of ``Link`` instances. ``links``
-                 should be treated as read-only.
+                 should be treated as read-only. The links for a link
+                 relationship type are built the first time they are read.
     - ``embedded``: dictionary containing the document's embedded resources.
                     Each link relationship type is mapped to a ``Document``
-                    instance.
+                    instance, or to a ``LazySequence`` of ``Document``
+                    instances that builds each document the first time it
+                    is read.
     - ``rels``: a ``Relationships`` instance holding a merged view of the
                 relationships from the document.
+    - ``self_link``: the document's ``self`` ``Link``, or the first one if
+                     there is more than one, or ``None`` if there is no
+                     ``self`` link. ``self_link`` is cached separately from
+                     ``links``.
     - ``draft``: a ``Draft`` instance that selects the version of the spec to
                  which the document should conform. Defaults to
                  ``drafts.AUTO``.
@@ -270,27 +649,28 @@ class Document(object):
         self.base_uri = base_uri
         self.parent_curies = parent_curies
         self.draft = draft.detect(o)
+        # The document that embeds this one, if it was read from that
+        # document's ``embedded``.
+        self._parent = None
+        # The ``Ownership`` of a copy-on-write document; see ``clone``.
+        self._cow = None
 
     RESERVED_ATTRIBUTE_NAMES = (LINKS_KEY, EMBEDDED_KEY)
 
     def properties_cache(self):
-        properties = dict(self.o)
-        for name in self.RESERVED_ATTRIBUTE_NAMES:
-            properties[name] = None
-            del properties[name]
-        return properties
+        return Properties(self)
 
     def links_cache(self):
-        links = {}
-
+        base_uri = self.base_uri
         links_json = self.o.get(LINKS_KEY, {})
 
-        for key, value in links_json.items():
-            if key == self.draft.curies_rel:
-                continue
-            links[key] = link.Link.from_object(value, self.base_uri)
+        links = [(key, value) for key, value in links_json.items()
+                 if key != self.draft.curies_rel]
+
+        def make_links(value):
+            return link.Link.from_object(value, base_uri)
 
-        return CanonicalRels(links, self.curies, self.base_uri)
+        return LazyCanonicalRels(links, self.curies, base_uri, make_links)
 
     def curies_cache(self):
         result = curie.CurieCollection()
@@ -314,24 +694,68 @@ class Document(object):
         return result
 
     def embedded_cache(self):
-        embedded = {}
-        for key, value in self.o.get(EMBEDDED_KEY, {}).items():
-            embedded[key] = self.from_object(value,
-                                             self.base_uri,
-                                             self.curies)
+        make_document = self._embedded_document
 
-        return CanonicalRels(embedded, self.curies, self.base_uri)
+        def make_embedded(value):
+            if isinstance(value, list):
+                return LazySequence(value, make_document)
+            return make_document(value)
+
+        return LazyCanonicalRels(self.o.get(EMBEDDED_KEY, {}),
+                                 self.curies,
+                                 self.base_uri,
+                                 make_embedded)
+
+    def _embedded_document(self, o):
+        """Returns a ``Document`` for ``o``, the JSON object of a resource
+        embedded in this document.
+
+        """
+        document = self.from_object(o, self.base_uri, self.curies)
+        document._parent = self
+        return document
 
     def rels_cache(self):
         return Relationships(self.links, self.embedded, self.curies,
                              self.base_uri)
 
+    def self_link_cache(self):
+        self_link = self.o.get(LINKS_KEY, {}).get('self')
+
+        if isinstance(self_link, list):
+            if not self_link:
+                return None
+            self_link = self_link[0]
+
+        if self_link is None:
+            return None
+
+        return link.Link(self_link, self.base_uri)
+
+    def links_index_cache(self):
+        return RelIndex(self.o.get(LINKS_KEY, {}), self.curies, self.base_uri)
+
+    def embedded_index_cache(self):
+        return RelIndex(self.o.get(EMBEDDED_KEY, {}), self.curies,
+                        self.base_uri)
+
     def prepare_cache(self):
         self._properties_cache = None
         self._curies_cache = None
         self._links_cache = None
         self._embedded_cache = None
         self._rels_cache = None
+        self._self_link_cache = None
+        self._links_index_cache = None
+        self._embedded_index_cache = None
+        self._properties_digest_cache = None
+        self._links_digest_cache = None
+        self._embedded_digest_cache = None
+        self._fingerprint_cache = None
+        self._digest_table = {}
+        # The number of entries in ``_digest_table`` when it last held only
+        # live entries; see ``fingerprint``.
+        self._digest_table_live = 0
 
     @property
     def properties(self):
@@ -363,6 +787,24 @@ class Document(object):
             self._rels_cache = self.rels_cache()
         return self._rels_cache
 
+    @property
+    def self_link(self):
+        if self._self_link_cache is None:
+            self._self_link_cache = self.self_link_cache()
+        return self._self_link_cache
+
+    @property
+    def links_index(self):
+        if self._links_index_cache is None:
+            self._links_index_cache = self.links_index_cache()
+        return self._links_index_cache
+
+    @property
+    def embedded_index(self):
+        if self._embedded_index_cache is None:
+            self._embedded_index_cache = self.embedded_index_cache()
+        return self._embedded_index_cache
+
     def url(self):
         """Returns the URL for the resource based on the ``self`` link.
 
@@ -370,16 +812,14 @@ class Document(object):
         has one, or ``None`` if the document lacks a ``self`` link, or the
         ``href`` of the document's first ``self`` link if it has more than one.
 
+        Only the ``self`` link is read to find the URL. The full ``links``
+        collection is not built.
+
         """
-        if not 'self' in self.links:
+        self_link = self.self_link
+        if self_link is None:
             return None
 
-        self_link = self.links['self']
-
-        if isinstance(self_link, list):
-            for link in self_link:
-                return link.url()
-
         return self_link.url()
 
     def expand_curie(self, link):
@@ -398,11 +838,410 @@ class Document(object):
         """Returns a dictionary representing the HAL JSON document."""
         return self.o
 
+    def dumps(self, backend=None):
+        """Returns the HAL JSON document as a ``str``.
+
+        Arguments:
+
+        - ``backend``: optional name of the JSON backend to use (see
+                       ``jsonbackend.get_backend``). Defaults to the default
+                       backend.
+
+        Any ``dougrain.RawJSON`` property values are written as they are.
+
+        """
+        return serializer.Splicer(jsonbackend.get_backend(backend)).dumps(
+            self.o)
+
+    def fingerprint(self):
+        """Returns a ``str`` that identifies the content of the document.
+
+        Two documents have the same fingerprint if their JSON objects have
+        the same canonical JSON text, with sorted keys. The fingerprint is a
+        Merkle digest of the document's properties, links and embedded
+        resources (see ``dougrain.merkle``). It is cached, and a change made
+        through this document's methods, or through the methods of a
+        document read from its ``embedded``, only causes the digests of the
+        changed part and its ancestors to be computed again.
+
+        Changes made to ``o`` directly are not detected. That includes
+        changes to JSON objects this document shares with another, such as
+        the JSON object of a document passed to ``embed``, which is stored
+        by reference: after the other document changes, this document's
+        fingerprint is stale. The fingerprint of a ``FrozenDocument``, which
+        owns its JSON object, is always up to date.
+
+        """
+        if self._fingerprint_cache is None:
+            if self._properties_digest_cache is None:
+                self._properties_digest_cache = \
+                    merkle.properties_digest(self.o)
+            if self._links_digest_cache is None:
+                self._links_digest_cache = merkle.links_digest(self.o)
+            if self._embedded_digest_cache is None:
+                self._embedded_digest_cache = \
+                    merkle.embedded_digest(self.o, self._digest_table)
+                self._prune_digest_table()
+            self._fingerprint_cache = merkle.combine(
+                self._properties_digest_cache,
+                self._links_digest_cache,
+                self._embedded_digest_cache)
+        return self._fingerprint_cache
+
+    def _prune_digest_table(self):
+        """Drops the fingerprints of resources that are no longer embedded
+        in the document, once the table has grown to more than twice its
+        live size, so that removed resources are not kept alive.
+
+        """
+        table = self._digest_table
+        limit = 2 * self._digest_table_live + merkle.TABLE_SLACK
+        if len(table) <= limit:
+            return
+        self._digest_table = merkle.live_table(table, self.o)
+        self._digest_table_live = len(self._digest_table)
+
+    def etag(self, weak=False):
+        """Returns an HTTP entity tag for the document, made from its
+        ``fingerprint``. The tag is weak if ``weak`` is true.
+
+        """
+        tag = '"%s"' % self.fingerprint()
+        if weak:
+            return 'W/' + tag
+        return tag
+
+    def _content_changed(self, changed=()):
+        """Discards the fingerprints made stale by a change to this document,
+        or to the JSON objects of its embedded resources in ``changed``, in
+        this document and the documents that embed it.
+
+        """
+        document = self
+        while document is not None:
+            if changed:
+                merkle.discard(document._digest_table, changed)
+                document._embedded_digest_cache = None
+            document._fingerprint_cache = None
+            changed = changed + (document.o,)
+            document = document._parent
+
+    def clone(self):
+        """Returns a copy of the document that can be changed independently
+        of it.
+
+        The copy shares the document's JSON object instead of copying it, so
+        cloning takes constant time. Afterwards, the copy and the original
+        are both copy-on-write: when either is changed through its methods,
+        or through the methods of the documents in its ``embedded``, only
+        the JSON objects and arrays on the path to the change are copied.
+        The copy also shares the original's fingerprint digests.
+
+        Changes made to ``o`` directly are not copied on write, and are seen
+        by both documents. A clone of a ``FrozenDocument`` is an ordinary
+        ``Document``. Changing an embedded document whose JSON object has
+        been removed from the document that embeds it raises
+        ``ValueError``.
+
+        """
+        clone = self._share(self.o)
+        clone._properties_digest_cache = self._properties_digest_cache
+        clone._links_digest_cache = self._links_digest_cache
+        clone._embedded_digest_cache = self._embedded_digest_cache
+        clone._fingerprint_cache = self._fingerprint_cache
+        return clone
+
+    def diff(self, other):
+        """Returns the JSON Patch (RFC 6902) operations that turn this
+        document's JSON object into the JSON object of ``other``.
+
+        The operations are a list of ``dict`` objects, ready to be
+        serialized. Arguments:
+
+        - ``other``: the ``Document`` to compare this document with.
+
+        The comparison knows about HAL: a relationship type holding a
+        single link or embedded resource is the same as one holding an
+        array with just that item, and the items of link arrays and
+        embedded arrays are matched by their ``href`` and their ``self``
+        link, so reordering an array gives only the ``move`` operations it
+        needs. If both documents are ``FrozenDocument`` instances, embedded
+        resources with equal fingerprints are not compared any further.
+        Other documents are always compared in full, because their cached
+        fingerprints can be stale (see ``fingerprint``).
+
+        """
+        if not (isinstance(self, FrozenDocument) and
+                isinstance(other, FrozenDocument)):
+            return patch.diff(self.o, other.o)
+
+        if self.fingerprint() == other.fingerprint():
+            return []
+
+        mine = self._digest_table
+        theirs = other._digest_table
+
+        def equal(a, b):
+            fingerprint = merkle.cached(mine, a)
+            return (fingerprint is not None and
+                    fingerprint == merkle.cached(theirs, b))
+
+        return patch.diff(self.o, other.o, equal)
+
+    def apply_patch(self, operations):
+        """Returns a new document made by applying JSON Patch (RFC 6902)
+        ``operations`` to this document's JSON object.
+
+        This document is not changed. Only the JSON objects and arrays on
+        the paths of the operations are copied; the new document shares the
+        rest with this document, and both are copy-on-write afterwards, as
+        with ``clone``.
+
+        Raises ``ValueError`` if an operation cannot be applied, including a
+        ``test`` operation that fails. Arguments:
+
+        - ``operations``: a list of JSON Patch operations, such as those
+          returned by ``diff``.
+
+        """
+        return self._share(patch.apply(self.o, operations))
+
+    def _share(self, o):
+        """Returns a copy-on-write document for ``o``, a JSON object that
+        shares containers with this document's JSON object.
+
+        """
+        cls = self.__class__
+        if isinstance(self, FrozenDocument):
+            cls = Document
+
+        shared = cls(o, self.base_uri, self.parent_curies,
+                     drafts.FixedDraftIdentifier(self.draft))
+        shared._cow = Ownership()
+        # Every container is now shared, including those this document's
+        # tree had already copied.
+        self._root()._cow = Ownership()
+
+        if isinstance(self, FrozenDocument):
+            # A frozen document's table must not change, so new digests go
+            # in a layer of the new document's own.
+            if ChainMap is None:
+                shared._digest_table = dict(self._digest_table)
+            else:
+                shared._digest_table = ChainMap({}, self._digest_table)
+        else:
+            # Shared containers are never changed in place, so their
+            # digests stay valid for both documents.
+            shared._digest_table = self._digest_table
+        shared._digest_table_live = len(shared._digest_table)
+
+        return shared
+
+    def _root(self):
+        """Returns the outermost document that this document was read
+        from.
+
+        """
+        document = self
+        while document._parent is not None:
+            document = document._parent
+        return document
+
+    def _prepare_write(self, *path):
+        """Copies the JSON containers that are about to be changed, if this
+        document is copy-on-write and they may be shared.
+
+        The containers are this document's JSON object and the containers
+        reached from it by following the keys in ``path``, stopping at the
+        first key that is missing. Each copy replaces the original in its
+        parent container.
+
+        """
+        ownership = self._root()._cow
+        if ownership is None:
+            return
+
+        self._own_object(ownership)
+        node = self.o
+        for key in path:
+            child = node.get(key)
+            if not isinstance(child, (dict, list)):
+                return
+            if not ownership.owns(child):
+                child = ownership.copy(child)
+                node[key] = child
+            node = child
+
+    def _own_object(self, ownership):
+        """Makes this document's JSON object owned by ``ownership``, copying
+        it, and the containers of the documents that embed it, if needed.
+
+        If another document read from the same JSON object has already
+        copied it, this document uses that copy instead, so both see each
+        other's changes.
+
+        Raises ``ValueError`` if the document that embeds this one no longer
+        holds its JSON object, because a change to a copy of it would be
+        lost. Such a document must be read again from ``embedded``.
+
+        """
+        old = self.o
+        if ownership.owns(old):
+            return
+
+        new = ownership.copy_of(old)
+        if new is not None:
+            self.o = new
+            return
+
+        parent = self._parent
+        if parent is None:
+            self.o = ownership.copy(old)
+            return
+
+        parent._prepare_write(EMBEDDED_KEY)
+        embedded = parent.o.get(EMBEDDED_KEY, {})
+        for rel, value in list(embedded.items()):
+            if value is old:
+                new = ownership.copy(old)
+                embedded[rel] = new
+                break
+            if isinstance(value, list):
+                indexes = [i for i, item in enumerate(value) if item is old]
+                if indexes:
+                    new = ownership.copy(old)
+                    parent._prepare_write(EMBEDDED_KEY, rel)
+                    embedded[rel][indexes[0]] = new
+                    break
+
+        if new is None:
+            raise ValueError("The embedding document no longer holds this "
+                             "document's JSON object; read it again from "
+                             "the embedding document's embedded")
+
+        # The parent's embedded documents may have been read from the
+        # replaced containers.
+        parent._embedded_cache = None
+        self.o = new
+
+    def freeze(self):
+        """Returns a ``FrozenDocument`` snapshot of this document.
+
+        The snapshot holds a deep copy of the document's JSON object, so
+        later changes to this document do not affect it. Every cache of the
+        snapshot, and of the documents embedded in it, is built before it is
+        returned, including its fingerprint. Reading the snapshot therefore
+        changes nothing, and one snapshot can be shared between threads
+        without locking.
+
+        """
+        frozen = FrozenDocument(copy_json(self.o), self.base_uri,
+                                self.parent_curies,
+                                drafts.FixedDraftIdentifier(self.draft))
+        frozen._build_caches()
+        return frozen
+
+    def project(self, properties=None, rels=None, depth=None):
+        """Returns a new ``Document`` holding part of this document, for
+        example to serve a sparse fieldset.
+
+        The new document shares every part of this document that it does
+        not trim, rather than copying it, so it is cheap to make. Like a
+        ``clone``, it is copy-on-write: changes to either document copy only
+        the JSON objects and arrays on the path to the change, and are not
+        seen by the other. Its links, including its CURIEs, are always kept.
+
+        Arguments:
+
+        - ``properties``: optional collection of the names of the properties
+                          to keep. Defaults to keeping every property.
+        - ``rels``: optional collection of the link relationship types of
+                    the embedded resources to keep. Relationship types are
+                    matched in the same way as ``embedded`` keys, so a CURIE
+                    matches the equivalent full or relative URI. Defaults to
+                    keeping every embedded resource.
+        - ``depth``: optional number of levels of embedded resources to
+                     keep. ``0`` keeps none, ``1`` keeps the embedded
+                     resources without their own embedded resources, and so
+                     on. Defaults to keeping every level.
+
+        """
+        if properties is not None:
+            properties = set(properties)
+
+        embedded = self.o.get(EMBEDDED_KEY)
+        if embedded and depth != 0:
+            if rels is not None:
+                keys = set()
+                for rel in rels:
+                    keys.update(self.embedded_index.original_keys(rel))
+                embedded = dict((key, value) for key, value
+                                in embedded.items() if key in keys)
+
+            if depth is not None:
+                embedded = dict((key, trim_embedded(value, depth - 1))
+                                for key, value in embedded.items())
+
+        o = {}
+        for key, value in self.o.items():
+            if key == EMBEDDED_KEY:
+                if embedded and depth != 0:
+                    o[key] = embedded
+            elif (properties is None or key == LINKS_KEY or
+                    key in properties):
+                o[key] = value
+
+        return self._share(o)
+
+    def embedded_columns(self, rel, fields, use_numpy=None):
+        """Returns properties of the resources embedded for ``rel`` as
+        columns, for example to aggregate them.
+
+        The result is an ``OrderedDict`` mapping each of ``fields`` to a
+        column holding that property of every resource, in the order the
+        resources appear in ``embedded[rel]``. A resource without the
+        property has ``None`` in the column. The properties are read from
+        the JSON objects of the resources, so no ``Document`` is built for
+        them.
+
+        Each column is a ``numpy`` array if ``numpy`` is installed.
+        Otherwise it is an ``array.array`` if all of its values are
+        integers, or all are numbers, and a ``list`` if not.
+
+        Arguments:
+
+        - ``rel``: the link relationship type of the embedded resources.
+                   It is matched in the same way as ``embedded`` keys. If
+                   there are no resources for ``rel``, the columns are
+                   empty.
+        - ``fields``: the names of the properties to read.
+        - ``use_numpy``: optional. ``False`` to return ``array.array`` and
+                         ``list`` columns even if ``numpy`` is installed.
+                         ``True`` raises ``ValueError`` if ``numpy`` is
+                         not installed.
+
+        """
+        fields = list(fields)
+        for field in fields:
+            if field in self.RESERVED_ATTRIBUTE_NAMES:
+                raise ValueError("%r is not a property" % (field,))
+
+        embedded = self.o.get(EMBEDDED_KEY, {})
+        objects = []
+        for key in self.embedded_index.original_keys(rel):
+            value = embedded[key]
+            if isinstance(value, list):
+                objects.extend(value)
+            else:
+                objects.append(value)
+
+        return columns.columns(objects, fields, use_numpy)
+
     def as_link(self):
         """Returns a ``Link`` to the resource."""
         return self.links['self']
 
-    @mutator('_properties_cache')
+    @mutator('_properties_digest_cache')
     def set_property(self, key, value):
         """Set a property on the document.
 
@@ -420,9 +1259,10 @@ class Document(object):
         """
         if key in self.RESERVED_ATTRIBUTE_NAMES:
             return
+        self._prepare_write()
         self.o[key] = value
 
-    @mutator('_properties_cache')
+    @mutator('_properties_digest_cache')
     def delete_property(self, key):
         """Remove a property from the document.
 
@@ -433,15 +1273,15 @@ class Document(object):
         Otherwise, a ``KeyError`` will be thrown.
 
         """
-        if key in self.RESERVED_ATTRIBUTE_NAMES:
+        if key in self.RESERVED_ATTRIBUTE_NAMES or key not in self.o:
             raise KeyError(key)
+        self._prepare_write()
         del self.o[key]
 
     def link(self, href, **kwargs):
         """Retuns a new link relative to this resource."""
         return link.Link(dict(href=href, **kwargs), self.base_uri)
 
-    @mutator('_links_cache')
     def add_link(self, rel, target, wrap=False, **kwargs):
         """Adds a link to the document.
 
@@ -477,31 +1317,112 @@ class Document(object):
           first link for the given ``rel``.
 
         """
-        if hasattr(target, 'as_link'):
-            link = target.as_link()
-        else:
-            link = self.link(target, **kwargs)
+        self.add_links(rel, [target], wrap, **kwargs)
+
+    @mutator('_links_cache', '_self_link_cache', '_links_digest_cache')
+    def add_links(self, rel, targets, wrap=False, **kwargs):
+        """Adds several links for the same link relationship type.
 
-        links = self.o.setdefault(LINKS_KEY, {})
+        This method is equivalent to calling ``add_link`` once for each item
+        in ``targets``, but the link relationship type is only looked up once
+        for the whole batch.
 
-        new_link = link.as_object()
-        collected_links = CanonicalRels(links, self.curies, self.base_uri)
-        if rel not in collected_links:
-            if wrap:
-                links[rel] = [new_link]
+        Arguments:
+
+        - ``rel``: a string specifying the link relationship type of the
+          links.
+        - ``targets``: an iterable of link destinations. Each item may be any
+          of the ``target`` types accepted by ``add_link``. The keyword
+          arguments are used as properties of any links added from strings.
+        - ``wrap``: Defaults to False, but if True, specifies that the link
+          objects should be initally wrapped in a JSON array even if only one
+          link is added for a ``rel`` that had no links before.
+
+        """
+        new_links = []
+        for target in targets:
+            if hasattr(target, 'as_link'):
+                new_link = target.as_link()
             else:
-                links[rel] = new_link
+                new_link = self.link(target, **kwargs)
+            new_links.append(new_link.as_object())
+
+        self._add_to_rel(LINKS_KEY, self._rel_index(LINKS_KEY, rel), rel,
+                         new_links, wrap)
+
+    def _add_to_rel(self, key, index, rel, things, wrap):
+        """Adds JSON objects to the links or embedded resources for ``rel``.
+
+        ``things`` are appended to the existing items under the first key in
+        ``index`` that is equivalent to ``rel``, or stored under ``rel`` if
+        there is no such key.
+
+        Calling code should not use this method directly and should use
+        ``add_links`` or ``embed_many`` instead.
+
+        """
+        if not things:
             return
 
-        original_rel = collected_links.original_key(rel)
+        original_rel = index.original_key(rel)
+        self._prepare_write(key, original_rel)
+        rels = self.o.setdefault(key, {})
 
-        current_links = links[original_rel]
-        if isinstance(current_links, list):
-            current_links.append(new_link)
+        if original_rel is None:
+            if wrap or len(things) > 1:
+                rels[rel] = list(things)
+            else:
+                rels[rel] = things[0]
+            index.add(rel)
+            return
+
+        current = rels[original_rel]
+        if isinstance(current, list):
+            current.extend(things)
         else:
-            links[original_rel] = [current_links, new_link]
+            rels[original_rel] = [current] + list(things)
+
+    def _rel_index(self, key, rel):
+        """Returns the ``RelIndex`` for ``key``, which is ``LINKS_KEY`` or
+        ``EMBEDDED_KEY``, rebuilding it first if it disagrees with the JSON
+        object about the keys equivalent to ``rel``.
 
-    @mutator('_links_cache')
+        Another ``Document`` for the same JSON object, such as an embedded
+        resource read again after its parent changed, can add or remove
+        keys without updating this document's index.
+
+        """
+        if key == LINKS_KEY:
+            index = self.links_index
+        else:
+            index = self.embedded_index
+
+        rels = self.o.get(key, {})
+        original_keys = index.original_keys(rel)
+        if ((rel in rels and rel not in original_keys) or
+                any(original_key not in rels
+                    for original_key in original_keys)):
+            index = RelIndex(rels, self.curies, self.base_uri)
+            if key == LINKS_KEY:
+                self._links_index_cache = index
+            else:
+                self._embedded_index_cache = index
+
+        return index
+
+    def _link_urls(self, rel):
+        """Returns the URLs of the links equivalent to ``rel``."""
+        links = self.o.get(LINKS_KEY, {})
+        urls = []
+        for original_rel in self._rel_index(LINKS_KEY, rel).original_keys(rel):
+            link_objects = links[original_rel]
+            if not isinstance(link_objects, list):
+                link_objects = [link_objects]
+            urls.extend(link.Link(link_object, self.base_uri).url()
+                        for link_object in link_objects)
+        return urls
+
+    @mutator('_links_cache', '_self_link_cache', '_links_digest_cache')
     def delete_link(self, rel=None, href=lambda _: True):
         """Deletes links from the document.
 
@@ -528,6 +1449,7 @@ class Document(object):
         if not LINKS_KEY in self.o:
             return
 
+        self._prepare_write(LINKS_KEY)
         links = self.o[LINKS_KEY]
         if rel is None:
             for rel in list(links.keys()):
@@ -555,6 +1477,8 @@ class Document(object):
             links[rel] = new_links_for_rel
         else:
             del links[rel]
+            if self._links_index_cache is not None:
+                self._links_index_cache.discard(rel)
 
         if not self.o[LINKS_KEY]:
             del self.o[LINKS_KEY]
@@ -585,6 +1509,25 @@ class Document(object):
 
         return cls(o, base_uri, parent_curies, draft)
 
+    @classmethod
+    def from_json(cls, data, base_uri=None, parent_curies=None, draft=AUTO,
+                  backend=None):
+        """Returns a new ``Document`` based on JSON text.
+
+        Arguments:
+
+        - ``data``: ``bytes`` holding UTF-8 encoded JSON, or a ``str``. If
+                    the JSON is an array, a ``list`` of ``Document`` objects
+                    is returned.
+        - ``base_uri``, ``parent_curies``, ``draft``: as for ``from_object``.
+        - ``backend``: optional name of the JSON backend to use (see
+                       ``jsonbackend.get_backend``). Defaults to the default
+                       backend.
+
+        """
+        o = jsonbackend.get_backend(backend).loads(data)
+        return cls.from_object(o, base_uri, parent_curies, draft)
+
     @classmethod
     def empty(cls, base_uri=None, draft=AUTO):
         """Returns an empty ``Document``.
@@ -599,7 +1542,6 @@ class Document(object):
         """
         return cls.from_object({}, base_uri=base_uri, draft=draft)
 
-    @mutator('_embedded_cache')
     def embed(self, rel, other, wrap=False):
         """Embeds a document inside this document.
 
@@ -627,41 +1569,57 @@ class Document(object):
 
         """
 
-        if other == self:
-            return
+        self.embed_many(rel, [other], wrap)
 
-        embedded = self.o.setdefault(EMBEDDED_KEY, {})
-        collected_embedded = CanonicalRels(embedded,
-                                           self.curies,
-                                           self.base_uri)
+    @mutator('_embedded_cache', '_embedded_digest_cache')
+    def embed_many(self, rel, others, wrap=False):
+        """Embeds several documents for the same link relationship type.
 
-        if rel not in collected_embedded:
-            if wrap:
-                embedded[rel] = [other.as_object()]
-            else:
-                embedded[rel] = other.as_object()
-        else:
-            original_rel = collected_embedded.original_key(rel)
+        This method is equivalent to calling ``embed`` once for each item in
+        ``others``, but the link relationship type is looked up, and the
+        existing links checked for duplicates, once for the whole batch.
 
-            current_embedded = embedded[original_rel]
-            if isinstance(current_embedded, list):
-                current_embedded.append(other.as_object())
-            else:
-                embedded[original_rel] = [current_embedded, other.as_object()]
+        Arguments:
 
-        if not self.draft.automatic_link:
-            return
+        - ``rel``: a string specifying the link relationship type of the
+          embedded resources.
+        - ``others``: an iterable of ``Document`` or ``Builder`` instances
+          that will be embedded in this document. Any item that is identical
+          to this document is skipped. ``RawJSON`` items are not accepted,
+          and raise ``TypeError``; use ``Builder.embed`` to write them as
+          they are.
+        - ``wrap``: Defaults to False, but if True, specifies that the embedded
+          resource objects should be initally wrapped in a JSON array even if
+          only one resource is embedded for a ``rel`` that had none before.
 
-        url = other.url()
-        if not url:
-            return
+        """
+        others = [other for other in others if other is not self]
+        for other in others:
+            if isinstance(other, RawJSON):
+                raise TypeError("Cannot embed RawJSON %r in a Document; "
+                                "use Builder.embed instead" % (other,))
+
+        self._add_to_rel(EMBEDDED_KEY,
+                         self._rel_index(EMBEDDED_KEY, rel),
+                         rel,
+                         [other.as_object() for other in others],
+                         wrap)
 
-        if url in (link.url() for link in self.links.get(rel, [])):
+        if not self.draft.automatic_link:
             return
 
-        self.add_link(rel, other, wrap=wrap)
+        existing_urls = set(self._link_urls(rel))
+        new_targets = []
+        for other in others:
+            url = other.url()
+            if not url or url in existing_urls:
+                continue
+            existing_urls.add(url)
+            new_targets.append(other)
+
+        self.add_links(rel, new_targets, wrap=wrap)
 
-    @mutator('_embedded_cache')
+    @mutator('_embedded_cache', '_embedded_digest_cache')
     def delete_embedded(self, rel=None, href=lambda _: True):
         """Removes an embedded resource from this document.
 
@@ -700,6 +1658,8 @@ class Document(object):
         if rel not in self.o[EMBEDDED_KEY]:
             return
 
+        self._prepare_write(EMBEDDED_KEY)
+
         if callable(href):
             url_filter = href
         else:
@@ -709,6 +1669,8 @@ class Document(object):
 
         if isinstance(rel_embeds, dict):
             del self.o[EMBEDDED_KEY][rel]
+            if self._embedded_index_cache is not None:
+                self._embedded_index_cache.discard(rel)
 
             if not self.o[EMBEDDED_KEY]:
                 del self.o[EMBEDDED_KEY]
@@ -722,6 +1684,8 @@ class Document(object):
 
         if not new_rel_embeds:
             del self.o[EMBEDDED_KEY][rel]
+            if self._embedded_index_cache is not None:
+                self._embedded_index_cache.discard(rel)
         elif len(new_rel_embeds) == 1:
             self.o[EMBEDDED_KEY][rel] = new_rel_embeds[0]
         else:
@@ -730,7 +1694,8 @@ class Document(object):
         if not self.o[EMBEDDED_KEY]:
             del self.o[EMBEDDED_KEY]
 
-    @mutator('_curies_cache')
+    @mutator('_curies_cache', '_links_index_cache',
+             '_embedded_index_cache', '_links_digest_cache')
     def set_curie(self, name, href):
         """Sets a CURIE.
 
@@ -738,16 +1703,18 @@ class Document(object):
         document.
 
         """
-
+        self._prepare_write(LINKS_KEY, self.draft.curies_rel)
         self.draft.set_curie(self, name, href)
 
-    @mutator('_curies_cache')
+    @mutator('_curies_cache', '_links_index_cache',
+             '_embedded_index_cache', '_links_digest_cache')
     def drop_curie(self, name):
         """Removes a CURIE.
 
         The CURIE link with the given name is removed from the document.
 
         """
+        self._prepare_write(LINKS_KEY, self.draft.curies_rel)
         curies = self.o[LINKS_KEY][self.draft.curies_rel]
         if isinstance(curies, dict) and curies['name'] == name:
             del self.o[LINKS_KEY][self.draft.curies_rel]
@@ -767,7 +1734,127 @@ class Document(object):
         if not isinstance(other, Document):
             return False
 
+        if self is other:
+            return True
+
+        if isinstance(self, FrozenDocument) and \
+                isinstance(other, FrozenDocument):
+            # Frozen documents own their JSON objects, so their
+            # fingerprints cannot be stale.
+            return self.fingerprint() == other.fingerprint()
+
         return self.as_object() == other.as_object()
 
+    def __ne__(self, other):
+        return not self == other
+
+    # A ``Document`` can change, so it is not hashable. Python 3 implies
+    # this from ``__eq__``, but Python 2 does not.
+    __hash__ = None
+
     def __repr__(self):
         return "<Document %r>" % self.url()
+
+
+def immutable(name):
+    """Returns a method that raises ``TypeError``, to replace the mutator
+    ``name`` in ``FrozenDocument``.
+
+    """
+    def _fn(self, *args, **kwargs):
+        raise TypeError("%s.%s: the document is frozen" %
+                        (self.__class__.__name__, name))
+
+    _fn.__name__ = name
+    return _fn
+
+
+class FrozenDocument(Document):
+    """A ``Document`` that cannot be changed.
+
+    Every method that would change the document raises ``TypeError``
+    instead. Because its content does not change, a ``FrozenDocument`` is
+    hashable: its hash is computed once from its ``fingerprint`` and cached,
+    so frozen documents can be kept in sets and used as dictionary keys. The
+    resources in its ``embedded`` are also ``FrozenDocument`` instances.
+
+    A ``FrozenDocument`` is equal to any ``Document`` with the same
+    content, but an ordinary ``Document`` is not hashable.
+
+    The JSON object passed to the constructor must not be changed either.
+    ``Document.freeze`` makes a ``FrozenDocument`` from a copy of a
+    document's JSON object, with its caches already built.
+
+    """
+
+    def prepare_cache(self):
+        super(FrozenDocument, self).prepare_cache()
+        self._hash_cache = None
+
+    def curies_cache(self):
+        result = super(FrozenDocument, self).curies_cache()
+        # A private expansions cache, rather than the shared, locked one, so
+        # that threads reading the document do not wait for each other.
+        result.expansions_cache = {}
+        return result
+
+    def freeze(self):
+        """Returns this document, with its caches built. See
+        ``Document.freeze``.
+
+        """
+        self._build_caches()
+        return self
+
+    def _build_caches(self, digest_table=None):
+        """Builds every cache of the document and of the documents embedded
+        in it.
+
+        ``digest_table`` is the fingerprint table of the document that
+        embeds this one, which already holds the fingerprints of this
+        document's embedded resources.
+
+        """
+        if digest_table is not None:
+            self._digest_table = digest_table
+        hash(self)
+
+        self.properties
+        self.self_link
+        self.links_index
+        self.embedded_index
+
+        links = self.links
+        for rel in links:
+            for item in links[rel]:
+                item.template
+                item.variables
+                if item.is_templated:
+                    item.compiled_template
+                hash(item)
+
+        embedded = self.embedded
+        for rel in embedded:
+            for document in embedded[rel]:
+                document._build_caches(self._digest_table)
+
+        self.rels
+
+    set_property = immutable('set_property')
+    delete_property = immutable('delete_property')
+    add_link = immutable('add_link')
+    add_links = immutable('add_links')
+    delete_link = immutable('delete_link')
+    embed = immutable('embed')
+    embed_many = immutable('embed_many')
+    delete_embedded = immutable('delete_embedded')
+    set_curie = immutable('set_curie')
+    drop_curie = immutable('drop_curie')
+
+    def __hash__(self):
+        if self._hash_cache is None:
+            self._hash_cache = hash(self.fingerprint())
+        return self._hash_cache
+
+    def __repr__(self):
+        return "<FrozenDocument %r>" % self.url()
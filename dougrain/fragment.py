@@ -0,0 +1,226 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Splicing serialized JSON into documents.
+
+Some values are already available as JSON text, for example resources read
+from a cache. Decoding them only to encode them again is wasted work, so
+``Builder.embed`` and ``Builder.set_property`` accept a ``RawJSON`` holding
+the text, and the serializers write the text into the output as it is.
+
+A resource that is embedded in many documents, such as the author of many
+posts, only has to be serialized once. ``FragmentCache`` keeps the JSON text
+of such resources as ``Fragment`` objects, keyed by the resource's URL and a
+version such as an ETag.
+
+"""
+
+import re
+
+from dougrain import jsonbackend
+from dougrain.cache import LRUCache
+from dougrain.drafts import LINKS_KEY
+
+# The start of a JSON object whose first member is ``_links``.
+LEADING_LINKS = re.compile(r'\s*\{\s*"%s"\s*:\s*' % LINKS_KEY)
+
+# The start of a JSON object whose first link is ``self``, and whose ``self``
+# link starts with its href. The href's JSON string is the first group.
+LEADING_SELF_HREF = re.compile(
+    r'\s*\{\s*"%s"\s*:\s*\{\s*"self"\s*:\s*\{\s*"href"\s*:\s*'
+    r'("(?:[^"\\]|\\.)*")' % LINKS_KEY, re.DOTALL)
+
+
+class RawJSON(object):
+    """JSON text that is written into a serialized document as it is.
+
+    Public Instance Attributes:
+
+    - ``text``: ``str`` holding the JSON text.
+
+    """
+
+    def __init__(self, text, href=None):
+        """``RawJSON(text, href=None)``
+
+        ``text`` may be ``bytes`` holding UTF-8 encoded JSON, or a ``str``.
+        It must be valid JSON; it is not checked. When a ``RawJSON`` is
+        embedded as a resource, ``text`` must be a JSON object, and ``href``
+        may give the href of its ``self`` link, which is otherwise read from
+        ``text`` when it is needed.
+
+        """
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        self.text = text
+        self._href = href
+
+    @property
+    def href(self):
+        """The href of the resource's ``self`` link, or ``None``.
+
+        It is read from the JSON text the first time it is needed. See
+        ``self_href``.
+
+        """
+        if self._href is None:
+            self._href = self_href(self.text)
+        return self._href
+
+    def url(self):
+        """Returns the href of the resource."""
+        return self.href
+
+    def as_object(self):
+        """Returns the value decoded from the JSON text."""
+        return jsonbackend.get_backend().loads(self.text)
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self._href)
+
+
+def self_href(text):
+    """Returns the href of the ``self`` link of the HAL resource in the JSON
+    text ``text``, or ``None`` if it has no ``self`` link.
+
+    If ``_links`` is the first member of the resource, as it is in the
+    output of ``Builder`` and of most HAL serializers, only ``_links`` is
+    decoded, and if the ``self`` link comes first, only its href. Otherwise
+    the whole text is decoded.
+
+    """
+    loads = jsonbackend.get_backend().loads
+    match = LEADING_SELF_HREF.match(text)
+    if match is not None:
+        return loads(match.group(1))
+
+    match = LEADING_LINKS.match(text)
+    if match is not None and match.end() < len(text):
+        # Imported here because dougrain.stream depends on dougrain.document.
+        from dougrain.stream import ValueScanner
+        end = ValueScanner(text, match.end()).scan(text)
+        if end is None:
+            raise ValueError("Unexpected end of JSON text")
+        links = loads(text[match.end():end])
+    else:
+        o = loads(text)
+        if not isinstance(o, dict):
+            raise ValueError("Expected a JSON object")
+        links = o.get(LINKS_KEY)
+
+    if not isinstance(links, dict):
+        return None
+    link = links.get('self')
+    if isinstance(link, list):
+        link = link[0] if link else None
+    if not isinstance(link, dict):
+        return None
+    return link.get('href')
+
+
+class Fragment(RawJSON):
+    """The serialized JSON text of a HAL resource, as kept by
+    ``FragmentCache``.
+
+    Public Instance Attributes:
+
+    - ``text``: ``str`` holding the JSON text of the resource.
+    - ``href``: the href of the resource's ``self`` link, used when a link
+                to the resource is added.
+
+    """
+
+    def __init__(self, text, href):
+        """``Fragment(text, href)``
+
+        ``text`` may be ``bytes`` holding UTF-8 encoded JSON, or a ``str``.
+        It must be a valid JSON object; it is not checked.
+
+        """
+        super(Fragment, self).__init__(text, href)
+
+
+class FragmentCache(object):
+    """Thread-safe LRU cache of ``Fragment`` objects, keyed by the URL and
+    version of the resource they hold.
+
+    For example, to embed the same author in many posts:
+
+    ``
+    author = fragments.fetch(author_url, author_etag,
+                             lambda: build_author(author_id))
+    post_builder.embed('author', author)
+    ``
+
+    Public Instance Attributes:
+
+    - ``cache``: the ``LRUCache`` holding the fragments, which counts hits,
+                 misses and evictions.
+
+    """
+
+    def __init__(self, capacity=1024, backend=None):
+        """``FragmentCache(capacity=1024, backend=None)``
+
+        Make a cache that holds at most ``capacity`` fragments. Resources
+        are serialized with the JSON backend called ``backend``, which
+        defaults to the default backend.
+
+        """
+        self.cache = LRUCache(capacity)
+        self.backend = backend
+
+    def get(self, url, version=None):
+        """Returns the ``Fragment`` for the given version of the resource at
+        ``url``, or ``None`` if it is not in the cache.
+
+        """
+        return self.cache.get((url, version))
+
+    def put(self, url, version, target):
+        """Serializes ``target`` and keeps it in the cache as the given
+        version of the resource at ``url``. Returns the new ``Fragment``.
+
+        ``target`` is a ``Builder`` or a ``dougrain.Document``.
+
+        """
+        fragment = Fragment(target.dumps(backend=self.backend),
+                            target.url() or url)
+        self.cache[(url, version)] = fragment
+        return fragment
+
+    def fetch(self, url, version, build):
+        """Returns the ``Fragment`` for the given version of the resource at
+        ``url``. If it is not in the cache, ``build`` is called with no
+        arguments to make a ``Builder`` or ``dougrain.Document`` for the
+        resource, which is serialized and kept in the cache.
+
+        """
+        fragment = self.get(url, version)
+        if fragment is None:
+            fragment = self.put(url, version, build())
+        return fragment
+
+    def discard(self, url, version=None):
+        """Removes the given version of the resource at ``url`` from the
+        cache, if it is there.
+
+        """
+        try:
+            del self.cache[(url, version)]
+        except KeyError:
+            pass
+
+    def hit_rate(self):
+        """Returns the fraction of lookups that found a fragment."""
+        return self.cache.hit_rate()
+
+    def stats(self):
+        """Returns a ``dict`` of the cache's counters. See
+        ``LRUCache.stats``.
+
+        """
+        return self.cache.stats()
+
+    def __len__(self):
+        return len(self.cache)
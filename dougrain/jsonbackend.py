@@ -0,0 +1,155 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Encoding and decoding JSON text.
+
+``Document.from_json``, ``Document.dumps`` and ``Builder.dumps`` use the
+backends in this module. A backend wraps one JSON library: ``orjson`` or
+``ujson`` if they are installed, or the standard library's ``json``, which is
+always available.
+
+Calling code is expected to use the following members:
+
+    - ``get_backend(name=None)``: returns the backend called ``name``, or the
+      default backend.
+    - ``set_default_backend(name)``: selects the default backend.
+    - ``available_backends()``: returns the names of the installed backends.
+
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class Backend(object):
+    """A JSON library.
+
+    Public Instance Attributes:
+
+    - ``name``: the name of the backend, which is the name of the library.
+
+    """
+    name = None
+
+    def loads(self, data):
+        """Returns the object decoded from ``data``, which may be ``bytes``
+        holding UTF-8 encoded JSON or a ``str``.
+
+        """
+        raise NotImplementedError()
+
+    def dumps(self, o, default=None):
+        """Returns ``o`` encoded as compact JSON text in a ``str``.
+
+        ``default`` is an optional function that is called with objects that
+        the backend cannot encode. It should return an object that the
+        backend can encode, or raise ``TypeError``.
+
+        """
+        raise NotImplementedError()
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.name)
+
+
+class StandardBackend(Backend):
+    """Backend for the standard library's ``json`` module."""
+    name = 'json'
+
+    def loads(self, data):
+        if isinstance(data, bytes) and bytes is not str:
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def dumps(self, o, default=None):
+        return json.dumps(o, default=default, ensure_ascii=False,
+                          separators=(',', ':'))
+
+
+class OrjsonBackend(Backend):
+    """Backend for ``orjson``."""
+    name = 'orjson'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, o, default=None):
+        return orjson.dumps(o, default=default).decode('utf-8')
+
+
+class UjsonBackend(Backend):
+    """Backend for ``ujson``."""
+    name = 'ujson'
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+    def dumps(self, o, default=None):
+        kwargs = dict(ensure_ascii=False, escape_forward_slashes=False)
+        if default is not None:
+            kwargs['default'] = default
+        return ujson.dumps(o, **kwargs)
+
+
+BACKENDS = {'json': StandardBackend()}
+if ujson is not None:
+    BACKENDS['ujson'] = UjsonBackend()
+if orjson is not None:
+    BACKENDS['orjson'] = OrjsonBackend()
+
+# Backends in order of preference, fastest first.
+PREFERENCE = ('orjson', 'ujson', 'json')
+
+_default = [name for name in PREFERENCE if name in BACKENDS][0]
+
+
+def available_backends():
+    """Returns a list of the names of the installed backends, fastest
+    first.
+
+    """
+    return [name for name in PREFERENCE if name in BACKENDS]
+
+
+def get_backend(name=None):
+    """Returns a ``Backend``.
+
+    Arguments:
+
+    - ``name``: the name of the backend (``'orjson'``, ``'ujson'`` or
+                ``'json'``). Defaults to the default backend, which is the
+                fastest installed backend unless ``set_default_backend`` has
+                been called. A ``Backend`` instance is returned as it is.
+
+    Raises ``ValueError`` if the backend is unknown or not installed.
+
+    """
+    if isinstance(name, Backend):
+        return name
+
+    if name is None:
+        name = _default
+
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError("JSON backend %r is not available" % (name,))
+
+
+def set_default_backend(name):
+    """Selects the backend used when no backend is given.
+
+    Raises ``ValueError`` if the backend is unknown or not installed.
+
+    """
+    global _default
+    _default = get_backend(name).name
@@ -1,27 +1,39 @@
 # Copyright (c) 2013 Will Harris
 # See the file license.txt for copying permission.
 
-import re
-import uritemplate
-
 try:
     from urllib import parse as urlparse
 except ImportError:
     import urlparse
 
+from dougrain.template import compile_template
+
 
 def extract_variables(href):
-    """Return a list of variable names used in a URI template."""
+    """Return a list of variable names used in a URI template.
+
+    The template is scanned once from left to right, so the time taken is
+    linear in the length of ``href``, and the parsed template is cached by
+    ``href``.
+
+    """
+    return list(compile_template(href).variables)
+
+
+def optional_attribute(name, doc):
+    """Returns a property that reads ``name`` from a link's JSON object.
 
-    patterns = [re.sub(r'\*|:\d+', '', pattern)
-                for pattern in re.findall(r'{[\+#\./;\?&]?([^}]+)*}', href)]
-    variables = []
-    for pattern in patterns:
-        for part in pattern.split(","):
-            if not part in variables:
-                variables.append(part)
+    The property raises ``AttributeError`` if the JSON object has no such
+    member, so ``hasattr`` can be used to test for it.
 
-    return variables
+    """
+    def get(self):
+        try:
+            return self.o[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    return property(get, doc=doc)
 
 
 class Link(object):
@@ -52,41 +64,76 @@ class Link(object):
     - ``variables``: ``list`` of names of template variables that may be
                      expanded for templated links. Empty if there are no
                      template variables.
+    - ``template``: ``str`` containing the href resolved against the base
+                    URI. It is resolved the first time it is read.
+
+    The optional attributes are read from the JSON object when they are
+    accessed rather than copied into the ``Link``, and ``Link`` uses
+    ``__slots__``, so that large numbers of links take little memory.
+
+    Links are hashable, so they can be kept in sets and used as dictionary
+    keys. The hash is computed from the canonical JSON text of the link the
+    first time it is needed, so the JSON object should not be changed after
+    that.
 
     """
+    __slots__ = ('o', 'href', 'is_templated', 'base_uri', '_template',
+                 '_variables', '_compiled_template', '_hash')
+
+    name = optional_attribute('name', "The name of the link.")
+    title = optional_attribute('title', "The title of the link.")
+    type = optional_attribute('type', "The type of the link.")
+    profile = optional_attribute('profile', "The profile of the link.")
+    hreflang = optional_attribute('hreflang',
+                                  "The language of the link's target.")
+    deprecation = optional_attribute('deprecation',
+                                     "The deprecation URL of the link.")
+
     def __init__(self, json_object, base_uri):
         self.o = json_object
         self.href = json_object['href']
+        self.is_templated = json_object.get('templated', False) is True
+        self.base_uri = base_uri
+        self._template = None
+        self._variables = None
+        self._compiled_template = None
+        self._hash = None
+
+    @property
+    def template(self):
+        """The href of the link resolved against the base URI."""
+        if self._template is None:
+            if self.base_uri is None:
+                self._template = self.href
+            else:
+                self._template = urlparse.urljoin(self.base_uri, self.href)
+        return self._template
+
+    @property
+    def variables(self):
+        """``list`` of names of template variables, found the first time it
+        is read.
 
-        if 'name' in json_object:
-            self.name = json_object['name']
-
-        if 'title' in json_object:
-            self.title = json_object['title']
-
-        if 'type' in json_object:
-            self.type = json_object['type']
-
-        if 'profile' in json_object:
-            self.profile = json_object['profile']
-
-        if 'hreflang' in json_object:
-            self.hreflang = json_object['hreflang']
+        """
+        if self._variables is None:
+            if self.is_templated:
+                self._variables = extract_variables(self.href)
+            else:
+                self._variables = []
+        return self._variables
 
-        if 'deprecation' in json_object:
-            self.deprecation = json_object['deprecation']
+    @property
+    def compiled_template(self):
+        """The compiled form of ``template``.
 
-        self.is_templated = self.o.get('templated', False) is True
+        The template is compiled the first time it is needed, and the
+        compiled template is shared with other links that have the same
+        template.
 
-        if self.is_templated:
-            self.variables = extract_variables(self.href)
-        else:
-            self.variables = []
-
-        if base_uri is None:
-            self.template = self.href
-        else:
-            self.template = urlparse.urljoin(base_uri, self.href)
+        """
+        if self._compiled_template is None:
+            self._compiled_template = compile_template(self.template)
+        return self._compiled_template
 
     def url(self, **kwargs):
         """Returns a URL for the link with optional template expansion.
@@ -99,10 +146,26 @@ class Link(object):
 
         """
         if self.is_templated:
-            return uritemplate.expand(self.template, kwargs)
+            return self.compiled_template.expand(kwargs)
         else:
             return self.template
 
+    def urls(self, variables):
+        """Returns a list of URLs for the link, one for each set of template
+        variables.
+
+        ``variables`` is an iterable of dictionaries. Each dictionary is used
+        to expand the link as if its items had been passed as keyword
+        arguments to ``url``. The template is compiled once for the whole
+        batch.
+
+        """
+        if not self.is_templated:
+            return [self.template for _ in variables]
+
+        expand = self.compiled_template.expand
+        return [expand(item) for item in variables]
+
     def as_object(self):
         """Returns a dictionary representing the HAL JSON link."""
         return self.o
@@ -145,5 +208,26 @@ class Link(object):
             return "<Link %r>" % self.template
 
     def __eq__(self, other):
-        return (isinstance(other, Link) and
-                self.as_object() == other.as_object())
+        if not isinstance(other, Link):
+            return False
+        # Hashes that have already been computed reject most unequal links
+        # cheaply.
+        if (self._hash is not None and other._hash is not None and
+                self._hash != other._hash):
+            return False
+        return self.as_object() == other.as_object()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self._hash is None:
+            try:
+                # Equal values hash equally, even ``1`` and ``1.0``, so this
+                # is consistent with comparing the objects.
+                self._hash = hash(frozenset(self.o.items()))
+            except TypeError:
+                # Some values, such as lists, cannot be hashed. Equal links
+                # still have equal hrefs.
+                self._hash = hash(self.o.get('href'))
+        return self._hash
@@ -0,0 +1,168 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Merkle fingerprints of HAL documents.
+
+A document's fingerprint is a Merkle digest: it is the digest of the
+digests of the document's properties, its links and its embedded resources,
+and the digest of the embedded resources is made from the fingerprints of
+the resources. When part of a document changes, only the digests along the
+path from that part to the root have to be computed again.
+
+Digests are SHA-256 hex digests of canonical JSON text, with sorted keys
+and no insignificant whitespace, so a fingerprint does not depend on the
+order of keys or on the JSON backend in use.
+
+Calling code is expected to use the following members:
+
+    - ``part_digests(o, table)``: returns the digests of the parts of the
+      JSON object of a document.
+    - ``combine(properties, links, embedded)``: returns a fingerprint made
+      from the digests of the parts of a document.
+    - ``resource_digest(o, table)``: returns the fingerprint of the JSON
+      object of a document.
+    - ``cached(table, o)``: returns a fingerprint that has already been
+      computed, or ``None``.
+    - ``live_table(table, o)``: returns the entries of a table for the
+      resources still embedded in a document.
+
+"""
+
+import hashlib
+import json
+
+from dougrain.drafts import LINKS_KEY
+from dougrain.drafts import EMBEDDED_KEY
+
+
+# One encoder is shared, rather than making one for each call to
+# ``json.dumps``.
+ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+
+def digest(value):
+    """Returns the digest of the canonical JSON text of ``value``."""
+    return hashlib.sha256(ENCODER.encode(value).encode('utf-8')).hexdigest()
+
+
+# The number of entries a table may hold beyond twice its live entries
+# before it is replaced by them; see ``live_table``.
+TABLE_SLACK = 64
+
+# The digest of a missing ``_links`` or ``_embedded`` object.
+NONE_DIGEST = digest(None)
+
+
+def properties_digest(o):
+    """Returns the digest of the properties of the document ``o``."""
+    return digest(dict((key, value) for key, value in o.items()
+                       if key not in (LINKS_KEY, EMBEDDED_KEY)))
+
+
+def links_digest(o):
+    """Returns the digest of the ``_links`` object of the document ``o``,
+    or of ``None`` if it has none.
+
+    """
+    links = o.get(LINKS_KEY)
+    if links is None:
+        return NONE_DIGEST
+    return digest(links)
+
+
+def embedded_digest(o, table):
+    """Returns the digest of the ``_embedded`` object of the document ``o``,
+    or of ``None`` if it has none, made from the fingerprints of the
+    embedded resources. See ``resource_digest`` for ``table``.
+
+    """
+    embedded = o.get(EMBEDDED_KEY)
+    if embedded is None:
+        return NONE_DIGEST
+
+    rels = {}
+    for rel, value in embedded.items():
+        if isinstance(value, list):
+            rels[rel] = [resource_digest(item, table) for item in value]
+        else:
+            rels[rel] = resource_digest(value, table)
+    return digest(rels)
+
+
+def part_digests(o, table):
+    """Returns a tuple of the digests of the properties, the links and the
+    embedded resources of the document ``o``.
+
+    """
+    return (properties_digest(o), links_digest(o), embedded_digest(o, table))
+
+
+def combine(properties, links, embedded):
+    """Returns the fingerprint of a document from the digests of its
+    parts.
+
+    """
+    # The digests have a fixed length, so they can simply be joined.
+    text = properties + links + embedded
+    return hashlib.sha256(text.encode('ascii')).hexdigest()
+
+
+def resource_digest(o, table):
+    """Returns the fingerprint of the document ``o``.
+
+    ``table`` is a ``dict`` that holds the fingerprints of JSON objects that
+    have already been computed, keyed by ``id``. Each entry holds the object
+    as well as its fingerprint, so an entry is never used for a different
+    object that reuses the ``id`` of one that has been discarded. Calling
+    code must remove the entry for an object when the object changes.
+
+    """
+    fingerprint = cached(table, o)
+    if fingerprint is not None:
+        return fingerprint
+
+    fingerprint = combine(*part_digests(o, table))
+    table[id(o)] = (o, fingerprint)
+    return fingerprint
+
+
+def cached(table, o):
+    """Returns the fingerprint of the document ``o`` held in ``table``, or
+    ``None`` if it has not been computed.
+
+    """
+    entry = table.get(id(o))
+    if entry is not None and entry[0] is o:
+        return entry[1]
+    return None
+
+
+def live_table(table, o):
+    """Returns a new table holding only the entries of ``table`` for the
+    resources embedded in the document ``o`` at any depth.
+
+    Entries for resources that have been removed from ``o`` keep their JSON
+    objects alive, so a table that is kept for a long time should be
+    replaced by its live entries from time to time.
+
+    """
+    live = {}
+    stack = [o]
+    while stack:
+        for value in stack.pop().get(EMBEDDED_KEY, {}).values():
+            for item in value if isinstance(value, list) else [value]:
+                if not isinstance(item, dict):
+                    continue
+                entry = table.get(id(item))
+                if entry is not None and entry[0] is item:
+                    live[id(item)] = entry
+                stack.append(item)
+    return live
+
+
+def discard(table, objects):
+    """Removes the entries for ``objects`` from ``table``."""
+    for o in objects:
+        entry = table.get(id(o))
+        if entry is not None and entry[0] is o:
+            table.pop(id(o), None)
@@ -0,0 +1,511 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Diffing and patching HAL documents with JSON Patch (RFC 6902).
+
+``Document.diff`` and ``Document.apply_patch`` use this module. The diff
+knows about HAL:
+
+    - A link relationship type, or an embedded relationship type, holding a
+      single object is the same as one holding an array with just that
+      object, so changing one into the other is not a difference.
+    - The items of a link array are matched by their ``href``, and the
+      items of an embedded array by the ``href`` of their ``self`` link. A
+      reordered array is patched with the fewest ``move`` operations, using
+      a longest increasing subsequence of the items that stay in place.
+
+Other arrays are compared position by position.
+
+Calling code is expected to use the following members:
+
+    - ``diff(a, b)``: returns the operations that turn the document ``a``
+      into ``b``.
+    - ``apply(o, operations)``: returns a patched copy of ``o``.
+
+"""
+
+from bisect import bisect_left
+
+from dougrain.drafts import LINKS_KEY
+from dougrain.drafts import EMBEDDED_KEY
+
+# If more than this fraction of a keyed array would have to be moved, the
+# array is replaced instead.
+MOVE_LIMIT = 0.5
+
+
+def escape(token):
+    """Returns ``token`` escaped for use in a JSON Pointer."""
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def unescape(token):
+    """Returns the JSON Pointer token ``token`` unescaped."""
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def pointer(path):
+    """Returns the JSON Pointer for ``path``, a tuple of member names and
+    array indexes.
+
+    Paths are kept as tuples while diffing, and only made into pointers for
+    the operations that are returned.
+
+    """
+    return ''.join('/%d' % token if isinstance(token, int)
+                   else '/' + escape(token)
+                   for token in path)
+
+
+def same(a, b):
+    """Returns ``True`` if the JSON values ``a`` and ``b`` are equal.
+
+    Unlike ``==``, ``True`` is not equal to ``1``.
+
+    """
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a is b
+    return a == b
+
+
+def never_equal(a, b):
+    return False
+
+
+def diff(a, b, equal=never_equal):
+    """Returns a list of JSON Patch operations that turn the JSON object of
+    the HAL document ``a`` into ``b``.
+
+    Arguments:
+
+    - ``a``: the JSON object of the original document.
+    - ``b``: the JSON object of the changed document.
+    - ``equal``: optional function that is called with two embedded
+      resources and returns ``True`` if they are known to be equal, so that
+      they need not be compared. ``Document.diff`` uses fingerprints.
+
+    """
+    operations = []
+    diff_document(a, b, (), operations, equal)
+    return operations
+
+
+def diff_document(a, b, path, operations, equal):
+    if a is b or equal(a, b):
+        return
+
+    for key in a:
+        if key not in b:
+            operations.append({'op': 'remove', 'path': pointer(path + (key,))})
+
+    for key, value in b.items():
+        key_path = path + (key,)
+        if key not in a:
+            operations.append({'op': 'add', 'path': pointer(key_path),
+                               'value': value})
+        elif key in (LINKS_KEY, EMBEDDED_KEY) and isinstance(value, dict) \
+                and isinstance(a[key], dict):
+            diff_rels(a[key], value, key_path, key == EMBEDDED_KEY,
+                      operations, equal)
+        else:
+            diff_value(a[key], value, key_path, operations)
+
+
+def diff_rels(a, b, path, embedded, operations, equal):
+    for rel in a:
+        if rel not in b:
+            operations.append({'op': 'remove', 'path': pointer(path + (rel,))})
+
+    for rel, value in b.items():
+        rel_path = path + (rel,)
+        if rel not in a:
+            operations.append({'op': 'add', 'path': pointer(rel_path),
+                               'value': value})
+            continue
+
+        old = a[rel]
+        if isinstance(old, list) and isinstance(value, list):
+            diff_items(old, value, rel_path, embedded, operations, equal)
+        elif isinstance(old, list):
+            # A single object is the same as an array holding only it.
+            diff_items(old, [value], rel_path, embedded, operations, equal)
+        elif isinstance(value, list):
+            if len(value) == 1:
+                diff_item(old, value[0], rel_path, embedded, operations,
+                          equal)
+            else:
+                # Wrap the single object in an array, then patch the array.
+                operations.append({'op': 'replace', 'path': pointer(rel_path),
+                                   'value': [old]})
+                diff_items([old], value, rel_path, embedded, operations,
+                           equal)
+        else:
+            diff_item(old, value, rel_path, embedded, operations, equal)
+
+
+def diff_item(a, b, path, embedded, operations, equal):
+    if embedded and isinstance(a, dict) and isinstance(b, dict):
+        diff_document(a, b, path, operations, equal)
+    else:
+        diff_value(a, b, path, operations)
+
+
+def item_key(item, embedded):
+    """Returns the key by which an item of a link or embedded array is
+    matched, or ``None`` if it has none.
+
+    """
+    if not isinstance(item, dict):
+        return None
+    if not embedded:
+        return item.get('href')
+
+    self_link = item.get(LINKS_KEY, {}).get('self')
+    if isinstance(self_link, list):
+        self_link = self_link[0] if self_link else None
+    if not isinstance(self_link, dict):
+        return None
+    return self_link.get('href')
+
+
+def keys_of(items, embedded):
+    """Returns the keys of ``items``, or ``None`` unless every item has a
+    key and no two items have the same one.
+
+    """
+    keys = [item_key(item, embedded) for item in items]
+    if None in keys or len(set(keys)) != len(keys):
+        return None
+    return keys
+
+
+def increasing_subsequence(values):
+    """Returns the indexes in ``values`` of a longest strictly increasing
+    subsequence of ``values``.
+
+    """
+    tails = []
+    tail_indexes = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        position = bisect_left(tails, value)
+        if position > 0:
+            previous[i] = tail_indexes[position - 1]
+        if position == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[position] = value
+            tail_indexes[position] = i
+
+    result = []
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
+
+
+class SlotCounts(object):
+    """Counts the occupied slots of an array of ``size`` slots, so that the
+    number of occupied slots before a slot is found in logarithmic time (a
+    Fenwick tree).
+
+    """
+
+    def __init__(self, size):
+        self.tree = [0] * (size + 1)
+
+    def add(self, slot, count):
+        """Adds ``count`` to the occupancy of ``slot``."""
+        i = slot + 1
+        while i < len(self.tree):
+            self.tree[i] += count
+            i += i & -i
+
+    def before(self, slot):
+        """Returns the number of occupied slots before ``slot``."""
+        total = 0
+        i = slot
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+def diff_items(a, b, path, embedded, operations, equal):
+    """Adds the operations that turn the link or embedded array ``a`` into
+    ``b``, matching items by key if they all have one.
+
+    """
+    a_keys = keys_of(a, embedded)
+    b_keys = keys_of(b, embedded)
+    if a_keys is None or b_keys is None:
+        diff_positions(a, b, path, operations,
+                       lambda x, y, item_path, ops:
+                       diff_item(x, y, item_path, embedded, ops, equal))
+        return
+
+    b_index = dict((key, i) for i, key in enumerate(b_keys))
+    old_items = dict(zip(a_keys, a))
+
+    # Remove the items that are not in ``b``, from the end.
+    for i in range(len(a_keys) - 1, -1, -1):
+        if a_keys[i] not in b_index:
+            operations.append({'op': 'remove', 'path': pointer(path + (i,))})
+    current = [key for key in a_keys if key in b_index]
+
+    # The kept items, in the order they have in ``b``.
+    target = [key for key in b_keys if key in old_items]
+    stay = increasing_subsequence([b_index[key] for key in current])
+    moves = len(current) - len(stay)
+    if moves and moves > MOVE_LIMIT * len(current):
+        operations.append({'op': 'replace', 'path': pointer(path),
+                           'value': b})
+        return
+
+    # Each item that moves is put just after the item before it in
+    # ``target``, in the order of ``target``, so the items already in
+    # place stay in order. The moved items that follow one staying item
+    # (or the start of the array) form a run in ``target`` order, so the
+    # place of each item is known before anything moves: a slot in an
+    # ordering of the kept items' old places and the runs after them.
+    staying = set(current[i] for i in stay)
+    old_slot = dict((key, (i, 0)) for i, key in enumerate(current))
+    run_of = {}
+    run_lengths = {}
+    placed = []
+    for t, key in enumerate(target):
+        if key in staying:
+            continue
+        if t == 0:
+            run = -1
+        elif target[t - 1] in staying:
+            run = old_slot[target[t - 1]][0]
+        else:
+            run = run_of[target[t - 1]]
+        run_of[key] = run
+        run_lengths[run] = run_lengths.get(run, 0) + 1
+        placed.append((key, (run, run_lengths[run])))
+
+    slots = sorted(list(old_slot.values()) + [slot for _, slot in placed])
+    slot_index = dict((slot, i) for i, slot in enumerate(slots))
+    occupied = SlotCounts(len(slots))
+    for slot in old_slot.values():
+        occupied.add(slot_index[slot], 1)
+
+    for key, slot in placed:
+        i = slot_index[old_slot[key]]
+        j = occupied.before(i)
+        occupied.add(i, -1)
+        i = slot_index[slot]
+        k = occupied.before(i)
+        occupied.add(i, 1)
+        operations.append({'op': 'move', 'from': pointer(path + (j,)),
+                           'path': pointer(path + (k,))})
+
+    for i, key in enumerate(target):
+        diff_item(old_items[key], b[b_index[key]], path + (i,),
+                  embedded, operations, equal)
+
+    for i, key in enumerate(b_keys):
+        if key not in old_items:
+            operations.append({'op': 'add', 'path': pointer(path + (i,)),
+                               'value': b[i]})
+
+
+def diff_positions(a, b, path, operations, diff_pair):
+    """Adds the operations that turn the array ``a`` into ``b``, comparing
+    the items at the same positions with ``diff_pair``.
+
+    """
+    common = min(len(a), len(b))
+    for i in range(common):
+        diff_pair(a[i], b[i], path + (i,), operations)
+    for i in range(len(a) - 1, common - 1, -1):
+        operations.append({'op': 'remove', 'path': pointer(path + (i,))})
+    for i in range(common, len(b)):
+        operations.append({'op': 'add', 'path': pointer(path + (i,)),
+                           'value': b[i]})
+
+
+def diff_value(a, b, path, operations):
+    """Adds the operations that turn the JSON value ``a`` into ``b``."""
+    if a is b:
+        return
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in a:
+            if key not in b:
+                operations.append({'op': 'remove',
+                                   'path': pointer(path + (key,))})
+        for key, value in b.items():
+            if key in a:
+                diff_value(a[key], value, path + (key,), operations)
+            else:
+                operations.append({'op': 'add',
+                                   'path': pointer(path + (key,)),
+                                   'value': value})
+    elif isinstance(a, list) and isinstance(b, list):
+        diff_positions(a, b, path, operations, diff_value)
+    elif not same(a, b):
+        operations.append({'op': 'replace', 'path': pointer(path),
+                           'value': b})
+
+
+class Patcher(object):
+    """Applies JSON Patch operations to a copy of a JSON value.
+
+    Only the containers on the paths of the operations are copied, each at
+    most once; the rest of the copy is shared with the original.
+
+    """
+
+    def __init__(self, o):
+        self.copied = {}
+        self.root = self.own(o)
+
+    def own(self, container):
+        if self.copied.get(id(container)) is container:
+            return container
+        if isinstance(container, dict):
+            container = dict(container)
+        elif isinstance(container, list):
+            container = list(container)
+        else:
+            return container
+        self.copied[id(container)] = container
+        return container
+
+    def parent(self, path):
+        """Returns the container holding the value at the JSON Pointer
+        ``path``, copied, and the last token of ``path``.
+
+        """
+        if not path.startswith('/'):
+            raise ValueError("Invalid JSON Pointer %r" % (path,))
+        tokens = [unescape(token) for token in path[1:].split('/')]
+        node = self.root
+        for token in tokens[:-1]:
+            index = self.index(node, token)
+            child = self.own(node[index])
+            node[index] = child
+            node = child
+        return node, tokens[-1]
+
+    def index(self, node, token, adding=False):
+        if isinstance(node, dict):
+            if not adding and token not in node:
+                raise ValueError("No member %r" % (token,))
+            return token
+        if not isinstance(node, list):
+            raise ValueError("Cannot index %r" % (node,))
+        if adding and token == '-':
+            return len(node)
+        if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+            raise ValueError("Invalid array index %r" % (token,))
+        index = int(token)
+        if index > len(node) or (not adding and index == len(node)):
+            raise ValueError("Array index %r out of range" % (token,))
+        return index
+
+    def get(self, path):
+        if path == '':
+            return self.root
+        node, token = self.parent(path)
+        return node[self.index(node, token)]
+
+    def add(self, path, value):
+        if path == '':
+            self.root = value
+            return
+        node, token = self.parent(path)
+        index = self.index(node, token, adding=True)
+        if isinstance(node, list):
+            node.insert(index, value)
+        else:
+            node[index] = value
+
+    def remove(self, path):
+        if path == '':
+            raise ValueError("Cannot remove the whole document")
+        node, token = self.parent(path)
+        value = node[self.index(node, token)]
+        del node[self.index(node, token)]
+        return value
+
+    def apply(self, operation):
+        op = operation.get('op')
+        path = operation.get('path')
+        if path is None:
+            raise ValueError("Operation has no path: %r" % (operation,))
+
+        if op == 'add':
+            self.add(path, operation['value'])
+        elif op == 'remove':
+            self.remove(path)
+        elif op == 'replace':
+            self.get(path)
+            if path == '':
+                self.root = operation['value']
+            else:
+                self.remove(path)
+                self.add(path, operation['value'])
+        elif op == 'move':
+            source = operation['from']
+            if path != source and path.startswith(source + '/'):
+                raise ValueError("Cannot move %r into itself" % (source,))
+            self.add(path, self.remove(source))
+        elif op == 'copy':
+            self.add(path, copy_json(self.get(operation['from'])))
+        elif op == 'test':
+            if not same_json(self.get(path), operation['value']):
+                raise ValueError("Test failed at %r" % (path,))
+        else:
+            raise ValueError("Unknown operation %r" % (op,))
+
+
+def copy_json(value):
+    """Returns a copy of the JSON value ``value`` that shares no
+    containers with it.
+
+    """
+    if isinstance(value, dict):
+        return dict((key, copy_json(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [copy_json(item) for item in value]
+    return value
+
+
+def same_json(a, b):
+    """Returns ``True`` if the JSON values ``a`` and ``b`` are equal,
+    comparing containers item by item with ``same``.
+
+    """
+    if isinstance(a, dict) and isinstance(b, dict):
+        return (len(a) == len(b) and
+                all(key in b and same_json(value, b[key])
+                    for key, value in a.items()))
+    if isinstance(a, list) and isinstance(b, list):
+        return (len(a) == len(b) and
+                all(same_json(x, y) for x, y in zip(a, b)))
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return False
+    return same(a, b)
+
+
+def apply(o, operations):
+    """Returns a copy of the JSON value ``o`` with the JSON Patch
+    ``operations`` applied. ``o`` is not changed.
+
+    Raises ``ValueError`` if an operation is malformed, refers to a value
+    that does not exist, or is a ``test`` that fails.
+
+    """
+    patcher = Patcher(o)
+    for operation in operations:
+        try:
+            patcher.apply(operation)
+        except KeyError as e:
+            raise ValueError("Operation %r is missing %s" % (operation, e))
+    return patcher.root
@@ -0,0 +1,288 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Compiled path queries across the links and embedded resources of HAL
+documents.
+
+A path is a ``/``-separated list of steps. A step is either a link
+relationship type, which selects embedded resources, or a link relationship
+type prefixed with ``@``, which selects links. A step can be followed by a
+selector: ``*`` selects every item, which is also what happens when there is
+no selector, and an array index such as ``0`` selects only that item. A
+single resource or link is treated as an array holding only it.
+
+For example, ``"ea:order/*/ea:customer/@self"`` selects the ``self`` link of
+the customer embedded in every order embedded in a document.
+
+``/`` and ``~`` are written as ``~1`` and ``~0`` in link relationship types,
+as they are in JSON Pointers, so ``"http:~1~1example.com~1rels~1order"``
+selects the ``http://example.com/rels/order`` resources.
+
+Calling code is expected to use ``compile_path(path)``, which returns a
+callable ``Path``.
+
+"""
+
+from dougrain.document import Document
+from dougrain.document import LazySequence
+from dougrain.document import canonical_key
+from dougrain.drafts import LINKS_KEY
+from dougrain.drafts import EMBEDDED_KEY
+from dougrain.link import Link
+from dougrain.patch import unescape
+
+# The number of canonical keys each step remembers before it forgets them
+# all and starts again.
+CANONICAL_KEYS_LEN_LIMIT = 32
+
+_MISSING = object()
+
+
+class Step(object):
+    """A step of a ``Path``, selecting the embedded resources or the links
+    for one link relationship type.
+
+    The canonical key for the link relationship type depends only on the
+    CURIE its prefix names, or for a relative URI reference on the base URI,
+    so it is computed once for each of those and remembered. The memo is a
+    plain ``dict``: if two threads compute the same key at once, one result
+    is simply thrown away.
+
+    """
+
+    def __init__(self, rel, embedded, index=None):
+        """Create a ``Step``.
+
+        Arguments:
+
+        - ``rel``:      the link relationship type, as it is written in the
+                        path.
+        - ``embedded``: ``True`` to select embedded resources, ``False`` to
+                        select links.
+        - ``index``:    the index of the only item to select, or ``None`` to
+                        select every item.
+
+        """
+        self.rel = rel
+        self.embedded = embedded
+        self.index = index
+        self.relative = rel.startswith('/')
+        self.prefix = None
+        if not self.relative and ':' in rel:
+            self.prefix = rel.split(':', 1)[0]
+        self.canonical_keys = {}
+
+    def canonical_key(self, curies, base_uri):
+        """Returns the canonical key of the step's link relationship type
+        for a document with the ``CurieCollection`` ``curies`` and the base
+        URI ``base_uri``.
+
+        """
+        if self.relative:
+            memo_key = base_uri
+        elif self.prefix is not None:
+            template = curies.get(self.prefix)
+            memo_key = template.template if template is not None else None
+        else:
+            return self.rel
+
+        key = self.canonical_keys.get(memo_key, _MISSING)
+        if key is _MISSING:
+            key = canonical_key(self.rel, curies, base_uri)
+            if len(self.canonical_keys) >= CANONICAL_KEYS_LEN_LIMIT:
+                self.canonical_keys = {}
+            self.canonical_keys[memo_key] = key
+        return key
+
+    def document_key(self, document):
+        """Returns the canonical key of the step's link relationship type in
+        ``document``.
+
+        """
+        if self.relative or self.prefix is not None:
+            return self.canonical_key(document.curies, document.base_uri)
+        return self.rel
+
+    def select(self, document):
+        """Returns the items of ``document`` that the step selects.
+
+        If ``document`` has already built its ``embedded`` or ``links``,
+        the items are read from them. Otherwise the keys are matched in the
+        document's JSON object, so no other key is canonicalized, and only
+        the selected items are built.
+
+        """
+        if self.embedded:
+            rels = document._embedded_cache
+        else:
+            rels = document._links_cache
+
+        if rels is None:
+            objects = self.pick(self.objects(document))
+            if self.embedded:
+                return LazySequence(objects, document._embedded_document)
+            return [Link(o, document.base_uri) for o in objects]
+
+        try:
+            value = rels.canonical_value(self.document_key(document))
+        except KeyError:
+            return ()
+        if isinstance(value, (Document, Link)):
+            value = (value,)
+        return self.pick(value)
+
+    def objects(self, document):
+        """Returns a ``list`` of the JSON objects of the items of
+        ``document`` for the step's link relationship type, in the order
+        ``embedded`` or ``links`` would present them.
+
+        """
+        rels = document.o.get(EMBEDDED_KEY if self.embedded else LINKS_KEY)
+        if not rels:
+            return []
+
+        curies_rel = None if self.embedded else document.draft.curies_rel
+        key = None
+        objects = []
+        for original_key, value in rels.items():
+            if original_key == curies_rel:
+                continue
+            if original_key != self.rel:
+                # Only CURIEs and relative URI references can expand to
+                # another key.
+                if ':' in original_key or original_key.startswith('/'):
+                    other_key = canonical_key(original_key, document.curies,
+                                              document.base_uri)
+                else:
+                    other_key = original_key
+                if key is None:
+                    key = self.document_key(document)
+                if other_key != key:
+                    continue
+
+            if isinstance(value, list):
+                objects.extend(value)
+            else:
+                objects.append(value)
+        return objects
+
+    def pick(self, items):
+        """Returns the items the step's index selects from ``items``."""
+        if self.index is None:
+            return items
+        if self.index < len(items):
+            return (items[self.index],)
+        return ()
+
+    def __repr__(self):
+        rel = self.rel if self.embedded else '@' + self.rel
+        if self.index is None:
+            return rel
+        return '%s/%d' % (rel, self.index)
+
+
+class Path(object):
+    """A compiled path query.
+
+    Calling a ``Path`` with a ``Document``, or with a sequence of
+    documents, returns a generator of the embedded resources or links that
+    the path selects, in document order. The generator walks the documents
+    as it is iterated, so stopping early leaves the rest of the documents
+    untouched.
+
+    A ``Path`` can be shared between threads.
+
+    """
+
+    def __init__(self, path, steps):
+        self.path = path
+        self.steps = steps
+
+    def __call__(self, documents):
+        """Returns a generator of the matches for ``documents``.
+
+        Arguments:
+
+        - ``documents``: a ``Document``, or a sequence of ``Document``
+                         instances such as an item of ``embedded``.
+
+        """
+        if isinstance(documents, Document):
+            documents = (documents,)
+        return self._matches(documents)
+
+    def first(self, documents, default=None):
+        """Returns the first match for ``documents``, or ``default`` if
+        there is none.
+
+        """
+        for match in self(documents):
+            return match
+        return default
+
+    def _matches(self, documents):
+        # Walk the documents depth first, keeping an iterator over the
+        # documents selected at each step.
+        steps = self.steps
+        last = len(steps) - 1
+        iterators = [iter(documents)]
+        while iterators:
+            document = next(iterators[-1], _MISSING)
+            if document is _MISSING:
+                iterators.pop()
+                continue
+
+            matches = steps[len(iterators) - 1].select(document)
+            if len(iterators) - 1 == last:
+                for match in matches:
+                    yield match
+            else:
+                iterators.append(iter(matches))
+
+    def __repr__(self):
+        return "compile_path(%r)" % (self.path,)
+
+
+def compile_path(path):
+    """Returns a ``Path`` that finds the resources and links selected by
+    the path query ``path``.
+
+    Raises ``ValueError`` if ``path`` is malformed. Selecting links with
+    ``@`` must be the last step, because links have no resources to step
+    into.
+
+    Arguments:
+
+    - ``path``: the path, such as ``"ea:order/*/ea:customer/@self"``.
+
+    """
+    tokens = path.split('/')
+    steps = []
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        position += 1
+        if token == '*' or token.isdigit():
+            raise ValueError("Selector %r must follow a link relationship "
+                             "type in path %r" % (token, path))
+        if steps and not steps[-1].embedded:
+            raise ValueError("Links have no steps after them in path %r" %
+                             (path,))
+
+        embedded = not token.startswith('@')
+        rel = unescape(token if embedded else token[1:])
+        if not rel:
+            raise ValueError("Empty step in path %r" % (path,))
+
+        index = None
+        if position < len(tokens):
+            selector = tokens[position]
+            if selector == '*':
+                position += 1
+            elif selector.isdigit():
+                index = int(selector)
+                position += 1
+
+        steps.append(Step(rel, embedded, index))
+
+    return Path(path, steps)
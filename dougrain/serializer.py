@@ -0,0 +1,407 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Serializing HAL documents in pieces.
+
+``Builder.embed_iter`` puts an ``EmbeddedStream`` in the document where the
+embedded resources would go, and ``iter_json`` reads the stream's iterable
+only while it writes those resources. Streams of a ``Builder`` that is
+embedded in another are left in place until the outer document is
+serialized. ``materialize`` replaces the streams with the resources they
+hold, for code that needs a plain JSON object.
+
+A property value may be a ``Deferred``, which is computed only if the
+property is written. Every serializer accepts a ``properties`` projection
+that names the properties to write.
+
+A property value or an embedded resource may be a ``RawJSON`` holding JSON
+text, which a ``Splicer`` writes into the output as it is.
+
+"""
+
+import re
+import uuid
+
+from dougrain.drafts import LINKS_KEY
+from dougrain.drafts import EMBEDDED_KEY
+from dougrain.fragment import RawJSON
+
+
+class Deferred(object):
+    """A property value that is computed when the document is serialized.
+
+    ``Deferred(fn)`` calls ``fn`` with no arguments the first time the value
+    is needed, and keeps the result. If the property is left out of the
+    serialized document by a ``properties`` projection, ``fn`` is never
+    called.
+
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.resolved = False
+        self.value = None
+
+    def resolve(self):
+        """Returns the value, calling ``fn`` if it has not been called."""
+        if not self.resolved:
+            self.value = self.fn()
+            self.resolved = True
+            self.fn = None
+        return self.value
+
+    def __repr__(self):
+        if self.resolved:
+            return "<Deferred %r>" % (self.value,)
+        return "<Deferred %r>" % (self.fn,)
+
+
+def default(obj):
+    """Resolves ``Deferred`` values for the JSON backends' ``default``
+    hook.
+
+    """
+    if isinstance(obj, Deferred):
+        return obj.resolve()
+    raise TypeError("%r is not JSON serializable" % (obj,))
+
+
+class Splicer(object):
+    """Writes ``RawJSON`` text into the output of a JSON backend.
+
+    The backend is given ``Splicer.default`` as its ``default`` hook, which
+    encodes each ``RawJSON`` as a marker string. ``splice`` then replaces
+    the markers with the fragments' text in one pass. Each ``Splicer`` uses
+    a random token in its markers, so they do not match any other string.
+
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.token = uuid.uuid4().hex
+        self.marker = '__dougrain_fragment_%s_%%d__' % self.token
+        self.pattern = re.compile('"__dougrain_fragment_%s_([0-9]+)__"' %
+                                  self.token)
+        self.fragments = []
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            self.fragments.append(obj.text)
+            return self.marker % (len(self.fragments) - 1)
+        return default(obj)
+
+    def replace(self, match):
+        return self.fragments[int(match.group(1))]
+
+    def dumps(self, o):
+        """Returns the JSON text of ``o`` with its fragments spliced in."""
+        text = self.backend.dumps(o, self.default)
+        if not self.fragments:
+            return text
+        text = self.pattern.sub(self.replace, text)
+        self.fragments = []
+        return text
+
+
+class EmbeddedStream(object):
+    """Placeholder for embedded resources that are read from an iterable
+    when the document is serialized.
+
+    Public Instance Attributes:
+
+    - ``iterable``: the iterable of ``Builder`` or ``Document`` objects to be
+                    embedded.
+    - ``links``: a ``LinkStream`` that collects a link to each resource, or
+                 ``None`` if the resources are not linked automatically.
+    - ``convert``: function that returns the JSON object, or the
+                   ``RawJSON``, to write for each resource.
+
+    """
+
+    def __init__(self, iterable, automatic_link=False, convert=None):
+        self.iterable = iterable
+        self.links = LinkStream() if automatic_link else None
+        self.convert = convert or (lambda target: target.as_object())
+        self.consumed = False
+
+    def __iter__(self):
+        """Yields the JSON object of each resource, and records a link to it
+        if the resources are linked automatically.
+
+        Raises ``ValueError`` if the stream has already been read.
+
+        """
+        if self.consumed:
+            raise ValueError("Embedded stream has already been serialized")
+        self.consumed = True
+
+        convert = self.convert
+        for target in self.iterable:
+            if self.links is not None:
+                self.links.append(target)
+            yield convert(target)
+
+
+class LinkStream(object):
+    """Placeholder for the links to the resources of an ``EmbeddedStream``.
+
+    The links are collected while the resources are serialized, so a
+    ``LinkStream`` must be serialized after its ``EmbeddedStream``.
+
+    """
+
+    def __init__(self):
+        self.links = []
+
+    def append(self, target):
+        self.links.append({'href': target.url()})
+
+    def __iter__(self):
+        return iter(self.links)
+
+
+def _streams(rels, kind):
+    """Returns ``True`` if any value in the ``rels`` dictionary holds a
+    placeholder of type ``kind``.
+
+    """
+    for value in rels.values():
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, kind):
+                    return True
+    return False
+
+
+def _resources(rels):
+    """Yields the JSON objects of the resources in the ``_embedded`` object
+    ``rels``, leaving out placeholders and ``RawJSON`` values.
+
+    """
+    for value in rels.values():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, dict):
+                yield item
+
+
+def has_streams(o):
+    """Returns ``True`` if the document ``o``, or a resource embedded in it
+    at any depth, holds embedded streams.
+
+    """
+    embedded = o.get(EMBEDDED_KEY, {})
+    if _streams(embedded, EmbeddedStream):
+        return True
+    for item in _resources(embedded):
+        if has_streams(item):
+            return True
+    return False
+
+
+def _expand(rels):
+    for rel, value in rels.items():
+        if isinstance(value, list):
+            expanded = []
+            for item in value:
+                if isinstance(item, (EmbeddedStream, LinkStream)):
+                    expanded.extend(item)
+                else:
+                    expanded.append(item)
+            rels[rel] = expanded
+
+
+def materialize(o):
+    """Replaces the placeholders in the document ``o``, and in the resources
+    embedded in it at any depth, with the embedded resources and links they
+    stand for, reading every embedded stream.
+
+    """
+    if not has_streams(o):
+        return
+    _expand(o[EMBEDDED_KEY])
+    _expand(o.get(LINKS_KEY, {}))
+    for item in _resources(o[EMBEDDED_KEY]):
+        materialize(item)
+
+
+def _replace(value, kind, convert):
+    """Returns ``value``, or ``convert(value)`` if it is an instance of
+    ``kind``, after replacing the instances of ``kind`` in the ``dict`` and
+    ``list`` containers it holds, at any depth, in place.
+
+    """
+    if isinstance(value, kind):
+        value = convert(value)
+    if isinstance(value, dict):
+        for key in list(value):
+            value[key] = _replace(value[key], kind, convert)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            value[index] = _replace(item, kind, convert)
+    return value
+
+
+def parse_fragments(o):
+    """Replaces the ``RawJSON`` values at any depth in the document ``o``,
+    including those in property values and embedded resources, with the
+    values they hold.
+
+    """
+    _replace(o, RawJSON, lambda raw: raw.as_object())
+
+
+def resolve(o):
+    """Replaces the ``Deferred`` values at any depth in the document ``o``,
+    including those in property values and embedded resources, with their
+    values.
+
+    """
+    _replace(o, Deferred, lambda deferred: deferred.resolve())
+
+
+def project(o, properties):
+    """Returns the document ``o`` without the properties that are not named
+    in ``properties``. ``o`` is returned as it is if ``properties`` is
+    ``None``.
+
+    """
+    if properties is None:
+        return o
+    return dict((key, value) for key, value in o.items()
+                if key in properties or key in (LINKS_KEY, EMBEDDED_KEY))
+
+
+def key_order(o, properties=None):
+    """Returns the keys of the document ``o`` in the order in which they
+    are written, leaving out properties that are not named in
+    ``properties`` unless ``properties`` is ``None``.
+
+    Links collected from streams can only be written once their resources
+    have been read, so if there are any, ``_links`` is written after
+    ``_embedded``.
+
+    """
+    keys = list(o)
+    if properties is not None:
+        keys = [key for key in keys
+                if key in properties or key in (LINKS_KEY, EMBEDDED_KEY)]
+    if _streams(o.get(LINKS_KEY, {}), LinkStream):
+        keys.remove(LINKS_KEY)
+        keys.append(LINKS_KEY)
+    return keys
+
+
+def _holds_placeholders(value):
+    """Returns ``True`` if the value of a link relationship type holds
+    placeholders, or resources that hold embedded streams at any depth.
+
+    """
+    for item in value if isinstance(value, list) else [value]:
+        if isinstance(item, (EmbeddedStream, LinkStream)):
+            return True
+        if isinstance(item, dict) and has_streams(item):
+            return True
+    return False
+
+
+def resource_pieces(obj, splicer):
+    """Yields the JSON text of the embedded resource or link ``obj`` in
+    pieces, writing the resource with ``document_pieces`` if it holds
+    embedded streams.
+
+    """
+    if isinstance(obj, RawJSON):
+        yield obj.text
+    elif isinstance(obj, dict) and has_streams(obj):
+        for piece in document_pieces(obj, splicer):
+            yield piece
+    else:
+        yield splicer.dumps(obj)
+
+
+def iter_rels(rels, splicer):
+    """Yields the JSON text of the ``_links`` or ``_embedded`` object
+    ``rels`` in pieces, expanding any placeholders, including those in
+    embedded resources, and writing fragments with ``splicer``.
+
+    """
+    dumps = splicer.dumps
+    separator = '{'
+    for rel, value in rels.items():
+        yield separator + dumps(rel) + ':'
+        separator = ','
+
+        if not _holds_placeholders(value):
+            yield dumps(value)
+            continue
+
+        if not isinstance(value, list):
+            for piece in resource_pieces(value, splicer):
+                yield piece
+            continue
+
+        item_separator = '['
+        for item in value:
+            if isinstance(item, (EmbeddedStream, LinkStream)):
+                elements = item
+            else:
+                elements = [item]
+            for element in elements:
+                yield item_separator
+                item_separator = ','
+                for piece in resource_pieces(element, splicer):
+                    yield piece
+        yield '[]' if item_separator == '[' else ']'
+
+    yield '{}' if separator == '{' else '}'
+
+
+def iter_pieces(o, backend, properties=None):
+    """Yields the JSON text of the document ``o`` in pieces.
+
+    Every embedded stream is read while it is written, one resource at a
+    time. See ``key_order`` for the order of the keys and the
+    ``properties`` projection.
+
+    """
+    return document_pieces(o, Splicer(backend), properties)
+
+
+def document_pieces(o, splicer, properties=None):
+    """Yields the JSON text of the document ``o`` in pieces, writing with
+    ``splicer``. See ``iter_pieces``.
+
+    """
+    dumps = splicer.dumps
+    separator = '{'
+    for key in key_order(o, properties):
+        yield separator + dumps(key) + ':'
+        separator = ','
+
+        value = o[key]
+        if key in (LINKS_KEY, EMBEDDED_KEY):
+            for piece in iter_rels(value, splicer):
+                yield piece
+        else:
+            yield dumps(value)
+
+    yield '{}' if separator == '{' else '}'
+
+
+def iter_chunks(o, backend, chunk_size, properties=None):
+    """Yields the JSON text of the document ``o`` in chunks of at least
+    ``chunk_size`` characters, except for the last chunk.
+
+    """
+    pieces = []
+    size = 0
+    for piece in iter_pieces(o, backend, properties):
+        pieces.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(pieces)
+            pieces = []
+            size = 0
+
+    if pieces:
+        yield ''.join(pieces)
@@ -0,0 +1,450 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Parsing HAL documents from a stream.
+
+``StreamParser`` reads a HAL document from chunks of JSON text and reports
+the document's properties, its links and each of its embedded resources as
+soon as they have been read. Only the text of the member that is being read
+is held in memory, so a collection with many embedded resources can be
+parsed in constant memory.
+
+Calling code is expected to use the following members:
+
+    - ``StreamParser``: a push parser, for chunks that arrive from a socket
+      or an asyncio stream.
+    - ``iterparse(fileobj)``: a generator of events read from a file object.
+
+Each event is a tuple:
+
+    - ``('property', name, value)`` for each property of the document.
+    - ``('links', links)`` for the document's ``_links`` object.
+    - ``('embedded', rel, document)`` for each embedded resource, with a
+      ``Document`` for the resource.
+
+Events are reported in the order in which their members appear in the
+text. Embedded resources that appear before the document's ``_links`` do not
+inherit its CURIEs.
+
+"""
+
+import codecs
+import re
+
+from dougrain import jsonbackend
+from dougrain.document import Document
+from dougrain.drafts import AUTO
+from dougrain.drafts import LINKS_KEY
+from dougrain.drafts import EMBEDDED_KEY
+
+PROPERTY = 'property'
+LINKS = 'links'
+EMBEDDED = 'embedded'
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+STRING_BODY = re.compile(r'(?:[^"\\]+|\\.)*', re.DOTALL)
+STRUCTURAL = re.compile(r'[\[\]{}"]')
+SCALAR_END = re.compile(r'[ \t\n\r,\]}]')
+
+# Parser states.
+START = 'start'
+KEY = 'key'
+COLON = 'colon'
+VALUE = 'value'
+NEXT = 'next'
+EMBEDDED_KEY_STATE = 'embedded key'
+EMBEDDED_COLON = 'embedded colon'
+EMBEDDED_VALUE = 'embedded value'
+EMBEDDED_NEXT = 'embedded next'
+ITEM = 'item'
+ITEM_NEXT = 'item next'
+DONE = 'done'
+
+
+class ValueScanner(object):
+    """Finds the end of a JSON value in text that arrives in pieces.
+
+    The scanner remembers how far it got, so text is scanned only once
+    however many pieces it arrives in.
+
+    """
+
+    def __init__(self, buf, start):
+        """Starts scanning the value that begins at ``buf[start]``."""
+        self.start = start
+        self.position = start + 1
+        self.depth = 0
+        self.in_string = False
+        self.scalar = False
+
+        first = buf[start]
+        if first == '"':
+            self.in_string = True
+        elif first in '{[':
+            self.depth = 1
+        else:
+            self.scalar = True
+            self.position = start
+
+    def shift(self, offset):
+        """Adjusts the scanner after ``offset`` characters have been removed
+        from the start of the buffer.
+
+        """
+        self.start -= offset
+        self.position -= offset
+
+    def scan(self, buf):
+        """Returns the index in ``buf`` just after the end of the value, or
+        ``None`` if the value is not complete yet.
+
+        """
+        if self.scalar:
+            match = SCALAR_END.search(buf, self.position)
+            if match is None:
+                self.position = len(buf)
+                return None
+            return match.start()
+
+        position = self.position
+        while True:
+            if self.in_string:
+                # The body stops at the closing quote, or at the end of the
+                # text or at a backslash whose escape has not arrived yet.
+                position = STRING_BODY.match(buf, position).end()
+                if position >= len(buf) or buf[position] != '"':
+                    self.position = position
+                    return None
+                position += 1
+                self.in_string = False
+                if self.depth == 0:
+                    return position
+                continue
+
+            match = STRUCTURAL.search(buf, position)
+            if match is None:
+                self.position = len(buf)
+                return None
+            position = match.end()
+            char = match.group()
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth == 0:
+                    return position
+
+
+class StreamParser(object):
+    """Push parser for a HAL document.
+
+    Text is passed to ``feed`` as it arrives, and ``feed`` returns the events
+    for the members that the text completes. ``close`` is called at the end
+    of the text. For example, with an asyncio stream:
+
+    ``
+    parser = StreamParser(base_uri)
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        for event in parser.feed(chunk):
+            handle(event)
+    parser.close()
+    ``
+
+    """
+
+    def __init__(self, base_uri=None, parent_curies=None, draft=AUTO,
+                 backend=None):
+        """``StreamParser(base_uri=None, parent_curies=None, draft=AUTO,
+        backend=None)``
+
+        Arguments:
+
+        - ``base_uri``, ``parent_curies``, ``draft``: as for
+          ``Document.from_object``. They are used for the embedded resources.
+        - ``backend``: optional name of the JSON backend used to decode each
+          member (see ``jsonbackend.get_backend``).
+
+        """
+        self.base_uri = base_uri
+        self.parent_curies = parent_curies
+        self.curies = parent_curies
+        self.draft = draft
+        self.backend = jsonbackend.get_backend(backend)
+
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.position = 0
+        self.offset = 0
+        self.state = START
+        self.empty = False
+        self.key = None
+        self.rel = None
+        self.scanner = None
+
+    def feed(self, data):
+        """Parses the next piece of the text and returns a list of events.
+
+        ``data`` may be ``bytes`` holding UTF-8 encoded text, or a ``str``.
+
+        Raises ``ValueError`` if the text is not a JSON object.
+
+        """
+        if isinstance(data, bytes):
+            data = self.decoder.decode(data)
+
+        if self.position:
+            # Drop the text that has already been parsed.
+            if self.scanner is not None:
+                self.scanner.shift(self.position)
+            self.offset += self.position
+            self.buf = self.buf[self.position:]
+            self.position = 0
+
+        self.buf += data
+        events = []
+        while self.step(events):
+            pass
+        return events
+
+    def close(self):
+        """Finishes parsing and returns a list of any remaining events.
+
+        Raises ``ValueError`` if the text ended before the document did.
+
+        """
+        events = self.feed(self.decoder.decode(b'', True))
+        if self.state != DONE:
+            raise ValueError("Unexpected end of HAL document at offset %d" %
+                             (self.offset + len(self.buf),))
+        return events
+
+    def error(self, expected):
+        raise ValueError("Expected %s at offset %d" %
+                         (expected, self.offset + self.position))
+
+    def next_char(self):
+        """Skips whitespace and returns the next character, or ``None`` if
+        more text is needed.
+
+        """
+        self.position = WHITESPACE.match(self.buf, self.position).end()
+        if self.position >= len(self.buf):
+            return None
+        return self.buf[self.position]
+
+    def read_value(self):
+        """Returns the next complete value as JSON text, or ``None`` if more
+        text is needed.
+
+        """
+        if self.scanner is None:
+            if self.next_char() is None:
+                return None
+            self.scanner = ValueScanner(self.buf, self.position)
+
+        end = self.scanner.scan(self.buf)
+        if end is None:
+            return None
+
+        text = self.buf[self.scanner.start:end]
+        self.scanner = None
+        self.position = end
+        return text
+
+    def read_key(self):
+        """Returns the next object key, or ``None`` if more text is
+        needed.
+
+        """
+        text = self.read_value()
+        if text is None:
+            return None
+        if not text.startswith('"'):
+            self.error("a string")
+        return self.backend.loads(text)
+
+    def expect(self, char, description):
+        """Consumes ``char`` and returns ``True``, or returns ``False`` if
+        more text is needed.
+
+        """
+        next_char = self.next_char()
+        if next_char is None:
+            return False
+        if next_char != char:
+            self.error(description)
+        self.position += 1
+        return True
+
+    def open(self, state):
+        """Consumes the ``{`` or ``[`` that starts an object or array whose
+        members are read in ``state``.
+
+        """
+        self.position += 1
+        self.state = state
+        self.empty = True
+
+    def close_empty(self, close, closed):
+        """Consumes ``close`` and moves to ``closed`` if it ends an empty
+        object or array. Returns ``True`` if it does, or ``None`` if more
+        text is needed.
+
+        """
+        if not self.empty or self.scanner is not None:
+            return False
+        char = self.next_char()
+        if char is None:
+            return None
+        self.empty = False
+        if char != close:
+            return False
+        self.position += 1
+        self.state = closed
+        return True
+
+    def make_document(self, text):
+        return Document.from_object(self.backend.loads(text), self.base_uri,
+                                    self.curies, self.draft)
+
+    def step(self, events):
+        """Parses one member or piece of punctuation, appending any event
+        to ``events``. Returns ``False`` if more text is needed.
+
+        """
+        state = self.state
+
+        if state == DONE:
+            if self.next_char() is not None:
+                self.error("the end of the text")
+            return False
+
+        if state == START:
+            char = self.next_char()
+            if char is None:
+                return False
+            if char != '{':
+                self.error("a JSON object")
+            self.open(KEY)
+            return True
+
+        if state in (KEY, EMBEDDED_KEY_STATE):
+            closed = self.close_empty('}', DONE if state == KEY else NEXT)
+            if closed is not False:
+                return bool(closed)
+
+            key = self.read_key()
+            if key is None:
+                return False
+            if state == KEY:
+                self.key = key
+                self.state = COLON
+            else:
+                self.rel = key
+                self.state = EMBEDDED_COLON
+            return True
+
+        if state in (COLON, EMBEDDED_COLON):
+            if not self.expect(':', "':'"):
+                return False
+            self.state = VALUE if state == COLON else EMBEDDED_VALUE
+            return True
+
+        if state == VALUE:
+            if self.key == EMBEDDED_KEY and self.scanner is None:
+                char = self.next_char()
+                if char is None:
+                    return False
+                if char == '{':
+                    self.open(EMBEDDED_KEY_STATE)
+                    return True
+
+            text = self.read_value()
+            if text is None:
+                return False
+            value = self.backend.loads(text)
+            if self.key == LINKS_KEY:
+                events.append((LINKS, value))
+                self.curies = Document.from_object(
+                    {LINKS_KEY: value}, self.base_uri, self.parent_curies,
+                    self.draft).curies
+            else:
+                events.append((PROPERTY, self.key, value))
+            self.state = NEXT
+            return True
+
+        if state == EMBEDDED_VALUE:
+            if self.scanner is None:
+                char = self.next_char()
+                if char is None:
+                    return False
+                if char == '[':
+                    self.open(ITEM)
+                    return True
+
+            text = self.read_value()
+            if text is None:
+                return False
+            events.append((EMBEDDED, self.rel, self.make_document(text)))
+            self.state = EMBEDDED_NEXT
+            return True
+
+        if state == ITEM:
+            closed = self.close_empty(']', EMBEDDED_NEXT)
+            if closed is not False:
+                return bool(closed)
+
+            text = self.read_value()
+            if text is None:
+                return False
+            events.append((EMBEDDED, self.rel, self.make_document(text)))
+            self.state = ITEM_NEXT
+            return True
+
+        # The remaining states come after a member or an array item.
+        char = self.next_char()
+        if char is None:
+            return False
+
+        if state == NEXT:
+            after, close, closed = KEY, '}', DONE
+        elif state == EMBEDDED_NEXT:
+            after, close, closed = EMBEDDED_KEY_STATE, '}', NEXT
+        else:
+            after, close, closed = ITEM, ']', EMBEDDED_NEXT
+
+        self.position += 1
+        if char == ',':
+            self.state = after
+        elif char == close:
+            self.state = closed
+        else:
+            self.position -= 1
+            self.error("',' or %r" % (close,))
+        return True
+
+
+def iterparse(fileobj, base_uri=None, parent_curies=None, draft=AUTO,
+              backend=None, chunk_size=65536):
+    """Generates events for the HAL document read from a file object.
+
+    The file is read ``chunk_size`` bytes or characters at a time. See
+    ``StreamParser`` for the other arguments and the module documentation
+    for the events.
+
+    """
+    parser = StreamParser(base_uri, parent_curies, draft, backend)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        for event in parser.feed(chunk):
+            yield event
+
+    for event in parser.close():
+        yield event
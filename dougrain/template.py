@@ -0,0 +1,361 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Expanding URI templates.
+
+This module implements levels 1 to 4 of RFC 6570
+(http://tools.ietf.org/html/rfc6570). Templates are compiled once into a
+list of literal strings and expressions, and the compiled templates are
+shared through ``TEMPLATE_CACHE``.
+
+Calling code is expected to use the following members:
+
+    - ``compile_template(template)``: returns a compiled ``Template``.
+    - ``expand(template, variables)``: expands a template string.
+
+"""
+
+import re
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from dougrain.cache import LRUCache
+
+try:
+    _ = unicode
+except NameError:
+    unicode = str
+
+
+# Characters allowed unencoded by the reserved (``+``) and fragment (``#``)
+# operators, in addition to the unreserved characters.
+RESERVED = ":/?#[]@!$&'()*+,;="
+
+# Operator: (first, separator, named, if-empty, allow reserved)
+OPERATORS = {
+    '': ('', ',', False, '', False),
+    '+': ('', ',', False, '', True),
+    '#': ('#', ',', False, '', True),
+    '.': ('.', '.', False, '', False),
+    '/': ('/', '/', False, '', False),
+    ';': (';', ';', True, '', False),
+    '?': ('?', '&', True, '=', False),
+    '&': ('&', '&', True, '=', False),
+}
+
+PCT_ENCODED = re.compile(r'(%[0-9A-Fa-f]{2})')
+
+# Compiled templates, shared by every caller that uses the same template.
+TEMPLATE_CACHE = LRUCache(1024)
+
+
+def _quote(value, safe):
+    if not isinstance(value, str):
+        # Python 2 unicode strings have to be encoded before quoting.
+        value = value.encode('utf-8')
+    return quote(value, safe)
+
+
+def encode(value, allow_reserved=False):
+    """Percent-encode ``value`` for use in an expansion.
+
+    Unreserved characters are never encoded. If ``allow_reserved`` is true,
+    reserved characters and existing percent-encoded triplets are also left
+    as they are.
+
+    """
+    if not allow_reserved:
+        return _quote(value, '~')
+
+    parts = PCT_ENCODED.split(value)
+    # split() puts the percent-encoded triplets at the odd indexes.
+    for i in range(0, len(parts), 2):
+        parts[i] = _quote(parts[i], RESERVED + '~')
+    return ''.join(parts)
+
+
+def _text(value):
+    if isinstance(value, (str, unicode)):
+        return value
+    return str(value)
+
+
+class VarSpec(object):
+    """A variable in a template expression, with its modifier."""
+
+    def __init__(self, spec):
+        self.explode = spec.endswith('*')
+        self.prefix = None
+
+        if self.explode:
+            spec = spec[:-1]
+        elif ':' in spec:
+            name, _, length = spec.partition(':')
+            if length.isdigit():
+                spec = name
+                self.prefix = int(length)
+
+        self.name = spec
+
+
+class Expression(object):
+    """A ``{...}`` expression in a template."""
+
+    def __init__(self, body):
+        if body and body[0] in OPERATORS:
+            self.operator = body[0]
+            body = body[1:]
+        else:
+            self.operator = ''
+
+        self.varspecs = [VarSpec(spec) for spec in body.split(',')]
+
+    def expand(self, variables):
+        """Returns the expansion of the expression for ``variables``."""
+        first, separator, named, if_empty, allow_reserved = \
+            OPERATORS[self.operator]
+
+        parts = []
+        for varspec in self.varspecs:
+            value = variables.get(varspec.name)
+            if value is None:
+                continue
+
+            if isinstance(value, Mapping):
+                part = self.expand_mapping(varspec, value)
+            elif isinstance(value, (list, tuple)):
+                part = self.expand_list(varspec, value)
+            else:
+                value = _text(value)
+                if varspec.prefix is not None:
+                    value = value[:varspec.prefix]
+                part = encode(value, allow_reserved)
+                if named:
+                    part = self.name_value(varspec.name, part)
+
+            if part is not None:
+                parts.append(part)
+
+        if not parts:
+            return ''
+
+        return first + separator.join(parts)
+
+    def name_value(self, name, encoded):
+        if encoded:
+            return name + '=' + encoded
+        return name + OPERATORS[self.operator][3]
+
+    def expand_list(self, varspec, value):
+        _, separator, named, _, allow_reserved = OPERATORS[self.operator]
+
+        items = [encode(_text(item), allow_reserved)
+                 for item in value if item is not None]
+        if not items:
+            return None
+
+        if not varspec.explode:
+            joined = ','.join(items)
+            if named:
+                return self.name_value(varspec.name, joined)
+            return joined
+
+        if named:
+            return separator.join(self.name_value(varspec.name, item)
+                                  for item in items)
+        return separator.join(items)
+
+    def expand_mapping(self, varspec, value):
+        _, separator, named, _, allow_reserved = OPERATORS[self.operator]
+
+        items = [(encode(_text(key), allow_reserved),
+                  encode(_text(item), allow_reserved))
+                 for key, item in value.items() if item is not None]
+        if not items:
+            return None
+
+        if not varspec.explode:
+            joined = ','.join(key + ',' + item for key, item in items)
+            if named:
+                return self.name_value(varspec.name, joined)
+            return joined
+
+        if named:
+            return separator.join(self.name_value(key, item)
+                                  for key, item in items)
+        return separator.join(key + '=' + item for key, item in items)
+
+
+def parse(template):
+    """Returns the parts of ``template``.
+
+    Each part is either a literal string or an ``Expression``. The template
+    is scanned once from left to right. A ``{`` without a matching ``}`` is
+    treated as literal text.
+
+    """
+    parts = []
+    position = 0
+    length = len(template)
+
+    while position < length:
+        start = template.find('{', position)
+        if start == -1:
+            break
+
+        end = template.find('}', start + 1)
+        if end == -1:
+            break
+
+        if start > position:
+            parts.append(template[position:start])
+        parts.append(Expression(template[start + 1:end]))
+        position = end + 1
+
+    if position < length:
+        parts.append(template[position:])
+
+    return parts
+
+
+class Template(object):
+    """A compiled URI template.
+
+    Public Instance Attributes:
+
+    - ``template``: the template string.
+    - ``parts``: the literal strings and ``Expression`` objects that make up
+                 the template.
+    - ``variables``: ``list`` of the names of the variables used in the
+                     template, in the order in which they first appear.
+
+    """
+
+    def __init__(self, template, parts=None):
+        self.template = template
+        if parts is None:
+            parts = parse(template)
+        self.parts = parts
+
+        self.variables = []
+        seen = set()
+        for part in parts:
+            if isinstance(part, Expression):
+                for varspec in part.varspecs:
+                    if varspec.name not in seen:
+                        seen.add(varspec.name)
+                        self.variables.append(varspec.name)
+
+    def expand(self, variables=None, **kwargs):
+        """Returns the expansion of the template.
+
+        Variables are taken from the ``variables`` dictionary and from the
+        keyword arguments. Variables that are missing or ``None`` are
+        undefined.
+
+        """
+        if variables is None:
+            variables = kwargs
+        elif kwargs:
+            variables = dict(variables, **kwargs)
+
+        return ''.join(part if isinstance(part, (str, unicode))
+                       else part.expand(variables)
+                       for part in self.parts)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.template)
+
+
+class SimpleTemplate(Template):
+    """A compiled URI template with a single ``{name}`` expression.
+
+    Most CURIE templates have this form. String values are expanded by
+    joining the literal text before and after the expression to the encoded
+    value, without going through the general expansion.
+
+    """
+
+    def __init__(self, template, parts):
+        super(SimpleTemplate, self).__init__(template, parts)
+
+        index = [isinstance(part, Expression) for part in parts].index(True)
+        self.expression = parts[index]
+        self.name = self.expression.varspecs[0].name
+        self.prefix = ''.join(parts[:index])
+        self.suffix = ''.join(parts[index + 1:])
+
+    def expand(self, variables=None, **kwargs):
+        """Returns the expansion of the template. See ``Template.expand``."""
+        if variables is None:
+            variables = kwargs
+        elif kwargs:
+            variables = dict(variables, **kwargs)
+
+        value = variables.get(self.name)
+        if value is None:
+            return self.prefix + self.suffix
+
+        if isinstance(value, (str, unicode)):
+            return self.prefix + _quote(value, '~') + self.suffix
+
+        return (self.prefix + self.expression.expand(variables) +
+                self.suffix)
+
+
+def is_simple(parts):
+    """Returns ``True`` if ``parts`` hold one expression with a single,
+    unmodified variable and no operator, and at most one literal on each side
+    of it.
+
+    """
+    expressions = [part for part in parts if isinstance(part, Expression)]
+    if len(expressions) != 1 or len(parts) > 3:
+        return False
+
+    expression = expressions[0]
+    if expression.operator or len(expression.varspecs) != 1:
+        return False
+
+    varspec = expression.varspecs[0]
+    if varspec.explode or varspec.prefix is not None:
+        return False
+
+    if len(parts) == 3 and parts[1] is not expression:
+        return False
+
+    return True
+
+
+def compile_template(template):
+    """Returns a compiled ``Template`` for ``template``.
+
+    Compiled templates are kept in ``TEMPLATE_CACHE``, so every caller that
+    uses the same template shares one compiled template.
+
+    """
+    compiled = TEMPLATE_CACHE.get(template)
+    if compiled is None:
+        parts = parse(template)
+        if is_simple(parts):
+            compiled = SimpleTemplate(template, parts)
+        else:
+            compiled = Template(template, parts)
+        TEMPLATE_CACHE[template] = compiled
+    return compiled
+
+
+def expand(template, variables):
+    """Returns the expansion of the template string ``template`` for the
+    ``variables`` dictionary.
+
+    """
+    return compile_template(template).expand(variables)
@@ -18,7 +18,6 @@ setup(
     packages=['dougrain'],
     provides=['dougrain'],
     long_description=open("README.rst").read(),
-    install_requires=['uritemplate >= 0.6'],
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
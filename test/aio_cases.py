@@ -0,0 +1,192 @@
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+"""
+Tests for ``dougrain.aio``, which use syntax that needs Python 3.6 or later.
+``test_aio`` only imports them on those versions.
+
+"""
+
+import asyncio
+import json
+import unittest
+from dougrain import Builder
+from dougrain import Deferred
+from dougrain import drafts
+from dougrain.fragment import Fragment
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def collect(builder, **kwargs):
+    return [chunk async for chunk in builder.aiter_json(**kwargs)]
+
+
+def serialize(builder, **kwargs):
+    return ''.join(run(collect(builder, **kwargs)))
+
+
+async def value(result, delay=0):
+    await asyncio.sleep(delay)
+    return result
+
+
+async def async_items(items):
+    for item in items:
+        await asyncio.sleep(0)
+        yield item
+
+
+def item(i):
+    return Builder("/items/%d" % i).set_property('index', i)
+
+
+class AsyncIterJsonTests(unittest.TestCase):
+    DRAFT = drafts.DRAFT_4
+
+    def setUp(self):
+        self.builder = Builder("/items", draft=self.DRAFT)
+
+    def eager(self, count):
+        builder = Builder("/items", draft=self.DRAFT)
+        for i in range(count):
+            builder.embed('item', item(i), wrap=True)
+        return builder.as_object()
+
+    def testPlainDocumentMatchesIterJson(self):
+        self.builder.set_property('name', "items").add_link('next', "/2")
+        self.builder.embed_iter('item', [item(0), item(1)])
+        expected = ''.join(Builder("/items", draft=self.DRAFT)
+                           .set_property('name', "items")
+                           .add_link('next', "/2")
+                           .embed_iter('item', [item(0), item(1)])
+                           .iter_json())
+        self.assertEquals(expected, serialize(self.builder))
+
+    def testAwaitablePropertiesAreWrittenInOrder(self):
+        self.builder.set_property('slow', value("slow", 0.02))
+        self.builder.set_property('fast', value("fast"))
+        self.builder.set_property('plain', 1)
+        text = serialize(self.builder)
+        obj = json.loads(text)
+        self.assertEquals("slow", obj['slow'])
+        self.assertEquals("fast", obj['fast'])
+        self.assertTrue(text.index('"slow"') < text.index('"fast"') <
+                        text.index('"plain"'))
+
+    def testAsyncIterablePropertyIsWrittenAsArray(self):
+        self.builder.set_property('tags', async_items(["a", "b"]))
+        self.assertEquals(["a", "b"],
+                          json.loads(serialize(self.builder))['tags'])
+
+    def testEmbedAsyncIterable(self):
+        self.builder.embed_iter('item', async_items([item(i)
+                                                     for i in range(3)]))
+        self.assertEquals(self.eager(3), json.loads(serialize(self.builder)))
+
+    def testEmbedAwaitablesInOrder(self):
+        # Later items finish first.
+        targets = [value(item(i), 0.01 * (3 - i)) for i in range(3)]
+        self.builder.embed_iter('item', targets)
+        self.assertEquals(self.eager(3), json.loads(serialize(self.builder)))
+
+    def testConcurrencyIsLimited(self):
+        running = [0]
+        peak = [0]
+
+        async def tracked(i):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+            return item(i)
+
+        self.builder.embed_iter('item', [tracked(i) for i in range(10)])
+        self.builder.set_property('count', value(10))
+        obj = json.loads(serialize(self.builder, concurrency=3))
+        self.assertEquals(list(range(10)), [embedded['index'] for embedded
+                                            in obj['_embedded']['item']])
+        self.assertEquals(3, peak[0])
+
+    def tracked_items(self, count, peak):
+        running = [0]
+
+        async def tracked(i):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+            return i
+
+        return [Builder("/items/%d" % i).set_property('index', tracked(i))
+                for i in range(count)]
+
+    def testReadAheadPropertiesAreResolvedConcurrently(self):
+        peak = [0]
+        self.builder.embed_iter('item', self.tracked_items(10, peak))
+        obj = json.loads(serialize(self.builder, concurrency=3))
+        self.assertEquals(list(range(10)), [embedded['index'] for embedded
+                                            in obj['_embedded']['item']])
+        self.assertEquals(3, peak[0])
+
+    def testEmbeddedListPropertiesAreResolvedConcurrently(self):
+        peak = [0]
+        for builder in self.tracked_items(10, peak):
+            self.builder.embed('item', builder, wrap=True)
+        obj = json.loads(serialize(self.builder, concurrency=3))
+        self.assertEquals(list(range(10)), [embedded['index'] for embedded
+                                            in obj['_embedded']['item']])
+        self.assertEquals(3, peak[0])
+
+    def testNestedAwaitables(self):
+        child = Builder("/child").set_property('total', value(42))
+        child.embed_iter('part', async_items([item(0)]))
+        self.builder.embed_iter('item', [value(child)])
+        obj = json.loads(serialize(self.builder))
+        child_obj = obj['_embedded']['item'][0]
+        self.assertEquals(42, child_obj['total'])
+        self.assertEquals(0, child_obj['_embedded']['part'][0]['index'])
+
+    def testDeferredProperties(self):
+        calls = []
+
+        def compute(name):
+            calls.append(name)
+            return value(name)
+
+        self.builder.set_property('a', Deferred(lambda: compute('a')))
+        self.builder.set_property('b', Deferred(lambda: compute('b')))
+        self.builder.set_property('c', Deferred(lambda: 'c'))
+        obj = json.loads(serialize(self.builder, properties=['a', 'c']))
+        self.assertEquals('a', obj['a'])
+        self.assertEquals('c', obj['c'])
+        self.assertFalse('b' in obj)
+        self.assertEquals(['a'], calls)
+
+    def testFragmentsAreSpliced(self):
+        text = '{"_links":{"self":{"href":"/items/0"}},  "index" : 0}'
+        fragment = Fragment(text, "/items/0")
+        self.builder.embed('item', fragment, wrap=True)
+        self.builder.embed_iter('item', async_items([fragment]))
+        output = serialize(self.builder)
+        self.assertEquals(2, output.count(text))
+        obj = json.loads(output)
+        self.assertEquals([0, 0], [embedded['index'] for embedded
+                                   in obj['_embedded']['item']])
+
+    def testChunks(self):
+        self.builder.embed_iter('item', async_items([item(i)
+                                                     for i in range(20)]))
+        chunks = run(collect(self.builder, chunk_size=100))
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(all(len(chunk) >= 100 for chunk in chunks[:-1]))
+        self.assertEquals(self.eager(20), json.loads(''.join(chunks)))
+
+
+class AsyncIterJsonDraft5Tests(AsyncIterJsonTests):
+    DRAFT = drafts.DRAFT_5
@@ -0,0 +1,19 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import sys
+import unittest
+
+if sys.version_info >= (3, 6):
+    from aio_cases import AsyncIterJsonTests
+    from aio_cases import AsyncIterJsonDraft5Tests
+else:
+    @unittest.skip("dougrain.aio needs Python 3.6 or later")
+    class AsyncIterJsonTests(unittest.TestCase):
+        def testSkipped(self):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
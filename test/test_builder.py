@@ -2,8 +2,10 @@
 # Copyright (c) 2013 Will Harris
 # See the file license.txt for copying permission.
 
+import json
 import unittest
 from dougrain import Builder
+from dougrain import Deferred
 from dougrain import Document
 from dougrain import drafts
 
@@ -416,6 +418,215 @@ class EmbedBuilderDocumentTests(EmbedBuilderTests):
         return target_doc
 
 
+class EmbedIterBuilderTests(BuilderTests):
+    DRAFT = drafts.DRAFT_4
+
+    def setUp(self):
+        self.uri = "http://localhost/%s" % self._testMethodName
+        self.builder = Builder(self.uri, draft=self.DRAFT)
+        self.read = []
+
+    def targets(self, count):
+        for i in range(count):
+            self.read.append(i)
+            yield Builder("/items/%d" % i).set_property('index', i)
+
+    def eager(self, count):
+        builder = Builder(self.uri, draft=self.DRAFT)
+        builder.embed('item', Builder("/items/first"), wrap=True)
+        for i in range(count):
+            builder.embed('item',
+                          Builder("/items/%d" % i).set_property('index', i))
+        return builder.as_object()
+
+    def testIterableIsNotReadUntilSerialized(self):
+        self.builder.embed_iter('item', self.targets(3))
+        self.assertEquals([], self.read)
+
+    def testIterJsonMatchesEagerEmbeds(self):
+        self.builder.embed('item', Builder("/items/first"), wrap=True)
+        self.builder.embed_iter('item', self.targets(3))
+        text = ''.join(self.builder.iter_json())
+        self.assertEquals(self.eager(3), json.loads(text))
+
+    def testIterJsonReadsIterableWhileWriting(self):
+        self.builder.embed_iter('item', self.targets(100))
+        chunks = self.builder.iter_json(chunk_size=1)
+        next(chunks)
+        self.assertEquals([], self.read)
+        for chunk in chunks:
+            if '/items/1"' in chunk:
+                break
+        self.assertTrue(len(self.read) < 100)
+
+    def testAsObjectReadsIterable(self):
+        self.builder.embed('item', Builder("/items/first"), wrap=True)
+        self.builder.embed_iter('item', self.targets(3))
+        self.assertEquals(self.eager(3), self.builder.as_object())
+        self.assertEquals(self.eager(3), json.loads(self.builder.dumps()))
+        self.assertEquals(self.eager(3),
+                          json.loads(''.join(self.builder.iter_json())))
+
+    def testEmptyIterable(self):
+        self.builder.embed_iter('item', iter([]))
+        obj = json.loads(''.join(self.builder.iter_json()))
+        self.assertEquals([], obj['_embedded']['item'])
+
+    def testIterableCanOnlyBeSerializedOnce(self):
+        self.builder.embed_iter('item', self.targets(3))
+        ''.join(self.builder.iter_json())
+        self.assertRaises(ValueError, ''.join, self.builder.iter_json())
+
+    def testDocumentsCanBeEmbedded(self):
+        targets = (Document.from_object({'_links': {'self': {'href': href}}})
+                   for href in ["/a", "/b"])
+        self.builder.embed_iter('item', targets)
+        obj = json.loads(''.join(self.builder.iter_json()))
+        self.assertEquals(["/a", "/b"],
+                          [item['_links']['self']['href']
+                           for item in obj['_embedded']['item']])
+
+
+    def nested(self, count):
+        child = Builder("/child", draft=self.DRAFT)
+        child.embed_iter('item', self.targets(count))
+        self.builder.embed('child', child)
+        return child
+
+    def nested_eager(self, count):
+        child = Builder("/child", draft=self.DRAFT)
+        for i in range(count):
+            child.embed('item',
+                        Builder("/items/%d" % i).set_property('index', i),
+                        wrap=True)
+        return Builder(self.uri, draft=self.DRAFT).embed('child',
+                                                         child).as_object()
+
+    def testNestedIterableIsNotReadWhenEmbedded(self):
+        self.nested(3)
+        self.assertEquals([], self.read)
+
+    def testNestedIterableIsReadWhileWriting(self):
+        self.nested(100)
+        chunks = self.builder.iter_json(chunk_size=1)
+        next(chunks)
+        self.assertEquals([], self.read)
+        for chunk in chunks:
+            if '/items/1"' in chunk:
+                break
+        self.assertTrue(len(self.read) < 100)
+
+    def testNestedIterJson(self):
+        self.nested(3)
+        text = ''.join(self.builder.iter_json())
+        self.assertEquals(self.nested_eager(3), json.loads(text))
+
+    def testNestedDumps(self):
+        self.nested(3)
+        self.assertEquals(self.nested_eager(3),
+                          json.loads(self.builder.dumps()))
+
+    def testNestedAsObject(self):
+        self.nested(3)
+        self.assertEquals(self.nested_eager(3), self.builder.as_object())
+
+
+class EmbedIterBuilderDraft5Tests(EmbedIterBuilderTests):
+    DRAFT = drafts.DRAFT_5
+
+    def testLinksAreWrittenAfterEmbeddedResources(self):
+        self.builder.embed_iter('item', self.targets(2))
+        text = ''.join(self.builder.iter_json())
+        self.assertTrue(text.index('"_embedded"') < text.index('"_links"'))
+        obj = json.loads(text)
+        self.assertEquals([{'href': "/items/0"}, {'href': "/items/1"}],
+                          obj['_links']['item'])
+
+
+class DeferredBuilderTests(BuilderTests):
+    def setUp(self):
+        super(DeferredBuilderTests, self).setUp()
+        self.calls = []
+        self.builder.set_property('name', "widget")
+        self.builder.set_property('total', Deferred(self.total))
+
+    def total(self):
+        self.calls.append('total')
+        return 42
+
+    def testNotComputedWhenSet(self):
+        self.assertEqual([], self.calls)
+
+    def testComputedByDumps(self):
+        obj = json.loads(self.builder.dumps())
+        self.assertEqual(42, obj['total'])
+        self.assertEqual(['total'], self.calls)
+
+    def testComputedOnce(self):
+        self.builder.dumps()
+        ''.join(self.builder.iter_json())
+        self.assertEqual(['total'], self.calls)
+
+    def testNotComputedWhenProjectedOut(self):
+        obj = json.loads(self.builder.dumps(properties=['name']))
+        self.assertEqual("widget", obj['name'])
+        self.assertFalse('total' in obj)
+        self.assertTrue('_links' in obj)
+        self.assertEqual([], self.calls)
+
+        obj = json.loads(''.join(self.builder.iter_json(properties=['name'])))
+        self.assertFalse('total' in obj)
+        self.assertEqual([], self.calls)
+
+    def testComputedByIterJson(self):
+        obj = json.loads(''.join(self.builder.iter_json(
+            properties=['total'])))
+        self.assertEqual(42, obj['total'])
+        self.assertFalse('name' in obj)
+        self.assertEqual(['total'], self.calls)
+
+    def testAsObjectReplacesDeferredValues(self):
+        self.assertEqual(42, self.builder.as_object()['total'])
+
+    def testEmbeddedBuilderIsComputedWhenSerialized(self):
+        outer = Builder("/outer")
+        outer.embed('item', self.builder)
+        self.assertEqual([], self.calls)
+        obj = json.loads(outer.dumps())
+        self.assertEqual(42, obj['_embedded']['item']['total'])
+        self.assertEqual(['total'], self.calls)
+
+    def testEmbeddedBuilderIsComputedByAsObject(self):
+        outer = Builder("/outer")
+        outer.embed('item', self.builder)
+        self.assertEqual(42, outer.as_object()['_embedded']['item']['total'])
+
+    def testNestedDeferredValues(self):
+        self.builder.set_property('nested', {'k': [Deferred(self.total)]})
+        obj = self.builder.as_object()
+        self.assertEqual({'k': [42]}, obj['nested'])
+        self.assertEqual(obj, json.loads(json.dumps(obj)))
+
+    def testEmbeddedBuilderIsComputedWhenStreamed(self):
+        outer = Builder("/outer")
+        outer.embed_iter('item', [self.builder])
+        self.assertEqual([], self.calls)
+        obj = json.loads(''.join(outer.iter_json()))
+        self.assertEqual(42, obj['_embedded']['item'][0]['total'])
+
+
+class DumpsBuilderTests(BuilderTests):
+    def testDumpsDocument(self):
+        self.builder.set_property('name', u"caf\xe9")
+        self.builder.add_link('next', "/next")
+        text = self.builder.dumps()
+        self.assertEqual(self.builder.as_object(), json.loads(text))
+
+    def testDumpsWithStandardBackend(self):
+        text = self.builder.dumps(backend='json')
+        self.assertEqual(self.builder.as_object(), json.loads(text))
+
+
 class ChainingBuilderTests(unittest.TestCase):
     def testChainAfterSetProperty(self):
         obj = (Builder("/item/1")
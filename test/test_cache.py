@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import threading
+import unittest
+from dougrain.cache import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(2)
+
+    def testGetReturnsStoredValue(self):
+        self.cache['a'] = 1
+        self.assertEquals(1, self.cache.get('a'))
+
+    def testGetReturnsDefaultForMissingKey(self):
+        self.assertEquals(None, self.cache.get('a'))
+        self.assertEquals(0, self.cache.get('a', 0))
+
+    def testDiscardsLeastRecentlyUsedItem(self):
+        self.cache['a'] = 1
+        self.cache['b'] = 2
+        self.cache.get('a')
+        self.cache['c'] = 3
+
+        self.assertTrue('a' in self.cache)
+        self.assertFalse('b' in self.cache)
+        self.assertTrue('c' in self.cache)
+        self.assertEquals(2, len(self.cache))
+
+    def testCountsHitsMissesAndEvictions(self):
+        self.cache['a'] = 1
+        self.cache['b'] = 2
+        self.cache['c'] = 3
+        self.cache.get('c')
+        self.cache.get('a')
+
+        stats = self.cache.stats()
+        self.assertEquals(1, stats['hits'])
+        self.assertEquals(1, stats['misses'])
+        self.assertEquals(1, stats['evictions'])
+        self.assertEquals(2, stats['size'])
+        self.assertEquals(2, stats['capacity'])
+        self.assertEquals(0.5, stats['hit_rate'])
+
+    def testHitRateWithoutLookups(self):
+        self.assertEquals(0.0, self.cache.hit_rate())
+
+    def testResizeDiscardsOldestItems(self):
+        self.cache['a'] = 1
+        self.cache['b'] = 2
+        self.cache.resize(1)
+
+        self.assertFalse('a' in self.cache)
+        self.assertTrue('b' in self.cache)
+        self.assertEquals(1, self.cache.evictions)
+
+    def testClearResetsCounters(self):
+        self.cache['a'] = 1
+        self.cache.get('a')
+        self.cache.clear()
+
+        self.assertEquals(0, len(self.cache))
+        self.assertEquals(0, self.cache.hits)
+
+    def testConcurrentUseStaysWithinCapacity(self):
+        cache = LRUCache(16)
+
+        def worker(offset):
+            for i in range(2000):
+                cache[(offset, i % 50)] = i
+                cache.get((offset, (i + 1) % 50))
+
+        threads = [threading.Thread(target=worker, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(16, len(cache))
+        self.assertEquals(8 * 2000, cache.hits + cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
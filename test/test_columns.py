@@ -0,0 +1,159 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import unittest
+from array import array
+from dougrain import Document
+from dougrain import columns
+
+
+def integers(values=()):
+    return array(columns.INTEGER_TYPECODE, values)
+
+
+def make_doc():
+    return Document.from_object({
+        '_links': {
+            'self': {'href': "/items"},
+            'curies': [{'name': "ea",
+                        'href': "http://example.com/rels/{rel}",
+                        'templated': True}],
+        },
+        '_embedded': {
+            'ea:item': [
+                {'_links': {'self': {'href': "/items/1"}},
+                 'id': 1, 'price': 2.5, 'name': "one"},
+                {'_links': {'self': {'href': "/items/2"}},
+                 'id': 2, 'price': 3, 'name': "two"},
+                {'_links': {'self': {'href': "/items/3"}},
+                 'id': 3, 'price': 4.0},
+            ],
+            'http://example.com/rels/summary': {'count': 3},
+        },
+    }, "http://example.com/")
+
+
+class ColumnTests(unittest.TestCase):
+    def testIntegers(self):
+        result = columns.column([1, 2, 3], use_numpy=False)
+        self.assertEquals(integers([1, 2, 3]), result)
+
+    def testNumbers(self):
+        result = columns.column([1, 2.5], use_numpy=False)
+        self.assertEquals(array('d', [1.0, 2.5]), result)
+
+    def testBooleansAreNotNumbers(self):
+        self.assertEquals([1, True], columns.column([1, True],
+                                                    use_numpy=False))
+
+    def testMissingValues(self):
+        self.assertEquals([1, None], columns.column([1, None],
+                                                    use_numpy=False))
+
+    def testStrings(self):
+        self.assertEquals([u"a", u"b"], columns.column([u"a", u"b"],
+                                                       use_numpy=False))
+
+    def testHugeIntegers(self):
+        self.assertEquals([1, 2 ** 70], columns.column([1, 2 ** 70],
+                                                       use_numpy=False))
+
+    def testEmpty(self):
+        self.assertEquals(integers(), columns.column([], use_numpy=False))
+
+    def testColumns(self):
+        result = columns.columns([{'a': 1, 'b': u"x"}, {'a': 2}],
+                                 ['b', 'a'], use_numpy=False)
+        self.assertEquals(['b', 'a'], list(result.keys()))
+        self.assertEquals([u"x", None], result['b'])
+        self.assertEquals(integers([1, 2]), result['a'])
+
+
+@unittest.skipIf(columns.numpy is not None, "numpy is installed")
+class NumpyMissingTests(unittest.TestCase):
+    def testColumnRaises(self):
+        self.assertRaises(ValueError, columns.column, [1], use_numpy=True)
+
+    def testColumnsRaises(self):
+        self.assertRaises(ValueError, columns.columns, [], ['a'],
+                          use_numpy=True)
+
+    def testDefaultsToArrays(self):
+        self.assertEquals(integers([1]), columns.column([1]))
+
+
+@unittest.skipIf(columns.numpy is None, "numpy is not installed")
+class NumpyColumnTests(unittest.TestCase):
+    def testIntegers(self):
+        result = columns.column([1, 2, 3])
+        self.assertTrue(isinstance(result, columns.numpy.ndarray))
+        self.assertEquals([1, 2, 3], result.tolist())
+
+    def testNumbers(self):
+        result = columns.column([1, 2.5])
+        self.assertEquals('f', result.dtype.kind)
+
+    def testOptOut(self):
+        self.assertEquals(integers([1]), columns.column([1],
+                                                        use_numpy=False))
+
+
+class EmbeddedColumnsTests(unittest.TestCase):
+    def setUp(self):
+        self.doc = make_doc()
+
+    def testReadsProperties(self):
+        result = self.doc.embedded_columns('ea:item', ['id', 'name'],
+                                           use_numpy=False)
+        self.assertEquals(integers([1, 2, 3]), result['id'])
+        self.assertEquals(["one", "two", None], result['name'])
+
+    def testReadsEquivalentRels(self):
+        self.doc.embed('/rels/item', Document.from_object({'id': 4}))
+        result = self.doc.embedded_columns('ea:item', ['id'],
+                                           use_numpy=False)
+        self.assertEquals([1, 2, 3, 4], sorted(result['id']))
+
+    def testSameOrderAsEmbedded(self):
+        result = self.doc.embedded_columns('ea:item', ['id'],
+                                           use_numpy=False)
+        self.assertEquals([item.properties['id']
+                           for item in self.doc.embedded['ea:item']],
+                          list(result['id']))
+
+    def testNumbers(self):
+        result = self.doc.embedded_columns('ea:item', ['price'],
+                                           use_numpy=False)
+        self.assertEquals(array('d', [2.5, 3.0, 4.0]), result['price'])
+
+    def testSingleResource(self):
+        result = self.doc.embedded_columns('ea:summary', ['count'],
+                                           use_numpy=False)
+        self.assertEquals(integers([3]), result['count'])
+
+    def testMissingRel(self):
+        result = self.doc.embedded_columns('ea:missing', ['id'],
+                                           use_numpy=False)
+        self.assertEquals(0, len(result['id']))
+
+    def testDoesNotBuildDocuments(self):
+        self.doc.embedded_columns('ea:item', ['id'])
+        self.assertEquals(None, self.doc._embedded_cache)
+
+    def testReservedField(self):
+        self.assertRaises(ValueError, self.doc.embedded_columns,
+                          'ea:item', ['_links'])
+
+    def testFieldsIterator(self):
+        result = self.doc.embedded_columns('ea:item', iter(['id']),
+                                           use_numpy=False)
+        self.assertEquals(['id'], list(result.keys()))
+
+    def testDefault(self):
+        result = self.doc.embedded_columns('ea:item', ['id'])
+        self.assertEquals([1, 2, 3], list(result['id']))
+
+
+if __name__ == '__main__':
+    unittest.main()
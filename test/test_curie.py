@@ -3,6 +3,7 @@
 # See the file license.txt for copying permission.
 
 import unittest
+from dougrain import cache
 from dougrain import curie
 from dougrain import link
 
@@ -34,5 +35,35 @@ class CurieTest(unittest.TestCase):
     def testNullExpandsLinkWithNoCurieName(self):
         self.assertEquals("next", self.curies.expand("next"))
 
+    def testSharesExpansionsCacheByDefault(self):
+        self.assertTrue(self.curies.expansions_cache is
+                        curie.EXPANSIONS_CACHE)
+
+    def testRelativeCurieExpandsAgainstItsBaseUri(self):
+        other = curie.CurieCollection()
+        other['spec'] = link.Link(dict(href="/specifications/{rel}",
+                                       templated=True),
+                                  "http://example.com/")
+        self.assertEquals("http://localhost/specifications/color",
+                          self.curies.expand("spec:color"))
+        self.assertEquals("http://example.com/specifications/color",
+                          other.expand("spec:color"))
+
+    def testExpansionsCacheIsBounded(self):
+        self.curies = curie.CurieCollection(cache.LRUCache(4))
+        self.curies['role'] = link.Link(
+            dict(href="http://localhost/roles/{rel}", templated=True), None)
+
+        for i in range(200):
+            self.assertEquals("http://localhost/roles/r%d" % i,
+                              self.curies.expand("role:r%d" % i))
+        self.curies.expand("role:r199")
+
+        expansions_cache = self.curies.expansions_cache
+        self.assertEquals(4, len(expansions_cache))
+        self.assertEquals(196, expansions_cache.evictions)
+        self.assertEquals(200, expansions_cache.misses)
+        self.assertEquals(1, expansions_cache.hits)
+
 if __name__ == '__main__':
     unittest.main()
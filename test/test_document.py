@@ -2,6 +2,8 @@
 # Copyright (c) 2013 Will Harris
 # See the file license.txt for copying permission.
 
+import datetime
+import json
 import unittest
 import dougrain
 
@@ -208,6 +210,62 @@ class ParseEmbeddedObjectsTestDraft3(ParseEmbeddedObjectsTestMixin,
 #
 
 
+class CountingDocument(dougrain.Document):
+    count = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingDocument.count += 1
+        super(CountingDocument, self).__init__(*args, **kwargs)
+
+
+class LazyEmbeddedTests(unittest.TestCase):
+    def setUp(self):
+        self.doc = CountingDocument.from_object(
+            {
+                "_embedded": {
+                    "item": [
+                        {"_links": {"self": {"href": "/items/%d" % i}},
+                         "index": i}
+                        for i in range(100)
+                    ],
+                    "other": {"name": "Other"}
+                }
+            },
+            base_uri="http://localhost/")
+        CountingDocument.count = 0
+
+    def testIndexingBuildsOnlyThatDocument(self):
+        item = self.doc.embedded['item'][42]
+
+        self.assertEquals(42, item.properties['index'])
+        self.assertEquals(1, CountingDocument.count)
+
+    def testIndexingTwiceReturnsSameDocument(self):
+        self.assertTrue(self.doc.embedded['item'][-1] is
+                        self.doc.embedded['item'][99])
+        self.assertEquals(1, CountingDocument.count)
+
+    def testReadingOneRelDoesNotBuildOtherRels(self):
+        self.assertEquals("Other",
+                          self.doc.embedded['other'].properties['name'])
+        self.assertEquals(1, CountingDocument.count)
+
+    def testLengthAndSlicing(self):
+        items = self.doc.embedded['item']
+
+        self.assertEquals(100, len(items))
+        self.assertEquals([1, 2],
+                          [item.properties['index'] for item in items[1:3]])
+        self.assertEquals(2, CountingDocument.count)
+
+    def testOutOfRangeIndexRaisesIndexError(self):
+        with self.assertRaises(IndexError):
+            self.doc.embedded['item'][100]
+
+
+#
+
+
 class CurieExpansionTestMixin(object):
 
     def setUp(self):
@@ -549,6 +607,11 @@ class SerializeTestsMixin(object):
                                             draft=self.DRAFT)
         self.assertEquals(obj, doc.as_object())
 
+        text = doc.dumps()
+        reloaded = dougrain.Document.from_json(text, "http://localhost",
+                                               draft=self.DRAFT)
+        self.assertEquals(obj, reloaded.as_object())
+
     def testSimple(self):
         self.checkEqualObjects({})
 
@@ -592,9 +655,523 @@ class SerializeTestsDraft3(SerializeTestsMixin, unittest.TestCase):
     CURIES_CASE = CurieExpansionTestDraft3.OBJECT
 
 
+class JSONTests(unittest.TestCase):
+    TEXT = ('{"_links": {"self": {"href": "/caf\\u00e9"}}, '
+            '"name": "caf\\u00e9"}')
+
+    def testLoadsText(self):
+        doc = dougrain.Document.from_json(self.TEXT, "http://localhost/")
+        self.assertEquals(u"http://localhost/caf\xe9", doc.url())
+        self.assertEquals(u"caf\xe9", doc.properties['name'])
+
+    def testLoadsBytes(self):
+        doc = dougrain.Document.from_json(self.TEXT.encode('utf-8'),
+                                          "http://localhost/")
+        self.assertEquals(u"caf\xe9", doc.properties['name'])
+
+    def testLoadsArray(self):
+        docs = dougrain.Document.from_json('[{"a": 1}, {"a": 2}]')
+        self.assertEquals([1, 2], [doc.properties['a'] for doc in docs])
+
+    def testEveryBackendGivesSameDocument(self):
+        from dougrain import jsonbackend
+        for backend in jsonbackend.available_backends():
+            doc = dougrain.Document.from_json(self.TEXT, backend=backend)
+            self.assertEquals(json.loads(self.TEXT), json.loads(doc.dumps()))
+            self.assertEquals(doc.dumps('json'), doc.dumps(backend))
+
+    def testUnknownBackend(self):
+        self.assertRaises(ValueError, dougrain.Document.from_json, self.TEXT,
+                          backend="nosuchjson")
+
+
 #
 
 
+class ProjectionTests(unittest.TestCase):
+    OBJECT = {
+        '_links': {
+            'self': {'href': "/orders"},
+            'curies': [{'name': "r", 'href': "/rels/{rel}",
+                        'templated': True}],
+        },
+        'count': 2,
+        'total': 30,
+        '_embedded': {
+            'r:order': [
+                {'_links': {'self': {'href': "/orders/1"}},
+                 'total': 10,
+                 '_embedded': {'r:line': {
+                     '_links': {'self': {'href': "/lines/1"}},
+                     '_embedded': {'r:product': {'name': "widget"}}}}},
+                {'_links': {'self': {'href': "/orders/2"}}, 'total': 20},
+            ],
+            'r:customer': {'_links': {'self': {'href': "/customers/1"}}},
+        },
+    }
+
+    def setUp(self):
+        self.doc = dougrain.Document.from_object(self.OBJECT,
+                                                 "http://localhost/")
+
+    def testKeepsEverythingByDefault(self):
+        projected = self.doc.project()
+        self.assertEquals(self.OBJECT, projected.as_object())
+        self.assertTrue(projected.as_object() is not self.OBJECT)
+
+    def testProperties(self):
+        projected = self.doc.project(properties=['count'])
+        self.assertEquals(2, projected.properties['count'])
+        self.assertFalse('total' in projected.properties)
+        self.assertEquals("http://localhost/orders", projected.url())
+        self.assertTrue(
+            projected.as_object()['_links'] is self.OBJECT['_links'])
+
+    def testRelsMatchCuriesAndUris(self):
+        for rel in ["r:customer", "/rels/customer",
+                    "http://localhost/rels/customer"]:
+            projected = self.doc.project(rels=[rel])
+            self.assertEquals(['r:customer'],
+                              list(projected.as_object()['_embedded']))
+            self.assertTrue(projected.embedded['r:customer'].as_object() is
+                            self.OBJECT['_embedded']['r:customer'])
+
+    def testNoMatchingRelsDropsEmbedded(self):
+        projected = self.doc.project(rels=["r:missing"])
+        self.assertFalse('_embedded' in projected.as_object())
+
+    def testDepthZero(self):
+        projected = self.doc.project(depth=0)
+        self.assertFalse('_embedded' in projected.as_object())
+        self.assertEquals(30, projected.properties['total'])
+
+    def testDepthTrimsNestedResources(self):
+        projected = self.doc.project(depth=2)
+        orders = projected.as_object()['_embedded']['r:order']
+        line = orders[0]['_embedded']['r:line']
+        self.assertFalse('_embedded' in line)
+        self.assertEquals(line['_links'],
+                          self.OBJECT['_embedded']['r:order'][0]
+                          ['_embedded']['r:line']['_links'])
+        # Untouched resources are shared.
+        self.assertTrue(orders[1] is self.OBJECT['_embedded']['r:order'][1])
+        # The original is unchanged.
+        self.assertTrue('_embedded' in self.OBJECT['_embedded']['r:order'][0]
+                        ['_embedded']['r:line'])
+
+    def testDeepEnoughDepthSharesEmbedded(self):
+        projected = self.doc.project(depth=3)
+        self.assertTrue(projected.as_object()['_embedded']['r:order'] is
+                        self.OBJECT['_embedded']['r:order'])
+
+    def testChangesAreNotShared(self):
+        projected = self.doc.project(properties=['count'], depth=2)
+        projected.add_link('next', "/orders?page=2")
+        projected.embedded['r:order'][1].set_property('total', 21)
+        projected.embedded['r:customer'].set_property('name', "Bob")
+        self.assertEquals(self.OBJECT, self.doc.as_object())
+        self.assertFalse('next' in self.OBJECT['_links'])
+
+        self.doc.set_property('count', 3)
+        self.doc.delete_link('self')
+        self.assertEquals(2, projected.properties['count'])
+        self.assertEquals("http://localhost/orders", projected.url())
+
+    def testProjectedFrozenDocumentCanBeChanged(self):
+        frozen = self.doc.freeze()
+        projected = frozen.project(properties=['count'])
+        projected.set_property('count', 3)
+        projected.add_link('next', "/orders?page=2")
+        self.assertEquals(2, frozen.properties['count'])
+        self.assertFalse('next' in frozen.links)
+
+    def testEmbeddedResourcesKeepCuries(self):
+        projected = self.doc.project(properties=[], depth=1)
+        order = projected.embedded['r:order'][0]
+        self.assertEquals("http://localhost/rels/order",
+                          projected.expand_curie("r:order"))
+        self.assertEquals("http://localhost/orders/1", order.url())
+
+
+class FingerprintTests(unittest.TestCase):
+    OBJECT = ProjectionTests.OBJECT
+
+    def setUp(self):
+        self.doc = self.make_doc(self.OBJECT)
+
+    def make_doc(self, o):
+        # Each document gets its own copy of the JSON object.
+        return dougrain.Document.from_object(json.loads(json.dumps(o)),
+                                             "http://localhost/")
+
+    def order(self, doc, index=0):
+        return doc.embedded['r:order'][index]
+
+    def testEqualContentHasEqualFingerprint(self):
+        text = json.dumps(self.OBJECT)
+        reordered = json.loads(text, object_pairs_hook=lambda pairs:
+                               dict(reversed(pairs)))
+        self.assertEquals(self.doc.fingerprint(),
+                          self.make_doc(reordered).fingerprint())
+        self.assertEquals(self.doc, self.make_doc(reordered))
+
+    def testDifferentContentHasDifferentFingerprint(self):
+        other = self.make_doc(self.OBJECT)
+        other.set_property('count', 3)
+        self.assertNotEquals(self.doc.fingerprint(), other.fingerprint())
+        self.assertNotEquals(self.doc, other)
+
+    def testMissingAndEmptyPartsDiffer(self):
+        empty = dougrain.Document.from_object({})
+        for o in [{'_links': {}}, {'_embedded': {}}, {'_embedded': {'a': []}},
+                  {'_embedded': {'a': {}}}]:
+            self.assertNotEquals(empty, dougrain.Document.from_object(o))
+
+    def testFingerprintIsCached(self):
+        self.assertTrue(self.doc.fingerprint() is self.doc.fingerprint())
+
+    def testMutatorsChangeFingerprint(self):
+        mutations = [
+            lambda doc: doc.set_property('count', 3),
+            lambda doc: doc.delete_property('count'),
+            lambda doc: doc.add_link('next', "/orders?page=2"),
+            lambda doc: doc.delete_link('self'),
+            lambda doc: doc.embed('r:order', self.make_doc({'total': 1})),
+            lambda doc: doc.delete_embedded('r:customer'),
+            lambda doc: doc.set_curie('s', "/s/{rel}"),
+            lambda doc: doc.drop_curie('r'),
+        ]
+        for mutate in mutations:
+            doc = self.make_doc(self.OBJECT)
+            before = doc.fingerprint()
+            mutate(doc)
+            self.assertNotEquals(before, doc.fingerprint())
+            self.assertEquals(self.make_doc(doc.as_object()).fingerprint(),
+                              doc.fingerprint())
+
+    def testEmbeddedChangesInvalidateAncestors(self):
+        before = self.doc.fingerprint()
+        order = self.order(self.doc)
+        order_before = order.fingerprint()
+
+        order.embedded['r:line'].set_property('quantity', 2)
+
+        self.assertNotEquals(before, self.doc.fingerprint())
+        self.assertNotEquals(order_before, order.fingerprint())
+        self.assertEquals(self.make_doc(self.doc.as_object()).fingerprint(),
+                          self.doc.fingerprint())
+
+    def testOnlyChangedPathIsHashedAgain(self):
+        self.doc.fingerprint()
+        line = self.order(self.doc).embedded['r:line']
+        line.set_property('quantity', 2)
+
+        hashed = []
+        properties_digest = dougrain.merkle.properties_digest
+
+        def counting_digest(o):
+            hashed.append(o)
+            return properties_digest(o)
+
+        dougrain.merkle.properties_digest = counting_digest
+        try:
+            self.doc.fingerprint()
+        finally:
+            dougrain.merkle.properties_digest = properties_digest
+
+        self.assertEquals([self.order(self.doc).o, line.o], hashed)
+
+    def testRemovedResourcesAreDropped(self):
+        for i in range(1000):
+            self.doc.embed('r:extra', self.make_doc({'n': i}))
+            self.doc.fingerprint()
+            self.doc.delete_embedded('r:extra')
+
+        # The document embeds five resources.
+        live = dougrain.merkle.live_table(self.doc._digest_table,
+                                          self.doc.o)
+        self.assertEquals(5, len(live))
+        self.assertTrue(len(self.doc._digest_table) <=
+                        2 * 5 + dougrain.merkle.TABLE_SLACK + 1)
+        self.assertEquals(self.make_doc(self.doc.as_object()).fingerprint(),
+                          self.doc.fingerprint())
+
+    def testEtag(self):
+        fingerprint = self.doc.fingerprint()
+        self.assertEquals('"%s"' % fingerprint, self.doc.etag())
+        self.assertEquals('W/"%s"' % fingerprint, self.doc.etag(weak=True))
+
+    def testNotEqualToOtherTypes(self):
+        self.assertNotEquals(self.doc, self.OBJECT)
+        self.assertFalse(self.doc == None)
+
+    def testEqualityNotFooledByStaleFingerprint(self):
+        order = self.make_doc({'total': 1})
+        self.doc.embed('r:extra', order)
+        copy = self.make_doc(self.doc.as_object())
+        self.assertEquals(self.doc, copy)
+
+        order.set_property('total', 2)
+        self.assertNotEquals(self.doc, copy)
+
+    def testEmbedManyDoesNotFingerprint(self):
+        order = self.make_doc({'total': 1})
+        order.set_property('date', datetime.date(2013, 1, 1))
+        self.doc.embed('r:order', order)
+        self.assertEquals(datetime.date(2013, 1, 1),
+                          self.order(self.doc, -1).properties['date'])
+
+
+class FrozenDocumentTests(unittest.TestCase):
+    OBJECT = ProjectionTests.OBJECT
+
+    def setUp(self):
+        self.doc = dougrain.FrozenDocument.from_object(self.OBJECT,
+                                                       "http://localhost/")
+
+    def testMutatorsRaise(self):
+        other = dougrain.Document.empty()
+        calls = [
+            lambda: self.doc.set_property('count', 3),
+            lambda: self.doc.delete_property('count'),
+            lambda: self.doc.add_link('next', "/next"),
+            lambda: self.doc.add_links('next', ["/next"]),
+            lambda: self.doc.delete_link('self'),
+            lambda: self.doc.embed('r:order', other),
+            lambda: self.doc.embed_many('r:order', [other]),
+            lambda: self.doc.delete_embedded('r:customer'),
+            lambda: self.doc.set_curie('s', "/s/{rel}"),
+            lambda: self.doc.drop_curie('r'),
+        ]
+        for call in calls:
+            self.assertRaises(TypeError, call)
+
+    def testEmbeddedDocumentsAreFrozen(self):
+        order = self.doc.embedded['r:order'][0]
+        self.assertTrue(isinstance(order, dougrain.FrozenDocument))
+        self.assertRaises(TypeError, order.set_property, 'total', 1)
+
+    def testHashable(self):
+        same = dougrain.FrozenDocument.from_object(
+            json.loads(json.dumps(self.OBJECT)), "http://localhost/")
+        self.assertEquals(hash(self.doc), hash(same))
+        self.assertEquals(1, len(set([self.doc, same])))
+        self.assertEquals(2, len(set([self.doc,
+                                      self.doc.embedded['r:customer']])))
+
+    def testEqualToDocumentWithSameContent(self):
+        doc = dougrain.Document.from_object(self.OBJECT, "http://localhost/")
+        self.assertEquals(doc, self.doc)
+        self.assertEquals(self.doc, doc)
+
+    def testDocumentIsNotHashable(self):
+        doc = dougrain.Document.from_object(self.OBJECT, "http://localhost/")
+        self.assertRaises(TypeError, hash, doc)
+
+
+class FreezeTests(unittest.TestCase):
+    OBJECT = ProjectionTests.OBJECT
+
+    def setUp(self):
+        self.doc = dougrain.Document.from_object(
+            json.loads(json.dumps(self.OBJECT)), "http://localhost/")
+        self.frozen = self.doc.freeze()
+
+    def testSnapshotIsEqual(self):
+        self.assertTrue(isinstance(self.frozen, dougrain.FrozenDocument))
+        self.assertEquals(self.doc, self.frozen)
+        self.assertEquals(self.OBJECT, self.frozen.as_object())
+
+    def testSnapshotIsACopy(self):
+        self.doc.set_property('count', 3)
+        self.doc.embedded['r:order'][0].set_property('total', 11)
+        self.assertEquals(2, self.frozen.properties['count'])
+        self.assertEquals(10, self.frozen.embedded['r:order'][0]
+                          .properties['total'])
+        self.assertNotEquals(self.doc, self.frozen)
+
+    def testMutatorsRaise(self):
+        self.assertRaises(TypeError, self.frozen.set_property, 'count', 3)
+        self.assertRaises(TypeError,
+                          self.frozen.embedded['r:customer'].add_link,
+                          'next', "/next")
+
+    def testCachesAreBuilt(self):
+        def check(doc):
+            names = ['_properties_cache', '_curies_cache', '_links_cache',
+                     '_embedded_cache', '_rels_cache', '_links_index_cache',
+                     '_embedded_index_cache', '_fingerprint_cache',
+                     '_hash_cache']
+            # A missing self link is cached as None.
+            if 'self' in doc.o.get('_links', {}):
+                names.append('_self_link_cache')
+            for name in names:
+                self.assertTrue(getattr(doc, name) is not None, name)
+            for rel in doc.links:
+                for item in doc.links[rel]:
+                    self.assertTrue(item._template is not None)
+                    self.assertTrue(item._hash is not None)
+            embedded = doc._embedded_cache
+            for rel in embedded:
+                # Read the built values without building any that are not.
+                value = embedded.rels[rel][1]
+                if isinstance(value, dougrain.document.LazySequence):
+                    value = value.items
+                    self.assertFalse(None in value)
+                for child in value:
+                    check(child)
+
+        check(self.frozen)
+
+    def testFreezingAFrozenDocumentReturnsIt(self):
+        self.assertTrue(self.frozen.freeze() is self.frozen)
+
+    def testReadsFromThreads(self):
+        import threading
+        results = []
+
+        def read():
+            urls = [order.url() for order in self.frozen.embedded['r:order']]
+            results.append((urls, self.frozen.etag(),
+                            self.frozen.links['self'].url()))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected = (["http://localhost/orders/1", "http://localhost/orders/2"],
+                    self.doc.etag(), "http://localhost/orders")
+        self.assertEquals([expected] * 8, results)
+
+
+class CloneTests(unittest.TestCase):
+    OBJECT = ProjectionTests.OBJECT
+
+    def setUp(self):
+        self.doc = self.make_doc(self.OBJECT)
+        self.doc.fingerprint()
+        self.clone = self.doc.clone()
+
+    def make_doc(self, o):
+        return dougrain.Document.from_object(json.loads(json.dumps(o)),
+                                             "http://localhost/")
+
+    def assertUnchanged(self, doc):
+        self.assertEquals(self.OBJECT, doc.as_object())
+        self.assertEquals(self.make_doc(self.OBJECT).fingerprint(),
+                          doc.fingerprint())
+
+    def assertFingerprintIsFresh(self, doc):
+        self.assertEquals(self.make_doc(doc.as_object()).fingerprint(),
+                          doc.fingerprint())
+
+    def order(self, doc, index=0):
+        return doc.embedded['r:order'][index]
+
+    def testCloneSharesObject(self):
+        self.assertTrue(self.clone.o is self.doc.o)
+        self.assertEquals(self.doc, self.clone)
+
+    def testEditingCloneLeavesOriginal(self):
+        mutations = [
+            lambda doc: doc.set_property('count', 3),
+            lambda doc: doc.delete_property('count'),
+            lambda doc: doc.add_link('self', "/orders?page=1"),
+            lambda doc: doc.add_link('next', "/orders?page=2"),
+            lambda doc: doc.delete_link('self'),
+            lambda doc: doc.embed('r:order', self.make_doc({'total': 1})),
+            lambda doc: doc.delete_embedded('r:order',
+                                            "http://localhost/orders/2"),
+            lambda doc: doc.delete_embedded(),
+            lambda doc: doc.set_curie('s', "/s/{rel}"),
+            lambda doc: doc.drop_curie('r'),
+            lambda doc: self.order(doc).set_property('total', 11),
+            lambda doc: self.order(doc).embedded['r:line']
+            .add_link('next', "/lines/2"),
+        ]
+        for mutate in mutations:
+            doc = self.make_doc(self.OBJECT)
+            doc.fingerprint()
+            clone = doc.clone()
+            mutate(clone)
+            self.assertUnchanged(doc)
+            self.assertNotEquals(doc, clone)
+            self.assertFingerprintIsFresh(clone)
+
+    def testEditingOriginalLeavesClone(self):
+        self.doc.set_property('count', 3)
+        self.order(self.doc).embedded['r:line'].set_property('quantity', 2)
+        self.assertUnchanged(self.clone)
+        self.assertFingerprintIsFresh(self.doc)
+
+    def testOnlyChangedPathIsCopied(self):
+        order = self.order(self.clone)
+        order.embedded['r:line'].set_property('quantity', 2)
+
+        original = self.doc.o['_embedded']
+        copied = self.clone.o['_embedded']
+        self.assertFalse(copied is original)
+        self.assertFalse(copied['r:order'] is original['r:order'])
+        self.assertFalse(copied['r:order'][0] is original['r:order'][0])
+        self.assertTrue(copied['r:order'][1] is original['r:order'][1])
+        self.assertTrue(copied['r:customer'] is original['r:customer'])
+        self.assertTrue(self.clone.o['_links'] is self.doc.o['_links'])
+        self.assertTrue(copied['r:order'][0]['_links'] is
+                        original['r:order'][0]['_links'])
+
+    def testRepeatedEditsCopyOnce(self):
+        self.clone.set_property('count', 3)
+        o = self.clone.o
+        self.clone.set_property('count', 4)
+        self.assertTrue(self.clone.o is o)
+
+    def testCloneOfClone(self):
+        self.clone.set_property('count', 3)
+        second = self.clone.clone()
+        second.set_property('count', 4)
+        self.assertEquals(3, self.clone.properties['count'])
+        self.assertEquals(4, second.properties['count'])
+        self.assertUnchanged(self.doc)
+
+    def testEarlierEmbeddedDocumentSeesCopy(self):
+        old = self.order(self.doc, 1)
+        self.doc.embed('r:extra', self.make_doc({'total': 1}))
+        new = self.order(self.doc, 1)
+        new.set_property('a', 1)
+        old.set_property('b', 2)
+        order = self.doc.o['_embedded']['r:order'][1]
+        self.assertEquals((1, 2), (order['a'], order['b']))
+        self.assertUnchanged(self.clone)
+
+    def testEarlierEmbeddedDocumentOfProjection(self):
+        projected = self.doc.project(properties=['count'])
+        old = self.order(projected, 1)
+        projected.embed('r:extra', self.make_doc({'total': 1}))
+        self.order(projected, 1).set_property('a', 1)
+        old.set_property('b', 2)
+        order = projected.o['_embedded']['r:order'][1]
+        self.assertEquals((1, 2), (order['a'], order['b']))
+        self.assertUnchanged(self.doc)
+
+    def testRemovedEmbeddedDocumentRaises(self):
+        customer = self.clone.embedded['r:customer']
+        self.clone.delete_embedded('r:customer')
+        self.assertRaises(ValueError, customer.set_property, 'name', "Bob")
+        self.assertUnchanged(self.doc)
+
+    def testCloneOfFrozenDocument(self):
+        frozen = self.doc.freeze()
+        table = dict(frozen._digest_table)
+        clone = frozen.clone()
+        self.assertFalse(isinstance(clone, dougrain.FrozenDocument))
+        self.order(clone).set_property('total', 11)
+        self.assertFingerprintIsFresh(clone)
+        self.assertUnchanged(frozen)
+        self.assertEquals(table, frozen._digest_table)
+
+
 class AttributeMutationTests(unittest.TestCase):
     def testSetAttributeAddsAttribute(self):
         doc = dougrain.Document.empty()
@@ -633,6 +1210,35 @@ class AttributeMutationTests(unittest.TestCase):
 
         self.assertEquals(target_doc.as_object(), doc.as_object())
 
+    def testPropertiesViewReflectsMutations(self):
+        doc = dougrain.Document.empty()
+        properties = doc.properties
+
+        doc.set_property('foo', "bar")
+        doc.set_property('spam', "eggs")
+        doc.delete_property('foo')
+
+        self.assertTrue(properties is doc.properties)
+        self.assertEquals({'spam': "eggs"}, properties)
+
+    def testPropertiesViewHidesReservedNames(self):
+        doc = dougrain.Document.from_object({
+            '_links': {'self': {'href': "/1"}},
+            '_embedded': {'item': {'name': "Item"}},
+            'name': "Collection"
+        })
+
+        self.assertEquals(['name'], list(doc.properties))
+        self.assertEquals(1, len(doc.properties))
+        self.assertFalse('_links' in doc.properties)
+        with self.assertRaises(KeyError):
+            doc.properties['_embedded']
+
+    def testPropertiesViewIsReadOnly(self):
+        doc = dougrain.Document.empty()
+        with self.assertRaises(TypeError):
+            doc.properties['foo'] = "bar"
+
 
 #
 
@@ -754,6 +1360,62 @@ class AddLinkStringTests(unittest.TestCase):
 #
 
 
+class AddLinksTests(unittest.TestCase):
+    def testAddLinksMatchesRepeatedAddLink(self):
+        hrefs = ["/1", "/2", "/3"]
+        expected_doc = dougrain.Document.empty("http://localhost/")
+        for href in hrefs:
+            expected_doc.add_link('item', href, title="Item")
+
+        doc = dougrain.Document.empty("http://localhost/")
+        doc.add_links('item', hrefs, title="Item")
+
+        self.assertEquals(expected_doc.as_object(), doc.as_object())
+
+    def testAddLinksAppendsToSynonymousRel(self):
+        doc = dougrain.Document.empty("http://localhost/")
+        doc.set_curie('rel', "/rels/{rel}")
+        doc.add_link('/rels/item', "/1")
+        doc.add_links('rel:item', ["/2", dougrain.Builder("/3")])
+
+        self.assertEquals(["/1", "/2", "/3"],
+                          [link.href for link in doc.links['rel:item']])
+
+    def testAddLinksWrapsSingleLink(self):
+        doc = dougrain.Document.empty("http://localhost/")
+        doc.add_links('item', ["/1"], wrap=True)
+
+        self.assertEquals({'_links': {'item': [{'href': "/1"}]}},
+                          doc.as_object())
+
+    def stale_children(self):
+        parent = dougrain.Document.from_object(
+            {'_embedded': {'item': {'_links': {'self': {'href': "/i"}}}}},
+            "http://localhost/")
+        old = parent.embedded['item']
+        old.add_link('prev', "/p")
+        old.embed('part', dougrain.Document.from_object({'n': 0}))
+        parent.embed('other', dougrain.Document.empty())
+        return parent, old, parent.embedded['item']
+
+    def testStaleIndexDoesNotReplaceLinks(self):
+        parent, old, new = self.stale_children()
+        new.add_link('next', "/n1")
+        old.add_link('next', "/n2")
+        self.assertEquals([{'href': "/n1"}, {'href': "/n2"}],
+                          parent.o['_embedded']['item']['_links']['next'])
+
+    def testStaleIndexDoesNotReplaceEmbedded(self):
+        parent, old, new = self.stale_children()
+        new.embed('extra', dougrain.Document.from_object({'n': 1}))
+        old.embed('extra', dougrain.Document.from_object({'n': 2}))
+        self.assertEquals([{'n': 1}, {'n': 2}],
+                          parent.o['_embedded']['item']['_embedded']['extra'])
+
+
+#
+
+
 class AddObjectLinkTests(AddLinkStringTests):
     def add_link(self, doc, rel, href, wrap=False, **kwargs):
         link = doc.link(href, **kwargs)
@@ -1032,6 +1694,30 @@ class EmbedTestMixin(object):
         self.assertEquals(self.EXPECTED_WITH_SELF_LINK,
                           self.doc.as_object())
 
+    def testEmbedManyMatchesRepeatedEmbed(self):
+        others = [self.embedded1, self.embedded_with_self, self.embedded2]
+        expected_doc = dougrain.Document.empty("http://localhost/",
+                                               draft=self.DRAFT)
+        for other in others:
+            expected_doc.embed('item', other)
+
+        self.doc.embed_many('item', others)
+
+        self.assertEquals(expected_doc.as_object(), self.doc.as_object())
+
+    def testEmbedManyMergesSynonymousRels(self):
+        self.doc.set_curie('rel', "/rels/{rel}")
+        self.doc.embed('rel:item', self.embedded1)
+        self.doc.embed_many('/rels/item', [self.embedded2, self.embedded3])
+
+        self.assertEquals([self.embedded1, self.embedded2, self.embedded3],
+                          self.doc.embedded['rel:item'])
+        self.assertFalse('/rels/item' in self.doc.as_object()['_embedded'])
+
+    def testEmbedManyWithNoDocumentsDoesNothing(self):
+        self.doc.embed_many('item', [])
+        self.assertEquals({}, self.doc.as_object())
+
 
 class EmbedTestDraft5(EmbedTestMixin, unittest.TestCase):
     DRAFT = dougrain.drafts.DRAFT_5
@@ -1058,6 +1744,16 @@ class EmbedTestDraft5(EmbedTestMixin, unittest.TestCase):
         self.assertEquals(self.EXPECTED_WITH_SELF_LINK_WRAPPED,
                           self.doc.as_object())
 
+    def testEmbedManyAddsOneLinkPerUrl(self):
+        duplicate = dougrain.Document.from_object(
+            {"_links": {"self": {"href": "/test"}}, "spam": "eggs"},
+            draft=self.DRAFT)
+
+        self.doc.embed_many('item', [self.embedded_with_self, duplicate])
+
+        self.assertEquals({'href': "/test"},
+                          self.doc.as_object()['_links']['item'])
+
 
 class EmbedTestDraft4(EmbedTestMixin, unittest.TestCase):
     DRAFT = dougrain.drafts.DRAFT_4
@@ -1494,6 +2190,40 @@ class LinkCanonicalizationTestsMixin(object):
             set(["/apps/1", "/apps/2", "/apps/3"]),
             set(link.href for link in self.doc.links["role:app"]))
 
+    def testAddsNewRelAfterDeletingSynonymousRel(self):
+        self.doc.add_link("role:app", "/apps/1")
+        self.doc.delete_link("role:app")
+        self.doc.add_link("/roles/app", "/apps/2")
+
+        self.assertFalse("role:app" in self.doc.as_object()['_links'])
+        self.assertEquals({"href": "/apps/2"},
+                          self.doc.as_object()['_links']["/roles/app"])
+
+    def testMergesIntoRemainingSynonymousRelAfterDelete(self):
+        links = dict(self.CURIES)
+        links.update({
+            "role:app": {"href": "/apps/1"},
+            "/roles/app": {"href": "/apps/2"},
+        })
+
+        self.doc = dougrain.Document.from_object(
+            {"_links": links},
+            base_uri="http://localhost/1",
+            draft=self.DRAFT)
+        self.doc.delete_link("role:app")
+        self.doc.add_link("http://localhost/roles/app", "/apps/3")
+
+        self.assertEquals([{"href": "/apps/2"}, {"href": "/apps/3"}],
+                          self.doc.as_object()['_links']["/roles/app"])
+
+    def testMergesLinksAddedBeforeCurieWasSet(self):
+        self.doc.add_link("http://localhost/roles/spam", "/spam/1")
+        self.doc.set_curie("ham", "/roles/{rel}")
+        self.doc.add_link("ham:spam", "/spam/2")
+
+        self.assertEquals(["/spam/1", "/spam/2"],
+                          [link.href for link in self.doc.links["ham:spam"]])
+
 
 class LinkCanonicalizationTestsDraft5(LinkCanonicalizationTestsMixin,
                                       unittest.TestCase):
@@ -1587,6 +2317,23 @@ class EdgeCasesTests(unittest.TestCase):
         doc.add_link('self', "/2")
         self.assertEquals("http://localhost/1", doc.url())
 
+    def testUrlDoesNotBuildLinks(self):
+        doc = dougrain.Document.from_object(
+            {'_links': {'self': {'href': "/1"}, 'next': {'href': "/2"}}},
+            "http://localhost")
+        self.assertEquals("http://localhost/1", doc.url())
+        self.assertIsNone(doc._links_cache)
+
+    def testUrlFollowsChangesToSelfLink(self):
+        doc = dougrain.Document.empty("http://localhost")
+        self.assertIsNone(doc.url())
+
+        doc.add_link('self', "/1")
+        self.assertEquals("http://localhost/1", doc.url())
+
+        doc.delete_link('self')
+        self.assertIsNone(doc.url())
+
     def testSetReservedAttributeSilentlyFails(self):
         doc = dougrain.Document.empty("http://localhost")
         doc.set_property('_links', {'self': {'href': "/1"}})
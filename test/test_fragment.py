@@ -0,0 +1,238 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import json
+import unittest
+from dougrain import Builder
+from dougrain import Document
+from dougrain import RawJSON
+from dougrain import drafts
+from dougrain.fragment import Fragment
+from dougrain.fragment import FragmentCache
+
+# Unusual spacing shows that the text is written as it is.
+AUTHOR_TEXT = '{"_links":{"self":{"href":"/authors/1"}},  "name" : "Ann"}'
+
+
+class FragmentTest(unittest.TestCase):
+    def testDecodesBytes(self):
+        fragment = Fragment(AUTHOR_TEXT.encode('utf-8'), "/authors/1")
+        self.assertEquals(AUTHOR_TEXT, fragment.text)
+
+    def testUrl(self):
+        self.assertEquals("/authors/1",
+                          Fragment(AUTHOR_TEXT, "/authors/1").url())
+
+    def testAsObject(self):
+        self.assertEquals(json.loads(AUTHOR_TEXT),
+                          Fragment(AUTHOR_TEXT, "/authors/1").as_object())
+
+
+class RawJSONTest(unittest.TestCase):
+    def testReadsSelfHref(self):
+        self.assertEquals("/authors/1", RawJSON(AUTHOR_TEXT).url())
+
+    def testReadsSelfHrefAfterOtherMembers(self):
+        text = ('{"items": [{"_links": {"self": {"href": "/wrong"}}}],'
+                ' "s": "\\"}", "_links": {"next": {"href": "/next"},'
+                ' "self": {"title": "}", "href": "/right"}}}')
+        self.assertEquals("/right", RawJSON(text).url())
+
+    def testOnlyDecodesLeadingLinks(self):
+        text = '{"_links": {"self": {"href": "/a"}}, "rest": not decoded}'
+        self.assertEquals("/a", RawJSON(text).url())
+
+    def testOnlyDecodesLeadingSelfHref(self):
+        text = '{ "_links" : { "self" : { "href" : "/a", "title": not'
+        self.assertEquals("/a", RawJSON(text).url())
+
+    def testReadsSelfHrefAfterOtherLinks(self):
+        text = ('{"_links": {"curies": [{"name": "x", "href": "/{rel}"}],'
+                ' "self": {"title": "T", "href": "/a"}}, "rest": not}')
+        self.assertEquals("/a", RawJSON(text).url())
+
+    def testReadsFirstSelfHrefFromArray(self):
+        text = '{"_links": {"self": [{"href": "/a"}, {"href": "/b"}]}}'
+        self.assertEquals("/a", RawJSON(text).url())
+
+    def testDecodesEscapedHref(self):
+        text = '{"_links": {"self": {"href": "/caf\\u00e9"}}}'
+        self.assertEquals(u"/caf\xe9", RawJSON(text).url())
+
+    def testNoSelfLink(self):
+        for text in ['{}', '{"name": "Ann"}', '{"_links": {}}',
+                     '{"_links": {"self": []}}', '{"_links": null}']:
+            self.assertEquals(None, RawJSON(text).url())
+
+    def testGivenHrefIsUsed(self):
+        self.assertEquals("/given", RawJSON(AUTHOR_TEXT, "/given").url())
+
+    def testNotAnObject(self):
+        self.assertRaises(ValueError, RawJSON('[1, 2]').url)
+        self.assertRaises(ValueError, RawJSON('{"_links": ').url)
+
+
+class RawJSONPropertyTest(unittest.TestCase):
+    def setUp(self):
+        self.builder = Builder("/posts/1")
+        self.builder.set_property('tags', RawJSON(b'[ "a",  "b" ]'))
+
+    def testDumpsSplicesText(self):
+        text = self.builder.dumps()
+        self.assertTrue('"tags":[ "a",  "b" ]' in text)
+        self.assertEquals(["a", "b"], json.loads(text)['tags'])
+
+    def testIterJsonSplicesText(self):
+        text = ''.join(self.builder.iter_json())
+        self.assertTrue('"tags":[ "a",  "b" ]' in text)
+
+    def testAsObjectDecodesText(self):
+        self.assertEquals(["a", "b"], self.builder.as_object()['tags'])
+
+    def testPropertyOfEmbeddedBuilder(self):
+        outer = Builder("/posts").embed('item', self.builder)
+        self.assertTrue('[ "a",  "b" ]' in outer.dumps())
+        self.assertEquals(["a", "b"], outer.as_object()
+                          ['_embedded']['item']['tags'])
+
+    def testNestedPropertyValue(self):
+        builder = Builder("/posts").set_property(
+            'meta', {'tags': RawJSON('[ "a" ]'), 'n': [RawJSON('1')]})
+        self.assertEquals({'tags': ["a"], 'n': [1]},
+                          builder.as_object()['meta'])
+
+    def testPropertyAddedAfterEmbedding(self):
+        child = Builder("/child")
+        outer = Builder("/outer").embed('child', child)
+        child.set_property('blob', RawJSON('{"x":1}'))
+        self.assertEquals({'x': 1}, outer.as_object()
+                          ['_embedded']['child']['blob'])
+
+    def testDocumentDumpsSplicesText(self):
+        doc = Document.from_object({'_links': {'self': {'href': '/'}}})
+        doc.set_property('tags', RawJSON('[ "a" ]'))
+        self.assertTrue('"tags":[ "a" ]' in doc.dumps())
+
+
+    def testDocumentEmbedRejectsRawJSON(self):
+        for draft in [drafts.DRAFT_4, drafts.DRAFT_5]:
+            doc = Document.from_object({'_links': {'self': {'href': '/'}}},
+                                       draft=draft)
+            fragment = Fragment(AUTHOR_TEXT, "/authors/1")
+            self.assertRaises(TypeError, doc.embed, 'author', fragment)
+            self.assertRaises(TypeError, doc.embed_many, 'author',
+                              [Document.empty(), fragment])
+            self.assertEquals({'self': {'href': '/'}},
+                              doc.as_object()['_links'])
+            self.assertFalse('_embedded' in doc.as_object())
+
+class FragmentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = FragmentCache(2)
+        self.built = []
+
+    def build(self, name):
+        def build():
+            self.built.append(name)
+            return Builder("/authors/%s" % name).set_property('name', name)
+        return build
+
+    def testFetchBuildsOnce(self):
+        first = self.cache.fetch("/authors/ann", "v1", self.build("ann"))
+        second = self.cache.fetch("/authors/ann", "v1", self.build("ann"))
+        self.assertTrue(first is second)
+        self.assertEquals(["ann"], self.built)
+        self.assertEquals({'_links': {'self': {'href': "/authors/ann"}},
+                           'name': "ann"}, json.loads(first.text))
+        self.assertEquals("/authors/ann", first.url())
+
+    def testVersionsAreSeparate(self):
+        self.cache.fetch("/authors/ann", "v1", self.build("ann"))
+        self.cache.fetch("/authors/ann", "v2", self.build("ann"))
+        self.assertEquals(["ann", "ann"], self.built)
+
+    def testHitRate(self):
+        self.cache.fetch("/authors/ann", "v1", self.build("ann"))
+        for _ in range(3):
+            self.cache.fetch("/authors/ann", "v1", self.build("ann"))
+        self.assertEquals(0.75, self.cache.hit_rate())
+        self.assertEquals(3, self.cache.stats()['hits'])
+
+    def testEvictsLeastRecentlyUsed(self):
+        for name in ["ann", "bob", "cat"]:
+            self.cache.fetch("/authors/" + name, None, self.build(name))
+        self.assertEquals(2, len(self.cache))
+        self.assertEquals(None, self.cache.get("/authors/ann"))
+        self.assertEquals(1, self.cache.stats()['evictions'])
+
+    def testDiscard(self):
+        self.cache.put("/authors/ann", "v1", self.build("ann")())
+        self.cache.discard("/authors/ann", "v1")
+        self.cache.discard("/authors/ann", "v1")
+        self.assertEquals(None, self.cache.get("/authors/ann", "v1"))
+
+
+class EmbedFragmentTest(unittest.TestCase):
+    DRAFT = drafts.DRAFT_4
+
+    def setUp(self):
+        self.fragment = Fragment(AUTHOR_TEXT, "/authors/1")
+        self.builder = Builder("/posts", draft=self.DRAFT)
+
+    def expected(self):
+        builder = Builder("/posts", draft=self.DRAFT)
+        author = Builder("/authors/1").set_property('name', "Ann")
+        builder.embed('author', author)
+        builder.embed('item', author, wrap=True)
+        builder.embed('item', author)
+        return builder.as_object()
+
+    def embed(self):
+        self.builder.embed('author', self.fragment)
+        self.builder.embed('item', self.fragment, wrap=True)
+        self.builder.embed_iter('item', [self.fragment])
+
+    def testDumpsSplicesText(self):
+        self.embed()
+        text = self.builder.dumps()
+        self.assertEquals(3, text.count(AUTHOR_TEXT))
+        self.assertEquals(self.expected(), json.loads(text))
+
+    def testIterJsonSplicesText(self):
+        self.embed()
+        text = ''.join(self.builder.iter_json())
+        self.assertEquals(3, text.count(AUTHOR_TEXT))
+        self.assertEquals(self.expected(), json.loads(text))
+
+    def testAsObjectDecodesFragments(self):
+        self.embed()
+        self.assertEquals(self.expected(), self.builder.as_object())
+
+    def testFragmentsInEmbeddedBuildersAreSpliced(self):
+        post = Builder("/posts/1").embed('author', self.fragment)
+        self.builder.embed('item', post)
+        text = self.builder.dumps()
+        self.assertEquals(1, text.count(AUTHOR_TEXT))
+        self.assertEquals("Ann", self.builder.as_object()['_embedded']
+                          ['item']['_embedded']['author']['name'])
+
+    def testMarkerLikeStringsAreLeftAlone(self):
+        self.builder.set_property('note', "__dougrain_fragment_0_0__")
+        self.builder.embed('author', self.fragment)
+        obj = json.loads(self.builder.dumps())
+        self.assertEquals("__dougrain_fragment_0_0__", obj['note'])
+
+
+class EmbedFragmentDraft5Test(EmbedFragmentTest):
+    DRAFT = drafts.DRAFT_5
+
+
+class EmbedRawJSONTest(EmbedFragmentTest):
+    def setUp(self):
+        super(EmbedRawJSONTest, self).setUp()
+        self.fragment = RawJSON(AUTHOR_TEXT.encode('utf-8'))
+
+
+class EmbedRawJSONDraft5Test(EmbedRawJSONTest):
+    DRAFT = drafts.DRAFT_5
@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import json
+import unittest
+from dougrain import jsonbackend
+
+
+class BackendTestMixin(object):
+    OBJECT = {"_links": {"self": {"href": u"/caf\xe9/1"}},
+              "count": 3, "ratio": 0.5, "tags": ["a", "b"], "missing": None,
+              "ok": True}
+
+    def setUp(self):
+        self.backend = jsonbackend.get_backend(self.NAME)
+
+    def testRoundTrip(self):
+        text = self.backend.dumps(self.OBJECT)
+        self.assertEquals(self.OBJECT, self.backend.loads(text))
+
+    def testDumpsCompactText(self):
+        text = self.backend.dumps({"a": [1, 2], "b": u"/c\xe9"})
+        self.assertEquals({"a": [1, 2], "b": u"/c\xe9"}, json.loads(text))
+        self.assertFalse(' ' in text)
+        self.assertTrue(u"/c\xe9" in text)
+
+    def testLoadsBytes(self):
+        data = json.dumps(self.OBJECT).encode('utf-8')
+        self.assertEquals(self.OBJECT, self.backend.loads(data))
+
+    def testDumpsWithDefault(self):
+        class Thing(object):
+            pass
+
+        text = self.backend.dumps({"thing": Thing()},
+                                  default=lambda o: "thing")
+        self.assertEquals({"thing": "thing"}, json.loads(text))
+
+
+class StandardBackendTest(BackendTestMixin, unittest.TestCase):
+    NAME = 'json'
+
+
+@unittest.skipIf(jsonbackend.orjson is None, "orjson is not installed")
+class OrjsonBackendTest(BackendTestMixin, unittest.TestCase):
+    NAME = 'orjson'
+
+
+@unittest.skipIf(jsonbackend.ujson is None, "ujson is not installed")
+class UjsonBackendTest(BackendTestMixin, unittest.TestCase):
+    NAME = 'ujson'
+
+
+class SelectBackendTest(unittest.TestCase):
+    def tearDown(self):
+        jsonbackend.set_default_backend(jsonbackend.available_backends()[0])
+
+    def testStandardBackendIsAlwaysAvailable(self):
+        self.assertTrue('json' in jsonbackend.available_backends())
+
+    def testDefaultIsFastestAvailable(self):
+        self.assertEquals(jsonbackend.available_backends()[0],
+                          jsonbackend.get_backend().name)
+
+    def testSetDefaultBackend(self):
+        jsonbackend.set_default_backend('json')
+        self.assertEquals('json', jsonbackend.get_backend().name)
+
+    def testBackendInstanceIsReturned(self):
+        backend = jsonbackend.StandardBackend()
+        self.assertTrue(backend is jsonbackend.get_backend(backend))
+
+    def testUnknownBackend(self):
+        self.assertRaises(ValueError, jsonbackend.get_backend, "nosuchjson")
+        self.assertRaises(ValueError, jsonbackend.set_default_backend,
+                          "nosuchjson")
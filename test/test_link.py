@@ -2,6 +2,7 @@
 # Copyright (c) 2013 Will Harris
 # See the file license.txt for copying permission.
 
+import datetime
 import unittest
 from dougrain import link
 
@@ -78,6 +79,79 @@ class TestParseAdditionalAttributes(unittest.TestCase):
         self.assertEquals("/deprecation/foo", self.link.deprecation)
 
 
+class TestCompactRepresentation(unittest.TestCase):
+    def setUp(self):
+        self.link = link.Link({'href': "/foo", 'name': "bar"},
+                              "http://localhost/")
+
+    def testHasNoInstanceDictionary(self):
+        self.assertFalse(hasattr(self.link, '__dict__'))
+
+    def testMissingAttributeRaisesAttributeError(self):
+        self.assertRaises(AttributeError, getattr, self.link, 'type')
+
+    def testReadsAttributesFromObject(self):
+        self.link.o['title'] = "Bar"
+        self.assertEquals("Bar", self.link.title)
+
+    def testTemplateIsResolvedOnFirstUse(self):
+        self.assertEquals(None, self.link._template)
+        self.assertEquals("http://localhost/foo", self.link.template)
+        self.assertEquals("http://localhost/foo", self.link._template)
+
+
+class TestHashing(unittest.TestCase):
+    def make_link(self, **kwargs):
+        return link.Link(dict(href="/foo", **kwargs), "http://localhost/")
+
+    def testEqualLinksHaveEqualHashes(self):
+        first = self.make_link(name="bar", title="Bar")
+        second = link.Link({'title': "Bar", 'name': "bar", 'href': "/foo"},
+                           "http://localhost/")
+        self.assertEquals(first, second)
+        self.assertEquals(hash(first), hash(second))
+
+    def testSetsDeduplicateLinks(self):
+        links = [self.make_link(), self.make_link(name="bar"),
+                 self.make_link(), self.make_link(name="bar")]
+        self.assertEquals(2, len(set(links)))
+        self.assertTrue(self.make_link(name="bar") in set(links))
+        self.assertFalse(self.make_link(name="baz") in set(links))
+
+    def testUsableAsDictionaryKey(self):
+        counts = {self.make_link(): 1}
+        self.assertEquals(1, counts[self.make_link()])
+
+    def testHashIsCached(self):
+        first = self.make_link()
+        self.assertEquals(None, first._hash)
+        value = hash(first)
+        self.assertEquals(value, first._hash)
+
+    def testEqualityComparesValues(self):
+        self.assertEquals(self.make_link(n=1), self.make_link(n=1.0))
+        self.assertEquals(hash(self.make_link(n=1)),
+                          hash(self.make_link(n=1.0)))
+
+    def testNonJSONValues(self):
+        first = self.make_link(d=datetime.date(2013, 1, 1))
+        self.assertEquals(first, self.make_link(d=datetime.date(2013, 1, 1)))
+        self.assertNotEquals(first, self.make_link())
+        self.assertEquals(hash(first),
+                          hash(self.make_link(d=datetime.date(2013, 1, 1))))
+
+    def testUnhashableValues(self):
+        first = self.make_link(tags=["a"])
+        self.assertEquals(hash(first), hash(self.make_link(tags=["a"])))
+        self.assertEquals(1, len(set([first, self.make_link(tags=["a"])])))
+        self.assertEquals(2, len(set([first, self.make_link(tags=["b"])])))
+
+    def testNotEqual(self):
+        self.assertTrue(self.make_link() != self.make_link(name="bar"))
+        self.assertFalse(self.make_link() != self.make_link())
+        self.assertTrue(self.make_link() != {'href': "/foo"})
+
+
 class TestExpandTemplatedLink(unittest.TestCase):
     def setUp(self):
         self.link = link.Link(
@@ -101,6 +175,19 @@ class TestExpandTemplatedLink(unittest.TestCase):
     def testPreservesTemplate(self):
         self.assertEquals("http://localhost/foo/{arg1}", self.link.template)
 
+    def testSubstituteBatchOfArgs(self):
+        self.assertEquals(["http://localhost/foo/1",
+                           "http://localhost/foo/",
+                           "http://localhost/foo/a%20b"],
+                          self.link.urls([{'arg1': 1}, {}, {'arg1': "a b"}]))
+
+    def testSharesCompiledTemplateWithSameTemplate(self):
+        other = link.Link({'href': "http://localhost/foo/{arg1}",
+                           'templated': True},
+                          None)
+        self.assertTrue(self.link.compiled_template is
+                        other.compiled_template)
+
 
 class TestDoNotExpandNonTemplateLinks(unittest.TestCase):
     def setUp(self):
@@ -121,6 +208,10 @@ class TestDoNotExpandNonTemplateLinks(unittest.TestCase):
         self.assertEquals("http://localhost/foo/{arg1}",
                           self.link.url(arg1="1-bar"))
 
+    def testSubstituteBatchOfArgs(self):
+        self.assertEquals(["http://localhost/foo/{arg1}"] * 2,
+                          self.link.urls([{'arg1': 1}, {'arg1': 2}]))
+
     def testPreservesTemplate(self):
         self.assertEquals("http://localhost/foo/{arg1}", self.link.template)
 
@@ -213,6 +304,22 @@ class TestExtractVariablesFromLink(unittest.TestCase):
         self.assertVariables("keys", "{&keys}")
         self.assertVariables("keys", "{&keys*}")
 
+    def testRepeatedVariablesAreListedOnce(self):
+        self.assertVariables("x y", "{x}/{y}{?x,y}")
+
+    def testUnclosedExpressionIsLiteral(self):
+        self.assertVariables([], "/items{")
+        self.assertVariables("x", "{x}/items{y")
+
+    def testLongUnclosedExpression(self):
+        href = "{" + "a" * 100000
+        self.assertEquals([], link.extract_variables(href))
+
+    def testManyVariables(self):
+        names = ["v%d" % i for i in range(10000)]
+        href = "{?" + ",".join(names + names) + "}"
+        self.assertEquals(names, link.extract_variables(href))
+
 
 class TestIteration(unittest.TestCase):
     def testASingleLinkCanBeIterated(self):
@@ -0,0 +1,358 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import json
+import unittest
+from dougrain import Document
+from dougrain import FrozenDocument
+from dougrain import patch
+
+
+def make_doc(o):
+    return Document.from_object(json.loads(json.dumps(o)),
+                                "http://localhost/")
+
+
+def order(n, total=10):
+    return {'_links': {'self': {'href': "/orders/%d" % n}}, 'total': total}
+
+
+class PointerTests(unittest.TestCase):
+    def testEscapesTokens(self):
+        self.assertEquals("/_links/a~1b~0c",
+                          patch.pointer(("_links", "a/b~c")))
+
+    def testIndex(self):
+        self.assertEquals("/items/3", patch.pointer(("items", 3)))
+
+    def testRoot(self):
+        self.assertEquals("", patch.pointer(()))
+
+    def testUnescapeReversesEscape(self):
+        self.assertEquals("a/b~c", patch.unescape(patch.escape("a/b~c")))
+
+    def testUnicodeToken(self):
+        self.assertEquals(u"/caf\xe9", patch.pointer((u"caf\xe9",)))
+
+
+class IncreasingSubsequenceTests(unittest.TestCase):
+    def testEmpty(self):
+        self.assertEquals([], patch.increasing_subsequence([]))
+
+    def testSorted(self):
+        self.assertEquals([0, 1, 2], patch.increasing_subsequence([3, 5, 9]))
+
+    def testLongest(self):
+        values = [4, 0, 1, 9, 2, 3]
+        indexes = patch.increasing_subsequence(values)
+        self.assertEquals([0, 1, 2, 3], [values[i] for i in indexes])
+
+
+class SlotCountsTests(unittest.TestCase):
+    def testCountsOccupiedSlotsBefore(self):
+        counts = patch.SlotCounts(6)
+        for slot in (0, 2, 3, 5):
+            counts.add(slot, 1)
+        counts.add(2, -1)
+        self.assertEquals([0, 1, 1, 1, 2, 2],
+                          [counts.before(slot) for slot in range(6)])
+
+
+class DiffTests(unittest.TestCase):
+    def assertPatches(self, a, b, operations):
+        self.assertEquals(operations, patch.diff(a, b))
+        self.assertEquals(b, patch.apply(a, operations))
+
+    def testEqual(self):
+        o = {'_links': {'self': {'href': "/"}}, 'name': "x"}
+        self.assertEquals([], patch.diff(o, json.loads(json.dumps(o))))
+
+    def testProperties(self):
+        self.assertPatches(
+            {'a': 1, 'b': {'c': 2, 'd': 3}, 'e': 4},
+            {'a': 1, 'b': {'c': 5}, 'f': 6},
+            [{'op': 'remove', 'path': "/e"},
+             {'op': 'remove', 'path': "/b/d"},
+             {'op': 'replace', 'path': "/b/c", 'value': 5},
+             {'op': 'add', 'path': "/f", 'value': 6}])
+
+    def testBooleanIsNotNumber(self):
+        self.assertPatches({'a': 1}, {'a': True},
+                           [{'op': 'replace', 'path': "/a", 'value': True}])
+
+    def testPropertyArrays(self):
+        self.assertPatches({'a': [1, 2, 3]}, {'a': [1, 4]},
+                           [{'op': 'replace', 'path': "/a/1", 'value': 4},
+                            {'op': 'remove', 'path': "/a/2"}])
+
+    def testSingleLinkIsOneElementArray(self):
+        a = {'_links': {'next': {'href': "/2"}}}
+        b = {'_links': {'next': [{'href': "/2"}]}}
+        self.assertEquals([], patch.diff(a, b))
+        self.assertEquals([], patch.diff(b, a))
+
+    def testSingleLinkToOneElementArrayWithChange(self):
+        a = {'_links': {'next': {'href': "/2"}}}
+        b = {'_links': {'next': [{'href': "/2", 'title': "Next"}]}}
+        self.assertEquals([{'op': 'add', 'path': "/_links/next/title",
+                            'value': "Next"}],
+                          patch.diff(a, b))
+
+    def testSingleLinkToArray(self):
+        a = {'_links': {'item': {'href': "/1"}}}
+        b = {'_links': {'item': [{'href': "/1"}, {'href': "/2"}]}}
+        self.assertPatches(a, b, [
+            {'op': 'replace', 'path': "/_links/item",
+             'value': [{'href': "/1"}]},
+            {'op': 'add', 'path': "/_links/item/1", 'value': {'href': "/2"}},
+        ])
+
+    def testArrayToSingleLink(self):
+        a = {'_links': {'item': [{'href': "/1"}, {'href': "/2"}]}}
+        b = {'_links': {'item': {'href': "/2"}}}
+        operations = patch.diff(a, b)
+        self.assertEquals([{'op': 'remove', 'path': "/_links/item/0"}],
+                          operations)
+        self.assertEquals({'_links': {'item': [{'href': "/2"}]}},
+                          patch.apply(a, operations))
+
+    def testLinksMatchedByHref(self):
+        a = {'_links': {'item': [{'href': "/1"}, {'href': "/2"},
+                                 {'href': "/3"}]}}
+        b = {'_links': {'item': [{'href': "/2", 'title': "Two"},
+                                 {'href': "/3"}, {'href': "/4"}]}}
+        self.assertPatches(a, b, [
+            {'op': 'remove', 'path': "/_links/item/0"},
+            {'op': 'add', 'path': "/_links/item/0/title", 'value': "Two"},
+            {'op': 'add', 'path': "/_links/item/2", 'value': {'href': "/4"}},
+        ])
+
+    def testEmbeddedMatchedBySelfLink(self):
+        a = {'_embedded': {'order': [order(1), order(2), order(3)]}}
+        b = {'_embedded': {'order': [order(3), order(1), order(2, 20)]}}
+        self.assertPatches(a, b, [
+            {'op': 'move', 'from': "/_embedded/order/2",
+             'path': "/_embedded/order/0"},
+            {'op': 'replace', 'path': "/_embedded/order/2/total",
+             'value': 20},
+        ])
+
+    def testMovesOnlyWhatIsOutOfOrder(self):
+        a = {'_embedded': {'order': [order(i) for i in range(100)]}}
+        items = [order(i) for i in range(100)]
+        items.insert(70, items.pop(3))
+        items.insert(10, items.pop(90))
+        b = {'_embedded': {'order': items}}
+        operations = patch.diff(a, b)
+        self.assertEquals(2, len(operations))
+        self.assertEquals(set(['move']), set(op['op'] for op in operations))
+        self.assertEquals(b, patch.apply(a, operations))
+
+    def testMovedItemsFollowingEachOther(self):
+        a = {'_embedded': {'order': [order(i) for i in range(10)]}}
+        items = [order(i) for i in [0, 8, 6, 1, 2, 9, 3, 4, 5, 7]]
+        b = {'_embedded': {'order': items}}
+        operations = patch.diff(a, b)
+        self.assertEquals(3, len(operations))
+        self.assertEquals(b, patch.apply(a, operations))
+
+    def testReplacesArrayWhenMostItemsMove(self):
+        a = {'_embedded': {'order': [order(i) for i in range(10)]}}
+        b = {'_embedded': {'order': [order(i) for i in reversed(range(10))]}}
+        self.assertPatches(a, b, [{'op': 'replace',
+                                   'path': "/_embedded/order",
+                                   'value': b['_embedded']['order']}])
+
+    def testEmbeddedWithoutSelfComparedByPosition(self):
+        a = {'_embedded': {'x': [{'n': 1}, {'n': 2}]}}
+        b = {'_embedded': {'x': [{'n': 2}]}}
+        self.assertPatches(a, b, [
+            {'op': 'replace', 'path': "/_embedded/x/0/n", 'value': 2},
+            {'op': 'remove', 'path': "/_embedded/x/1"},
+        ])
+
+    def testDuplicateHrefsComparedByPosition(self):
+        a = {'_links': {'x': [{'href': "/1", 'name': "a"},
+                              {'href': "/1", 'name': "b"}]}}
+        b = {'_links': {'x': [{'href': "/1", 'name': "b"}]}}
+        self.assertPatches(a, b, [
+            {'op': 'replace', 'path': "/_links/x/0/name", 'value': "b"},
+            {'op': 'remove', 'path': "/_links/x/1"},
+        ])
+
+    def testNestedEmbedded(self):
+        inner_a = order(1)
+        inner_a['_embedded'] = {'line': [{'_links': {'self': {'href': "/l"}},
+                                          'qty': 1}]}
+        inner_b = json.loads(json.dumps(inner_a))
+        inner_b['_embedded']['line'] = {'_links': {'self': {'href': "/l"}},
+                                        'qty': 2}
+        a = {'_embedded': {'order': inner_a}}
+        b = {'_embedded': {'order': inner_b}}
+        self.assertEquals(
+            [{'op': 'replace',
+              'path': "/_embedded/order/_embedded/line/0/qty", 'value': 2}],
+            patch.diff(a, b))
+
+    def testEqualSkipsEmbedded(self):
+        a = {'_embedded': {'order': [order(1), order(2)]}}
+        b = {'_embedded': {'order': [order(1, 11), order(2, 22)]}}
+        skipped = a['_embedded']['order'][0]
+        self.assertEquals(
+            [{'op': 'replace', 'path': "/_embedded/order/1/total",
+              'value': 22}],
+            patch.diff(a, b, lambda x, y: x is skipped))
+
+    def testRelWithSlash(self):
+        a = {'_links': {}}
+        b = {'_links': {'http://x/rel': {'href': "/"}}}
+        self.assertPatches(a, b, [{'op': 'add',
+                                   'path': "/_links/http:~1~1x~1rel",
+                                   'value': {'href': "/"}}])
+
+
+class ApplyTests(unittest.TestCase):
+    def testDoesNotChangeOriginal(self):
+        o = {'a': {'b': [1, 2]}, 'c': {'d': 1}}
+        result = patch.apply(o, [{'op': 'add', 'path': "/a/b/-",
+                                  'value': 3}])
+        self.assertEquals({'a': {'b': [1, 2]}, 'c': {'d': 1}}, o)
+        self.assertEquals([1, 2, 3], result['a']['b'])
+        self.assertTrue(result['c'] is o['c'])
+
+    def testMove(self):
+        self.assertEquals({'b': {'c': 1}},
+                          patch.apply({'a': 1, 'b': {}},
+                                      [{'op': 'move', 'from': "/a",
+                                        'path': "/b/c"}]))
+
+    def testCopyIsIndependent(self):
+        result = patch.apply({'a': {'x': 1}},
+                             [{'op': 'copy', 'from': "/a", 'path': "/b"},
+                              {'op': 'add', 'path': "/b/y", 'value': 2}])
+        self.assertEquals({'a': {'x': 1}, 'b': {'x': 1, 'y': 2}}, result)
+
+    def testTest(self):
+        o = {'a': [1, {'b': True}]}
+        self.assertEquals(o, patch.apply(o, [{'op': 'test', 'path': "/a",
+                                              'value': [1, {'b': True}]}]))
+        self.assertRaises(ValueError, patch.apply, o,
+                          [{'op': 'test', 'path': "/a/1/b", 'value': 1}])
+
+    def testReplaceRoot(self):
+        self.assertEquals({'x': 1},
+                          patch.apply({}, [{'op': 'replace', 'path': "",
+                                            'value': {'x': 1}}]))
+
+    def testMissingMember(self):
+        self.assertRaises(ValueError, patch.apply, {},
+                          [{'op': 'remove', 'path': "/a"}])
+
+    def testIndexOutOfRange(self):
+        self.assertRaises(ValueError, patch.apply, {'a': [1]},
+                          [{'op': 'replace', 'path': "/a/1", 'value': 2}])
+
+    def testInvalidIndex(self):
+        self.assertRaises(ValueError, patch.apply, {'a': [1]},
+                          [{'op': 'remove', 'path': "/a/01"}])
+
+    def testMissingValue(self):
+        self.assertRaises(ValueError, patch.apply, {},
+                          [{'op': 'add', 'path': "/a"}])
+
+    def testUnknownOperation(self):
+        self.assertRaises(ValueError, patch.apply, {},
+                          [{'op': 'merge', 'path': "/a"}])
+
+    def testMoveIntoChild(self):
+        self.assertRaises(ValueError, patch.apply, {'a': {}},
+                          [{'op': 'move', 'from': "/a", 'path': "/a/b"}])
+
+
+class DocumentPatchTests(unittest.TestCase):
+    def setUp(self):
+        self.old = make_doc({
+            '_links': {'self': {'href': "/orders"}},
+            'count': 3,
+            '_embedded': {'order': [order(1), order(2), order(3)]},
+        })
+        self.new = make_doc({
+            '_links': {'self': [{'href': "/orders"}]},
+            'count': 2,
+            '_embedded': {'order': [order(3, 30), order(1)]},
+        })
+
+    def testDiffAndApply(self):
+        operations = self.old.diff(self.new)
+        self.assertEquals([
+            {'op': 'replace', 'path': "/count", 'value': 2},
+            {'op': 'remove', 'path': "/_embedded/order/1"},
+            {'op': 'move', 'from': "/_embedded/order/0",
+             'path': "/_embedded/order/1"},
+            {'op': 'replace', 'path': "/_embedded/order/0/total",
+             'value': 30},
+        ], operations)
+        patched = self.old.apply_patch(operations)
+        self.assertEquals([], patched.diff(self.new))
+        self.assertEquals([order(3, 30), order(1)],
+                          patched.as_object()['_embedded']['order'])
+
+    def testApplyPatchLeavesDocumentUnchanged(self):
+        before = self.old.as_object()
+        self.old.apply_patch(self.old.diff(self.new))
+        self.assertEquals(before, self.old.as_object())
+        self.assertEquals(3, len(self.old.embedded['order']))
+
+    def testPatchedDocumentIsCopyOnWrite(self):
+        patched = self.old.apply_patch([])
+        patched.embedded['order'][0].set_property('total', 99)
+        self.assertEquals(10,
+                          self.old.embedded['order'][0].properties['total'])
+        self.old.set_property('count', 4)
+        self.assertEquals(3, patched.properties['count'])
+
+    def testDiffWithItself(self):
+        self.assertEquals([], self.old.diff(self.old))
+
+    def testDiffSkipsEqualFingerprints(self):
+        frozen = self.old.freeze()
+        other = make_doc(self.old.as_object()).freeze()
+        self.assertEquals([], frozen.diff(other))
+
+    def testDiffNotFooledByStaleFingerprint(self):
+        order = make_doc({'total': 1})
+        self.old.embed('extra', order)
+        other = make_doc(self.old.as_object())
+        self.assertEquals([], self.old.diff(other))
+
+        order.set_property('total', 2)
+        self.assertEquals([{'op': 'replace',
+                            'path': "/_embedded/extra/total",
+                            'value': 1}],
+                          self.old.diff(other))
+
+    def testDiffWithChangedFingerprints(self):
+        other = make_doc(self.old.as_object())
+        other.embedded['order'][1].set_property('total', 11)
+        self.old.fingerprint()
+        other.fingerprint()
+        self.assertEquals([{'op': 'replace',
+                            'path': "/_embedded/order/1/total",
+                            'value': 11}],
+                          self.old.diff(other))
+
+    def testFrozenDocument(self):
+        frozen = self.old.freeze()
+        operations = frozen.diff(self.new)
+        patched = frozen.apply_patch(operations)
+        self.assertFalse(isinstance(patched, FrozenDocument))
+        self.assertEquals([], patched.diff(self.new))
+
+    def testInvalidPatch(self):
+        self.assertRaises(ValueError, self.old.apply_patch,
+                          [{'op': 'remove', 'path': "/missing"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import unittest
+from dougrain import Document
+from dougrain import compile_path
+from dougrain import path
+
+
+class CountingDocument(Document):
+    built = []
+
+    def __init__(self, o, *args, **kwargs):
+        CountingDocument.built.append(o)
+        super(CountingDocument, self).__init__(o, *args, **kwargs)
+
+
+def make_doc(cls=Document):
+    return cls.from_object({
+        '_links': {
+            'self': {'href': "/orders"},
+            'curies': [{'name': "ea",
+                        'href': "http://example.com/docs/rels/{rel}",
+                        'templated': True}],
+            'next': [{'href': "/orders?page=2"},
+                     {'href': "/orders?page=2&fast=1"}],
+        },
+        '_embedded': {
+            'ea:order': [{
+                '_links': {'self': {'href': "/orders/123"}},
+                'total': 30,
+                '_embedded': {'ea:customer': {
+                    '_links': {'self': {'href': "/customers/7809"}},
+                }},
+            }, {
+                '_links': {'self': {'href': "/orders/124"}},
+                'total': 20,
+                '_embedded': {'http://example.com/docs/rels/customer': {
+                    '_links': {'self': {'href': "/customers/12369"}},
+                }},
+            }, {
+                '_links': {'self': {'href': "/orders/125"}},
+                'total': 10,
+            }],
+            '/rels/summary': {'count': 3},
+        },
+    }, "http://example.com/")
+
+
+class CompilePathTests(unittest.TestCase):
+    def testSteps(self):
+        compiled = compile_path("ea:order/*/ea:customer/@self")
+        self.assertEquals(["ea:order", "ea:customer", "self"],
+                          [step.rel for step in compiled.steps])
+        self.assertEquals([True, True, False],
+                          [step.embedded for step in compiled.steps])
+        self.assertEquals([None, None, None],
+                          [step.index for step in compiled.steps])
+
+    def testIndex(self):
+        compiled = compile_path("ea:order/2/@self/0")
+        self.assertEquals([2, 0], [step.index for step in compiled.steps])
+
+    def testEscapes(self):
+        compiled = compile_path("http:~1~1example.com~1rels~1a~0b")
+        self.assertEquals("http://example.com/rels/a~b",
+                          compiled.steps[0].rel)
+
+    def testRepr(self):
+        self.assertEquals("compile_path('ea:order/@self')",
+                          repr(compile_path("ea:order/@self")))
+
+    def testEmptyPath(self):
+        self.assertRaises(ValueError, compile_path, "")
+
+    def testEmptyStep(self):
+        self.assertRaises(ValueError, compile_path, "ea:order//@self")
+        self.assertRaises(ValueError, compile_path, "ea:order/@")
+
+    def testLeadingSelector(self):
+        self.assertRaises(ValueError, compile_path, "*/ea:customer")
+        self.assertRaises(ValueError, compile_path, "0")
+
+    def testTwoSelectors(self):
+        self.assertRaises(ValueError, compile_path, "ea:order/0/*")
+
+    def testStepAfterLinks(self):
+        self.assertRaises(ValueError, compile_path, "@next/ea:order")
+
+
+class PathTests(unittest.TestCase):
+    def setUp(self):
+        self.doc = make_doc()
+
+    def hrefs(self, path, documents=None):
+        if documents is None:
+            documents = self.doc
+        return [link.url() for link in compile_path(path)(documents)]
+
+    def testEmbedded(self):
+        orders = list(compile_path("ea:order")(self.doc))
+        self.assertEquals(list(self.doc.embedded['ea:order']), orders)
+
+    def testStar(self):
+        self.assertEquals(list(compile_path("ea:order")(self.doc)),
+                          list(compile_path("ea:order/*")(self.doc)))
+
+    def testMatchesAcrossEquivalentKeys(self):
+        self.assertEquals(["http://example.com/customers/7809",
+                           "http://example.com/customers/12369"],
+                          self.hrefs("ea:order/*/ea:customer/@self"))
+
+    def testFullUriStep(self):
+        self.assertEquals(
+            ["http://example.com/customers/7809",
+             "http://example.com/customers/12369"],
+            self.hrefs("http:~1~1example.com~1docs~1rels~1order/"
+                       "ea:customer/@self"))
+
+    def testRelativeUriStep(self):
+        summaries = list(compile_path("~1rels~1summary")(self.doc))
+        self.assertEquals([3], [s.properties['count'] for s in summaries])
+
+    def testIndex(self):
+        self.assertEquals(["http://example.com/orders/124"],
+                          self.hrefs("ea:order/1/@self"))
+
+    def built(self, path):
+        doc = make_doc(CountingDocument)
+        del CountingDocument.built[:]
+        return doc, path(doc), CountingDocument.built
+
+    def testIndexBuildsOnlyThatItem(self):
+        doc, matches, built = self.built(compile_path("ea:order/1"))
+        list(matches)
+        self.assertEquals([doc.o['_embedded']['ea:order'][1]], built)
+
+    def testDoesNotBuildEmbeddedOrLinks(self):
+        doc, matches, built = self.built(compile_path("ea:order/@self"))
+        list(matches)
+        self.assertEquals(None, doc._embedded_cache)
+        self.assertEquals(None, doc._links_cache)
+
+    def testUsesBuiltEmbedded(self):
+        orders = self.doc.embedded['ea:order']
+        self.assertTrue(orders[1] is
+                        compile_path("ea:order/1").first(self.doc))
+
+    def testBuiltDocumentsCanBeChanged(self):
+        order = compile_path("ea:order/1").first(self.doc)
+        order.set_property('total', 21)
+        self.assertEquals(21, self.doc.embedded['ea:order'][1]
+                          .properties['total'])
+
+    def testIndexOutOfRange(self):
+        self.assertEquals([], self.hrefs("ea:order/5/@self"))
+
+    def testSingleIsOneElementArray(self):
+        self.assertEquals(["http://example.com/customers/7809"],
+                          self.hrefs("ea:order/0/ea:customer/0/@self"))
+        self.assertEquals([], self.hrefs("ea:order/0/ea:customer/1/@self"))
+
+    def testLinks(self):
+        self.assertEquals(["http://example.com/orders?page=2",
+                           "http://example.com/orders?page=2&fast=1"],
+                          self.hrefs("@next"))
+        self.assertEquals(["http://example.com/orders?page=2&fast=1"],
+                          self.hrefs("@next/1"))
+
+    def testMissingRel(self):
+        self.assertEquals([], self.hrefs("ea:missing/@self"))
+        self.assertEquals([], self.hrefs("ea:order/@missing"))
+
+    def testListOfDocuments(self):
+        orders = self.doc.embedded['ea:order']
+        self.assertEquals(["http://example.com/orders/123",
+                           "http://example.com/orders/124",
+                           "http://example.com/orders/125"],
+                          self.hrefs("@self", orders))
+        self.assertEquals(["http://example.com/orders/125"],
+                          self.hrefs("@self", [orders[2]]))
+
+    def testLazy(self):
+        doc, matches, built = self.built(compile_path("ea:order/@self"))
+        self.assertEquals("http://example.com/orders/123",
+                          next(matches).url())
+        self.assertEquals([doc.o['_embedded']['ea:order'][0]], built)
+
+    def testFirst(self):
+        compiled = compile_path("ea:order/*/ea:customer/@self")
+        self.assertEquals("http://example.com/customers/7809",
+                          compiled.first(self.doc).url())
+        self.assertEquals(None, compile_path("@missing").first(self.doc))
+        self.assertEquals(1, compile_path("@missing").first(self.doc, 1))
+
+    def testReusedAcrossDocuments(self):
+        compiled = compile_path("ea:order/ea:customer/@self")
+        self.assertEquals(list(map(repr, compiled(self.doc))),
+                          list(map(repr, compiled(make_doc()))))
+
+    def testCanonicalKeyRememberedPerCurie(self):
+        compiled = compile_path("ea:order/ea:customer/@self")
+        list(compiled(self.doc))
+        step = compiled.steps[1]
+        self.assertEquals(1, len(step.canonical_keys))
+        self.assertEquals("http://example.com/docs/rels/customer",
+                          step.canonical_key(self.doc.curies,
+                                             self.doc.base_uri))
+
+    def testDifferentCuries(self):
+        other = Document.from_object({
+            '_links': {'curies': [{'name': "ea",
+                                   'href': "http://other.com/{rel}",
+                                   'templated': True}]},
+            '_embedded': {'http://other.com/order': {
+                '_links': {'self': {'href': "/other/1"}}}},
+        }, "http://other.com/")
+        compiled = compile_path("ea:order/@self")
+        self.assertEquals(["http://example.com/orders/123"],
+                          [l.url() for l in compiled(self.doc)][:1])
+        self.assertEquals(["http://other.com/other/1"],
+                          [l.url() for l in compiled(other)])
+
+    def testRelativeCuriesWithDifferentBaseUris(self):
+        def api(base_uri):
+            return Document.from_object({
+                '_links': {'curies': [{'name': "r", 'href': "/rels/{rel}",
+                                       'templated': True}]},
+                '_embedded': {base_uri + "rels/item": {
+                    '_links': {'self': {'href': "/item"}}}},
+            }, base_uri)
+
+        compiled = compile_path("r:item/@self")
+        self.assertEquals(["http://one.com/item"],
+                          [l.url() for l in compiled(api("http://one.com/"))])
+        self.assertEquals(["http://two.com/item"],
+                          [l.url() for l in compiled(api("http://two.com/"))])
+
+    def testCuriesAreNotLinks(self):
+        self.assertEquals([], self.hrefs("@curies"))
+        self.doc.links
+        self.assertEquals([], self.hrefs("@curies"))
+
+    def testFrozenDocument(self):
+        frozen = self.doc.freeze()
+        self.assertEquals(self.hrefs("ea:order/*/ea:customer/@self"),
+                          self.hrefs("ea:order/*/ea:customer/@self", frozen))
+
+
+class StepTests(unittest.TestCase):
+    def testLiteralRelNeedsNoCuries(self):
+        step = path.Step("self", embedded=False)
+        self.assertEquals("self", step.canonical_key(None, None))
+        self.assertEquals(0, len(step.canonical_keys))
+
+    def testRepr(self):
+        self.assertEquals("@next/1",
+                          repr(path.Step("next", embedded=False, index=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
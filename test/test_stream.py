@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import io
+import json
+import unittest
+from dougrain import stream
+
+
+# Literal text, so that the order of the members is known.
+COLLECTION = br"""{
+  "_links": {
+    "self": {"href": "/orders"},
+    "curies": [{"href": "/rels/{rel}", "name": "r", "templated": true}],
+    "r:order": [{"href": "/orders/0"}, {"href": "/orders/1"},
+                {"href": "/orders/2"}],
+    "single": {"href": "/single"}
+  },
+  "count": 3,
+  "note": "braces {[ and \"quotes\"",
+  "_embedded": {
+    "r:order": [
+      {"_links": {"self": {"href": "/orders/0"}}, "total": 0},
+      {"_links": {"self": {"href": "/orders/1"}}, "total": 1},
+      {"_links": {"self": {"href": "/orders/2"}}, "total": 2}
+    ],
+    "single": {"_links": {"self": {"href": "/single"}}}
+  },
+  "tags": ["a", {"b": null}]
+}"""
+
+
+def summarize(events):
+    summary = []
+    for event in events:
+        if event[0] == stream.EMBEDDED:
+            summary.append((event[0], event[1], event[2].url()))
+        else:
+            summary.append(event)
+    return summary
+
+
+class StreamParserTest(unittest.TestCase):
+    def setUp(self):
+        self.text = COLLECTION
+        self.obj = json.loads(self.text.decode('utf-8'))
+
+    def parse(self, chunk_size):
+        parser = stream.StreamParser("http://localhost/")
+        events = []
+        for i in range(0, len(self.text), chunk_size):
+            events.extend(parser.feed(self.text[i:i + chunk_size]))
+        events.extend(parser.close())
+        return summarize(events)
+
+    def testEventsInStreamOrder(self):
+        expected = [(stream.LINKS, self.obj['_links'])]
+        expected.append((stream.PROPERTY, 'count', 3))
+        expected.append((stream.PROPERTY, 'note', "braces {[ and \"quotes\""))
+        expected.extend((stream.EMBEDDED, 'r:order',
+                         "http://localhost/orders/%d" % i) for i in range(3))
+        expected.append((stream.EMBEDDED, 'single', "http://localhost/single"))
+        expected.append((stream.PROPERTY, 'tags', ["a", {"b": None}]))
+
+        self.assertEquals(expected, self.parse(len(self.text)))
+
+    def testChunkBoundariesDoNotMatter(self):
+        expected = self.parse(len(self.text))
+        for chunk_size in range(1, 12):
+            self.assertEquals(expected, self.parse(chunk_size))
+
+    def testEmbeddedDocumentsInheritCuries(self):
+        parser = stream.StreamParser("http://localhost/")
+        events = parser.feed(
+            b'{"_links": {"curies": [{"name": "r", "href": "/rels/{rel}",'
+            b' "templated": true}]},'
+            b' "_embedded": {"r:item":'
+            b' {"_links": {"r:next": {"href": "/2"}}}}}')
+        events.extend(parser.close())
+
+        item = events[-1][2]
+        self.assertEquals("http://localhost/2",
+                          item.links["http://localhost/rels/next"].url())
+
+    def testSplitMultibyteCharacter(self):
+        parser = stream.StreamParser()
+        data = json.dumps({'name': u"caf\xe9"}, ensure_ascii=False)
+        data = data.encode('utf-8')
+        split = data.index(b'\xc3') + 1
+        events = parser.feed(data[:split]) + parser.feed(data[split:])
+        events.extend(parser.close())
+        self.assertEquals([(stream.PROPERTY, 'name', u"caf\xe9")], events)
+
+    def testEmptyDocument(self):
+        self.assertEquals([], list(stream.iterparse(io.BytesIO(b' {} '))))
+        self.assertEquals([], list(stream.iterparse(
+            io.BytesIO(b'{"_embedded": {"items": []}}'), chunk_size=1)))
+
+    def testIterparse(self):
+        events = stream.iterparse(io.BytesIO(self.text), "http://localhost/",
+                                  chunk_size=7)
+        self.assertEquals(self.parse(len(self.text)), summarize(events))
+
+    def testMalformedText(self):
+        for text in [b'[]', b'{"a" 1}', b'{"a": 1,}', b'{"a": 1} x',
+                     b'{"_embedded": {"items": [{}}}']:
+            self.assertRaises(ValueError, list,
+                              stream.iterparse(io.BytesIO(text)))
+
+    def testTruncatedText(self):
+        parser = stream.StreamParser()
+        parser.feed(b'{"a": 1, "_embedded": {"items": [{"b"')
+        self.assertRaises(ValueError, parser.close)
@@ -0,0 +1,240 @@
+#!/usr/bin/python
+# Copyright (c) 2013 Will Harris
+# See the file license.txt for copying permission.
+
+import unittest
+from collections import OrderedDict
+from dougrain import template
+
+# The variables used by the examples in section 3.2 of RFC 6570.
+VARIABLES = {
+    'count': ["one", "two", "three"],
+    'dom': ["example", "com"],
+    'dub': "me/too",
+    'hello': "Hello World!",
+    'half': "50%",
+    'var': "value",
+    'who': "fred",
+    'base': "http://example.com/home/",
+    'path': "/foo/bar",
+    'list': ["red", "green", "blue"],
+    'keys': OrderedDict([("semi", ";"), ("dot", "."), ("comma", ",")]),
+    'v': "6",
+    'x': "1024",
+    'y': "768",
+    'empty': "",
+    'empty_keys': {},
+    'undef': None,
+}
+
+
+class ConformanceTestMixin(object):
+    def testExamples(self):
+        for source, expected in self.EXAMPLES:
+            self.assertEquals(expected,
+                              template.expand(source, VARIABLES),
+                              source)
+
+
+class VariableExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{count}", "one,two,three"),
+        ("{count*}", "one,two,three"),
+        ("{/count}", "/one,two,three"),
+        ("{/count*}", "/one/two/three"),
+        ("{;count}", ";count=one,two,three"),
+        ("{;count*}", ";count=one;count=two;count=three"),
+        ("{?count}", "?count=one,two,three"),
+        ("{?count*}", "?count=one&count=two&count=three"),
+        ("{&count*}", "&count=one&count=two&count=three"),
+    ]
+
+
+class SimpleStringExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{var}", "value"),
+        ("{hello}", "Hello%20World%21"),
+        ("{half}", "50%25"),
+        ("O{empty}X", "OX"),
+        ("O{undef}X", "OX"),
+        ("{x,y}", "1024,768"),
+        ("{x,hello,y}", "1024,Hello%20World%21,768"),
+        ("?{x,empty}", "?1024,"),
+        ("?{x,undef}", "?1024"),
+        ("?{undef,y}", "?768"),
+        ("{var:3}", "val"),
+        ("{var:30}", "value"),
+        ("{list}", "red,green,blue"),
+        ("{list*}", "red,green,blue"),
+        ("{keys}", "semi,%3B,dot,.,comma,%2C"),
+        ("{keys*}", "semi=%3B,dot=.,comma=%2C"),
+    ]
+
+
+class ReservedExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{+var}", "value"),
+        ("{+hello}", "Hello%20World!"),
+        ("{+half}", "50%25"),
+        ("{base}index", "http%3A%2F%2Fexample.com%2Fhome%2Findex"),
+        ("{+base}index", "http://example.com/home/index"),
+        ("O{+empty}X", "OX"),
+        ("O{+undef}X", "OX"),
+        ("{+path}/here", "/foo/bar/here"),
+        ("here?ref={+path}", "here?ref=/foo/bar"),
+        ("up{+path}{var}/here", "up/foo/barvalue/here"),
+        ("{+x,hello,y}", "1024,Hello%20World!,768"),
+        ("{+path,x}/here", "/foo/bar,1024/here"),
+        ("{+path:6}/here", "/foo/b/here"),
+        ("{+list}", "red,green,blue"),
+        ("{+list*}", "red,green,blue"),
+        ("{+keys}", "semi,;,dot,.,comma,,"),
+        ("{+keys*}", "semi=;,dot=.,comma=,"),
+    ]
+
+
+class FragmentExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{#var}", "#value"),
+        ("{#hello}", "#Hello%20World!"),
+        ("{#half}", "#50%25"),
+        ("foo{#empty}", "foo#"),
+        ("foo{#undef}", "foo"),
+        ("{#x,hello,y}", "#1024,Hello%20World!,768"),
+        ("{#path,x}/here", "#/foo/bar,1024/here"),
+        ("{#path:6}/here", "#/foo/b/here"),
+        ("{#list}", "#red,green,blue"),
+        ("{#list*}", "#red,green,blue"),
+        ("{#keys}", "#semi,;,dot,.,comma,,"),
+        ("{#keys*}", "#semi=;,dot=.,comma=,"),
+    ]
+
+
+class LabelExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{.who}", ".fred"),
+        ("{.who,who}", ".fred.fred"),
+        ("{.half,who}", ".50%25.fred"),
+        ("www{.dom*}", "www.example.com"),
+        ("X{.var}", "X.value"),
+        ("X{.empty}", "X."),
+        ("X{.undef}", "X"),
+        ("X{.var:3}", "X.val"),
+        ("X{.list}", "X.red,green,blue"),
+        ("X{.list*}", "X.red.green.blue"),
+        ("X{.keys}", "X.semi,%3B,dot,.,comma,%2C"),
+        ("X{.keys*}", "X.semi=%3B.dot=..comma=%2C"),
+        ("X{.empty_keys}", "X"),
+        ("X{.empty_keys*}", "X"),
+    ]
+
+
+class PathSegmentExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{/who}", "/fred"),
+        ("{/who,who}", "/fred/fred"),
+        ("{/half,who}", "/50%25/fred"),
+        ("{/who,dub}", "/fred/me%2Ftoo"),
+        ("{/var}", "/value"),
+        ("{/var,empty}", "/value/"),
+        ("{/var,undef}", "/value"),
+        ("{/var,x}/here", "/value/1024/here"),
+        ("{/var:1,var}", "/v/value"),
+        ("{/list}", "/red,green,blue"),
+        ("{/list*}", "/red/green/blue"),
+        ("{/list*,path:4}", "/red/green/blue/%2Ffoo"),
+        ("{/keys}", "/semi,%3B,dot,.,comma,%2C"),
+        ("{/keys*}", "/semi=%3B/dot=./comma=%2C"),
+    ]
+
+
+class PathStyleExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{;who}", ";who=fred"),
+        ("{;half}", ";half=50%25"),
+        ("{;empty}", ";empty"),
+        ("{;v,empty,who}", ";v=6;empty;who=fred"),
+        ("{;v,bar,who}", ";v=6;who=fred"),
+        ("{;x,y}", ";x=1024;y=768"),
+        ("{;x,y,empty}", ";x=1024;y=768;empty"),
+        ("{;x,y,undef}", ";x=1024;y=768"),
+        ("{;hello:5}", ";hello=Hello"),
+        ("{;list}", ";list=red,green,blue"),
+        ("{;list*}", ";list=red;list=green;list=blue"),
+        ("{;keys}", ";keys=semi,%3B,dot,.,comma,%2C"),
+        ("{;keys*}", ";semi=%3B;dot=.;comma=%2C"),
+    ]
+
+
+class FormQueryExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{?who}", "?who=fred"),
+        ("{?half}", "?half=50%25"),
+        ("{?x,y}", "?x=1024&y=768"),
+        ("{?x,y,empty}", "?x=1024&y=768&empty="),
+        ("{?x,y,undef}", "?x=1024&y=768"),
+        ("{?var:3}", "?var=val"),
+        ("{?list}", "?list=red,green,blue"),
+        ("{?list*}", "?list=red&list=green&list=blue"),
+        ("{?keys}", "?keys=semi,%3B,dot,.,comma,%2C"),
+        ("{?keys*}", "?semi=%3B&dot=.&comma=%2C"),
+    ]
+
+
+class FormContinuationExpansionTest(ConformanceTestMixin, unittest.TestCase):
+    EXAMPLES = [
+        ("{&who}", "&who=fred"),
+        ("{&half}", "&half=50%25"),
+        ("?fixed=yes{&x}", "?fixed=yes&x=1024"),
+        ("{&x,y,empty}", "&x=1024&y=768&empty="),
+        ("{&var:3}", "&var=val"),
+        ("{&list}", "&list=red,green,blue"),
+        ("{&list*}", "&list=red&list=green&list=blue"),
+        ("{&keys}", "&keys=semi,%3B,dot,.,comma,%2C"),
+        ("{&keys*}", "&semi=%3B&dot=.&comma=%2C"),
+    ]
+
+
+class CompiledTemplateTest(unittest.TestCase):
+    def testSimpleTemplatesAreSpecialized(self):
+        compiled = template.compile_template("/rels/{rel}.html")
+        self.assertTrue(isinstance(compiled, template.SimpleTemplate))
+        self.assertEquals("/rels/", compiled.prefix)
+        self.assertEquals(".html", compiled.suffix)
+
+    def testSimpleTemplateEncodesValue(self):
+        compiled = template.compile_template("/rels/{rel}")
+        self.assertEquals("/rels/a%20b%2Fc", compiled.expand(rel="a b/c"))
+        self.assertEquals("/rels/", compiled.expand())
+        self.assertEquals("/rels/1,2", compiled.expand(rel=[1, 2]))
+
+    def testOtherTemplatesAreNotSpecialized(self):
+        for source in ["/rels/{+rel}", "/rels/{rel*}", "/rels/{rel:2}",
+                       "/rels/{a,b}", "/{a}/{b}", "/rels/"]:
+            compiled = template.compile_template(source)
+            self.assertFalse(isinstance(compiled, template.SimpleTemplate),
+                             source)
+
+    def testCompiledTemplatesAreShared(self):
+        self.assertTrue(template.compile_template("/x/{y}") is
+                        template.compile_template("/x/{y}"))
+
+    def testListsVariables(self):
+        compiled = template.compile_template("/{a}{?b,c*}{&a,d:3}")
+        self.assertEquals(['a', 'b', 'c', 'd'], compiled.variables)
+
+    def testUnclosedExpressionIsLiteral(self):
+        self.assertEquals("/a/1{b", template.expand("/a/{a}{b", {'a': 1}))
+
+    def testNumbersAreConvertedToText(self):
+        self.assertEquals("?page=2&size=1.5",
+                          template.expand("{?page,size}",
+                                          {'page': 2, 'size': 1.5}))
+
+    def testExpandsUnicode(self):
+        self.assertEquals(u"/caf%C3%A9",
+                          template.expand(u"/{name}", {'name': u"caf\xe9"}))
+
+
+if __name__ == '__main__':
+    unittest.main()